@@ -0,0 +1,163 @@
+# backend/collectors/asset_pipeline.py
+"""
+采集流水线：采集器逐批产出资产，唯一的写入阶段（sink）经有界队列消费。
+采集与写入并行；队列满时采集端等待（背压），内存中只保留队列容量内的批次，
+每个资产只写入一次
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from backend.config import COLLECTION_QUEUE_SIZE, COLLECTION_SINK, COLLECTION_SINK_PATH
+from backend.models.metadata import DataAsset, RowBatch
+
+# 采集结果：普通资产，或按列存放的一批行资产
+CollectedAsset = Union[DataAsset, RowBatch]
+
+SINK_KINDS = ("graph", "file", "null")
+
+
+def count_assets_by_type(assets: Iterable[CollectedAsset]) -> Dict[str, int]:
+    """各类资产数量，RowBatch 按其包含的行数计"""
+    counts: Dict[str, int] = {}
+    for asset in assets:
+        counts[asset.type] = counts.get(asset.type, 0) + (len(asset) if isinstance(asset, RowBatch) else 1)
+    return counts
+
+
+class AssetSink:
+    """写入阶段：write() 只在流水线的写入线程中调用，close() 在全部批次写完后调用一次"""
+
+    name = "abstract"
+
+    def __init__(self):
+        self.batches = 0
+        self.type_counts: Dict[str, int] = {}
+
+    def write(self, batch: List[CollectedAsset]):
+        self._write(batch)
+        self.batches += 1
+        for asset_type, count in count_assets_by_type(batch).items():
+            self.type_counts[asset_type] = self.type_counts.get(asset_type, 0) + count
+
+    def _write(self, batch: List[CollectedAsset]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sink": self.name, "assets": sum(self.type_counts.values()), "batches": self.batches,
+                "types": dict(self.type_counts)}
+
+
+class GraphAssetSink(AssetSink):
+    """写入图存储：每个文件批次一次 create_assets_bulk（其内部再按 batch_size 分事务）"""
+
+    name = "graph"
+
+    def __init__(self, graph_service, batch_size: int = 1000):
+        super().__init__()
+        self.graph_service = graph_service
+        self.batch_size = batch_size
+
+    def _write(self, batch: List[CollectedAsset]):
+        self.graph_service.create_assets_bulk(batch, self.batch_size)
+
+
+class JsonlAssetSink(AssetSink):
+    """写入 JSON Lines 文件：每个资产一行，RowBatch 整批一行（保持按列存放）"""
+
+    name = "file"
+
+    def __init__(self, path: Path = COLLECTION_SINK_PATH):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def _write(self, batch: List[CollectedAsset]):
+        for asset in batch:
+            self._file.write(json.dumps(asset.model_dump(), ensure_ascii=False, default=str))
+            self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+
+
+class NullAssetSink(AssetSink):
+    """只计数不写入，用于试运行"""
+
+    name = "null"
+
+    def _write(self, batch: List[CollectedAsset]):
+        pass
+
+
+def create_asset_sink(kind: Optional[str] = None, graph_service=None, path: Optional[Path] = None) -> AssetSink:
+    """按 kind（缺省为 COLLECTION_SINK 配置）创建写入阶段"""
+    kind = kind or COLLECTION_SINK
+    if kind == "graph":
+        if graph_service is None:
+            from backend.services.graph_service import GraphService
+            graph_service = GraphService()
+        return GraphAssetSink(graph_service)
+    if kind == "file":
+        return JsonlAssetSink(path or COLLECTION_SINK_PATH)
+    if kind == "null":
+        return NullAssetSink()
+    raise ValueError(f"未知的采集写入类型: {kind}（可选 {', '.join(SINK_KINDS)}）")
+
+
+# 队列结束标记
+_DONE = object()
+
+
+def run_pipeline(batches: Iterable[List[CollectedAsset]], sink: AssetSink,
+                 queue_size: int = COLLECTION_QUEUE_SIZE) -> Dict[str, Any]:
+    """
+    在当前线程消费 batches（采集），写入线程经容量为 queue_size 的队列调用 sink.write()。
+    写入失败后不再写入后续批次，采集结束后抛出该异常；返回 sink 的统计信息
+    """
+    started = time.perf_counter()
+    pending: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+    errors: List[Exception] = []
+
+    def consume():
+        while True:
+            batch = pending.get()
+            if batch is _DONE:
+                return
+            if errors:
+                # 已失败：继续取出剩余批次，避免采集端阻塞在已满的队列上
+                continue
+            try:
+                sink.write(batch)
+            except Exception as e:
+                logging.error(f"资产写入失败（{sink.name}）: {e}")
+                errors.append(e)
+
+    writer = threading.Thread(target=consume, name=f"asset-sink-{sink.name}", daemon=True)
+    writer.start()
+    try:
+        for batch in batches:
+            if errors:
+                break
+            if batch:
+                pending.put(batch)
+    finally:
+        pending.put(_DONE)
+        writer.join()
+        sink.close()
+
+    if errors:
+        raise errors[0]
+    stats = sink.stats()
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    logging.info(f"采集流水线完成：{stats['assets']} 个资产，{stats['batches']} 批，"
+                 f"写入 {sink.name}，耗时 {stats['seconds']}s")
+    return stats
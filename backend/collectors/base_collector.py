@@ -1,8 +1,10 @@
 # collectors/base_collector.py
 from abc import ABC, abstractmethod
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+from backend.config import MYSQL_SCHEMA_WORKERS
 from backend.models.metadata import DataAsset, Table, Column
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, text
 import pandas as pd
 from pathlib import Path
 import logging
@@ -19,10 +21,42 @@ class BaseMetadataCollector(ABC):
         pass
 
 
+# MySQL 自带的系统库，不作为数据资产采集
+MYSQL_SYSTEM_SCHEMAS = ("information_schema", "mysql", "performance_schema", "sys")
+
+MYSQL_SCHEMAS_QUERY = text("SELECT SCHEMA_NAME FROM information_schema.SCHEMATA ORDER BY SCHEMA_NAME")
+
+# 一个库的全部表（TABLE_ROWS 为存储引擎给出的估计值，InnoDB 下不精确）
+MYSQL_TABLES_QUERY = text("""
+SELECT TABLE_NAME, TABLE_ROWS, TABLE_COMMENT
+FROM information_schema.TABLES
+WHERE TABLE_SCHEMA = :schema AND TABLE_TYPE = 'BASE TABLE'
+ORDER BY TABLE_NAME
+""")
+
+# 一个库的全部列，COLUMN_KEY = 'PRI' 为主键列
+MYSQL_COLUMNS_QUERY = text("""
+SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, COLUMN_KEY, COLUMN_COMMENT
+FROM information_schema.COLUMNS
+WHERE TABLE_SCHEMA = :schema
+ORDER BY TABLE_NAME, ORDINAL_POSITION
+""")
+
+
 class MySQLCollector(BaseMetadataCollector):
-    def __init__(self, host, port, user, password, database=None):
+    """
+    按库批量读取 information_schema：每个库两次集合查询取回全部表与列（含行数估计、主键），
+    各库在线程池中并行扫描，连接来自同一个连接池
+    """
+
+    def __init__(self, host=None, port=None, user=None, password=None, database=None,
+                 workers: int = MYSQL_SCHEMA_WORKERS, engine=None):
+        self.database = database
+        self.workers = max(1, workers)
         self.connection_string = f"mysql+pymysql://{user}:{password}@{host}:{port}/{database if database else ''}"
-        self.engine = create_engine(self.connection_string)
+        # 可传入现成的 engine（如测试用的 SQLite information_schema 替身）
+        self.engine = engine or create_engine(self.connection_string, pool_size=self.workers,
+                                              pool_pre_ping=True)
 
     def test_connection(self) -> bool:
         try:
@@ -31,46 +65,86 @@ class MySQLCollector(BaseMetadataCollector):
         except Exception:
             return False
 
-    def collect_metadata(self) -> List[Table]:
-        inspector = inspect(self.engine)
-        tables = []
-        current_time = datetime.now().isoformat()
+    def list_schemas(self) -> List[str]:
+        """待采集的库：指定了 database 时只采集该库，否则为全部非系统库"""
+        if self.database:
+            return [self.database]
+        with self.engine.connect() as conn:
+            schemas = [row[0] for row in conn.execute(MYSQL_SCHEMAS_QUERY)]
+        return [schema for schema in schemas if schema.lower() not in MYSQL_SYSTEM_SCHEMAS]
+
+    def collect_schema(self, schema: str, timestamp: str) -> List[Table]:
+        """采集一个库的全部表（列资产挂在 Table.columns 上）"""
+        with self.engine.connect() as conn:
+            table_rows = conn.execute(MYSQL_TABLES_QUERY, {"schema": schema}).fetchall()
+            column_rows = conn.execute(MYSQL_COLUMNS_QUERY, {"schema": schema}).fetchall()
+
+        columns: Dict[str, List[Column]] = {}
+        for table_name, column_name, column_type, column_key, comment in column_rows:
+            columns.setdefault(table_name, []).append(Column(
+                id=f"mysql.{schema}.{table_name}.{column_name}",
+                name=column_name,
+                type="column",
+                data_type=str(column_type),
+                is_primary_key=column_key == "PRI",
+                description=comment or f"Column {column_name} in table {table_name}",
+                owner="MySQL采集器",
+                tags=["column", "数据列"],
+                created_time=timestamp,
+                updated_time=timestamp
+            ))
 
-        # 获取数据库列表
-        databases = inspector.get_schema_names()
-
-        for schema in databases:
-            for table_name in inspector.get_table_names(schema=schema):
-                # 创建表资产
-                table = Table(
-                    id=f"mysql.{schema}.{table_name}",
-                    name=table_name,
-                    type="table",
-                    description=f"MySQL table {schema}.{table_name}",
-                    database="mysql",
-                    schema=schema,
-                    created_time=current_time,
-                    updated_time=current_time,
-                    columns=[]
-                )
+        tables = []
+        for table_name, table_rows_estimate, comment in table_rows:
+            tables.append(Table(
+                id=f"mysql.{schema}.{table_name}",
+                name=table_name,
+                type="table",
+                description=comment or f"MySQL table {schema}.{table_name}",
+                owner="MySQL采集器",
+                tags=["mysql", "table", "数据表"],
+                database="mysql",
+                schema=schema,
+                created_time=timestamp,
+                updated_time=timestamp,
+                columns=columns.get(table_name, []),
+                row_count=int(table_rows_estimate) if table_rows_estimate is not None else None
+            ))
+        return tables
 
-                # 收集列信息
-                columns = []
-                for column_info in inspector.get_columns(table_name, schema=schema):
-                    col = Column(
-                        id=f"mysql.{schema}.{table_name}.{column_info['name']}",
-                        name=column_info['name'],
-                        type="column",
-                        data_type=str(column_info['type']),
-                        description=f"Column {column_info['name']} in table {table_name}",
-                        created_time=current_time,
-                        updated_time=current_time
-                    )
-                    columns.append(col)
-
-                table.columns = columns
-                tables.append(table)
+    def iter_schema_tables(self, timestamp: str) -> Iterator[Tuple[str, List[Table]]]:
+        """并行扫描各库，按库名顺序产出 (库名, 表列表)；单个库失败只记录日志"""
+        schemas = self.list_schemas()
+
+        def collect(schema: str) -> List[Table]:
+            try:
+                return self.collect_schema(schema, timestamp)
+            except Exception as e:
+                logging.error(f"MySQL库采集失败 {schema}: {e}")
+                return []
+
+        if self.workers <= 1 or len(schemas) <= 1:
+            for schema in schemas:
+                yield schema, collect(schema)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(schemas))) as pool:
+            yield from zip(schemas, pool.map(collect, schemas))
+
+    def iter_asset_batches(self) -> Iterator[List[DataAsset]]:
+        """逐库产出资产批（表及其列展开为独立资产），供采集流水线消费"""
+        timestamp = datetime.now().isoformat()
+        for _, tables in self.iter_schema_tables(timestamp):
+            batch: List[DataAsset] = []
+            for table in tables:
+                batch.append(table)
+                batch.extend(table.columns)
+            yield batch
 
+    def collect_metadata(self) -> List[Table]:
+        current_time = datetime.now().isoformat()
+        tables = []
+        for _, schema_tables in self.iter_schema_tables(current_time):
+            tables.extend(schema_tables)
         return tables
 
 
@@ -0,0 +1,164 @@
+# backend/collectors/collection_manifest.py
+"""
+增量采集清单：记录每个源文件的大小、修改时间、内容哈希，以及 SQLite 每个表的签名。
+再次采集时只处理新增/变更的数据源，并给出需要从图中删除的资产 id 前缀。
+大小与修改时间均未变的文件只需一次 stat，不读取内容
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, Set
+
+from backend.collectors.file_collector import FileCollector, SourceFile
+from backend.config import COLLECTION_MANIFEST_PATH
+
+
+def _file_hash(file_path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sqlite_table_signatures(file_path: Path, batch_rows: int = 10000) -> Dict[str, str]:
+    """
+    SQLite 每个表的签名：建表语句 + 全部行内容的哈希（按表扫描顺序分批读取）。
+    只在库文件哈希已变化时计算，因此原地 UPDATE 改写已有行也能定位到具体的表
+    """
+    signatures = {}
+    uri = f"{file_path.resolve().as_uri()}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as conn:
+        tables = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall()
+        for name, sql in tables:
+            quoted = '"' + name.replace('"', '""') + '"'
+            digest = hashlib.sha256(str(sql).encode("utf-8"))
+            cursor = conn.execute(f"SELECT * FROM {quoted}")
+            for rows in iter(lambda: cursor.fetchmany(batch_rows), []):
+                digest.update(repr(rows).encode("utf-8"))
+            signatures[name] = digest.hexdigest()
+    return signatures
+
+
+def _covered(prefix: str, delete_prefixes: Set[str]) -> bool:
+    """prefix 下的资产是否会被删除：delete_assets_by_prefix(p) 删除 id 等于 p 或以 "p." 开头的资产"""
+    return any(prefix == deleted or prefix.startswith(deleted + ".") for deleted in delete_prefixes)
+
+
+class CollectionManifest:
+    def __init__(self, path: Path = COLLECTION_MANIFEST_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"采集清单读取失败，将全量采集 {self.path}: {e}")
+
+    def reset(self):
+        """全量采集前调用：清空清单，所有文件都视为新增"""
+        self.entries = {}
+
+    def plan(self, collector: FileCollector) -> Dict[str, Any]:
+        """
+        对比清单与当前目录，返回
+        files（需要采集的 SourceFile，保持 discover_files 顺序）、
+        delete_prefixes（需要先删除的资产 id 前缀）、unchanged/changed/added/removed 计数
+        """
+        sources = collector.discover_files()
+        pending: Dict[str, Dict[str, Any]] = {}
+        to_collect: Dict[int, SourceFile] = {}
+        delete_prefixes = set()
+        counts = {"unchanged": 0, "changed": 0, "added": 0, "removed": 0}
+
+        for position, source in enumerate(sources):
+            key = str(source.path.resolve())
+            stat = source.path.stat()
+            old = self.entries.get(key)
+            entry = {"kind": source.kind, "prefix": collector.source_prefix(source),
+                     "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+            if old and old["kind"] == source.kind and (old["size"], old["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+                pending[key] = old
+                counts["unchanged"] += 1
+                continue
+
+            entry["hash"] = _file_hash(source.path)
+            if old and old["kind"] == source.kind and old.get("hash") == entry["hash"]:
+                # 只是修改时间变化（如被复制/touch），内容未变
+                pending[key] = {**old, **entry}
+                counts["unchanged"] += 1
+                continue
+
+            if source.kind == "sqlite":
+                try:
+                    entry["tables"] = _sqlite_table_signatures(source.path)
+                except sqlite3.Error as e:
+                    logging.warning(f"SQLite表签名读取失败 {source.path}: {e}")
+                    entry["tables"] = {}
+
+            counts["changed" if old else "added"] += 1
+            if old and source.kind == "sqlite" and old["kind"] == "sqlite" and entry["tables"]:
+                # 只重新采集签名变化的表，删除已变化/已删除的表
+                old_tables = old.get("tables", {})
+                changed = tuple(name for name, signature in entry["tables"].items()
+                                if old_tables.get(name) != signature)
+                removed = [name for name in old_tables if name not in entry["tables"]]
+                delete_prefixes.update(collector.sqlite_table_prefix(source, name) for name in changed + tuple(removed))
+                to_collect[position] = source._replace(tables=changed)
+            else:
+                if old:
+                    delete_prefixes.add(old["prefix"])
+                to_collect[position] = source
+            pending[key] = entry
+
+        for key, old in self.entries.items():
+            if key not in pending:
+                delete_prefixes.add(old["prefix"])
+                counts["removed"] += 1
+
+        # 不同文件名可能映射到相同或互为前缀的 id 前缀（如 sales.csv 与 sales.2023.csv），
+        # 资产会随前缀一起被删除的文件/表需要重新采集
+        for position, source in enumerate(sources):
+            if _covered(collector.source_prefix(source), delete_prefixes):
+                to_collect[position] = source._replace(tables=None)
+            elif source.kind == "sqlite":
+                scheduled = to_collect.get(position, source._replace(tables=()))
+                if scheduled.tables is None:
+                    continue
+                extra = tuple(name for name in pending[str(source.path.resolve())].get("tables", {})
+                              if name not in scheduled.tables
+                              and _covered(collector.sqlite_table_prefix(source, name), delete_prefixes))
+                if extra:
+                    to_collect[position] = scheduled._replace(tables=scheduled.tables + extra)
+
+        self._pending = pending
+        return {
+            "files": [to_collect[position] for position in sorted(to_collect)],
+            "delete_prefixes": sorted(delete_prefixes),
+            **counts,
+        }
+
+    def commit(self, failed: Iterable[SourceFile] = ()):
+        """
+        采集完成后保存 plan() 计算出的新清单。failed 为采集失败的数据源：其旧资产已被删除，
+        清单中只保留前缀、清空大小/修改时间/哈希，下次增量采集时作为变更重新采集
+        """
+        for source in failed:
+            key = str(source.path.resolve())
+            if key in self._pending:
+                entry = self._pending[key]
+                self._pending[key] = {"kind": entry["kind"], "prefix": entry["prefix"],
+                                      "size": None, "mtime_ns": None}
+        self.entries, self._pending = self._pending, {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -1,7 +1,12 @@
 # backend/collectors/file_collector.py
+import itertools
+import numpy as np
 import pandas as pd
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional, Tuple
 import logging
 from datetime import datetime
 import re
@@ -10,14 +15,141 @@ import json
 import sqlite3
 import openpyxl
 
-from backend.models.metadata import DataAsset, Column, DataRow, Sheet, Database
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖：未安装时跳过 Parquet/Arrow 文件
+    pa = pq = None
+
+from backend.config import (
+    COLLECTOR_WORKERS, CSV_CHUNK_ROWS, SAMPLE_SEED, SQLITE_TABLE_WORKERS
+)
+from backend.models.metadata import DataAsset, Column, DataFile, RowBatch, Sheet, Database, Table
+from backend.services.row_store import RowStore, get_row_store
+from backend.services.sketch_store import SketchStore, get_sketch_store
+from backend.services.sketches import BottomKSample, ColumnSketch, update_column_sketches
+from .asset_pipeline import CollectedAsset, count_assets_by_type
 from .base_collector import BaseMetadataCollector
+from .file_sniffer import CsvSniff, try_sniff_csv
+
+
+# 文件类型 -> 匹配模式，采集按此顺序进行
+FILE_PATTERNS = {
+    "csv": ["*.csv", "*.txt"],
+    "excel": ["*.xlsx", "*.xls"],
+    "sqlite": ["*.db", "*.sqlite", "*.sqlite3", "*.db3"],
+    "parquet": ["*.parquet", "*.pq"],
+    "arrow": ["*.arrow", "*.feather", "*.ipc"],
+}
+
+# 需要 pyarrow 的列式文件类型
+COLUMNAR_KINDS = ("parquet", "arrow")
+
+
+# 一次取回全部表的列信息
+SQLITE_CATALOG_QUERY = """
+SELECT m.name, p.cid, p.name, p.type, p.pk
+FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p
+WHERE m.type = 'table'
+ORDER BY m.rowid, p.cid
+"""
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _open_sqlite_readonly(file_path: Path) -> sqlite3.Connection:
+    """
+    只读打开 SQLite：immutable=1 跳过文件锁与变更检测，
+    采集期间数据库不应被其他进程写入（未合并的 WAL 内容不可见）
+    """
+    return sqlite3.connect(f"{file_path.resolve().as_uri()}?mode=ro&immutable=1", uri=True)
+
+
+# 行名称优先使用的主键字段、名称字段（按顺序取第一个有值的字段）
+ROW_KEY_FIELDS = ['id', 'ID', '编号', '序号', 'order_id', 'customer_id', 'product_id', 'promo_id']
+ROW_NAME_FIELDS = ['name', '名称', 'title', '产品名称', '促销名称', 'customer_name']
+
+
+def _excel_cell_text(value: Any) -> str:
+    """Excel 单元格 -> 行样本取值：日期格式化，空单元格为空字符串"""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value) if value is not None else ""
+
+
+def _sqlite_cell_value(value: Any) -> Any:
+    """SQLite 取值 -> 行样本取值：NULL 为空字符串，BLOB 尽量按 UTF-8 解码，否则记录其哈希"""
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, bytes):
+        try:
+            return value.decode('utf-8')
+        except UnicodeDecodeError:
+            return f"BLOB_data_{hashlib.md5(value).hexdigest()[:8]}"
+    return str(value)
+
+
+def _columnar_cell_value(value: Any) -> Any:
+    """Parquet/Arrow 取值 -> 行样本取值：日期时间转 ISO 字符串，嵌套结构转 JSON，其余与 SQLite 一致"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return _sqlite_cell_value(value)
+    return str(value)
+
+
+def _statistic_value(value: Any) -> Any:
+    """列统计中的最小/最大值 -> 可 JSON 序列化的值"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        try:
+            return value.decode('utf-8')
+        except UnicodeDecodeError:
+            return value.hex()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+# 数据源类型 -> 资产 id 前缀
+SOURCE_PREFIXES = {"csv": "file", "excel": "excel", "sqlite": "sqlite", "parquet": "parquet", "arrow": "arrow"}
+
+
+class SourceFile(NamedTuple):
+    """待采集的数据源文件；tables 仅对 SQLite 有效，None 表示采集全部表"""
+    kind: str
+    path: Path
+    tables: Optional[Tuple[str, ...]] = None
+
+
+def _collect_file_task(base_path: str, sample_rows: int, row_store_path: str, sketch_store_path: str,
+                       source: SourceFile, timestamp: str) -> List[CollectedAsset]:
+    """进程池任务：在子进程中采集单个文件，异常经 future 传回主进程记录"""
+    collector = FileCollector(base_path, sample_rows, row_store=get_row_store(Path(row_store_path)),
+                              sketch_store=get_sketch_store(Path(sketch_store_path)), workers=1)
+    return collector.collect_file(source, timestamp)
 
 
 class FileCollector(BaseMetadataCollector):
-    def __init__(self, base_path: str, sample_rows: int = 100):
+    def __init__(self, base_path: str, sample_rows: int = 100, row_store: Optional[RowStore] = None,
+                 workers: Optional[int] = None, sketch_store: Optional[SketchStore] = None):
         self.base_path = Path(base_path)
         self.sample_rows = sample_rows  # 采样行数，避免数据过大
+        # 样本行内容写入行样本存储，图中的行节点只保留引用
+        self.row_store = row_store or get_row_store()
+        # 每列的取值摘要写入列摘要存储，供数据指纹血缘使用
+        self.sketch_store = sketch_store or get_sketch_store()
+        # 并行采集的进程数，<= 1 时在当前进程内顺序采集
+        self.workers = COLLECTOR_WORKERS if workers is None else workers
+        # 最近一次 iter_file_batches 中采集失败的数据源，增量清单不记录它们，下次采集时重试
+        self.failed_sources: List[SourceFile] = []
 
     def test_connection(self) -> bool:
         return self.base_path.exists()
@@ -26,104 +158,229 @@ class FileCollector(BaseMetadataCollector):
         """将任意路径/字段名映射为 URL-safe 字符串"""
         return re.sub(r'[^0-9A-Za-z._-]', '_', str(raw))
 
-    def _calculate_row_hash(self, row_data: Dict[str, Any]) -> str:
-        """计算行数据的哈希值"""
-        row_str = json.dumps(row_data, sort_keys=True, ensure_ascii=False)
-        return hashlib.md5(row_str.encode('utf-8')).hexdigest()
-
-    def _generate_row_name(self, table_name: str, row_index: int, row_data: Dict[str, Any]) -> str:
-        """生成更清晰的行数据名称"""
-        # 尝试提取关键字段作为标识
-        key_fields = []
-
-        # 优先查找常见的主键字段
-        for key_field in ['id', 'ID', '编号', '序号', 'order_id', 'customer_id', 'product_id', 'promo_id']:
-            if key_field in row_data and row_data[key_field]:
-                key_fields.append(f"{key_field}:{row_data[key_field]}")
+    def _row_hashes(self, frame: pd.DataFrame) -> List[str]:
+        """
+        按列向量化计算每行内容的哈希（16 位十六进制）：
+        字段按名称排序后逐列哈希再合并，字段名参与哈希，与字段顺序无关
+        """
+        columns = sorted(frame.columns, key=str)
+        hashes = pd.util.hash_pandas_object(frame[columns], index=False).to_numpy(dtype=np.uint64)
+        names_key = json.dumps([str(col) for col in columns], ensure_ascii=False)
+        hashes = hashes ^ np.uint64(int(hashlib.md5(names_key.encode('utf-8')).hexdigest()[:16], 16))
+        hexed = hashes.astype('>u8').tobytes().hex()
+        return [hexed[i:i + 16] for i in range(0, len(hexed), 16)]
+
+    def _generate_row_names(self, table_name: str, indexes: pd.Series, frame: pd.DataFrame) -> pd.Series:
+        """
+        按列生成整批行的名称：优先取主键字段，其次名称字段，否则取前两个非空字段，
+        如 "orders记录3[order_id:1001]"
+        """
+        frame = frame.reset_index(drop=True)
+        key_info = pd.Series(None, index=frame.index, dtype=object)
+        # 主键/名称字段需为真值，前两个非空字段只排除空值与空字符串
+        non_empty = frame.notna() & (frame != '')
+        truthy = non_empty & (frame != 0)
+
+        for fields, width in ((ROW_KEY_FIELDS, None), (ROW_NAME_FIELDS, 20)):
+            for field in fields:
+                if field not in frame.columns:
+                    continue
+                mask = key_info.isna() & truthy[field]
+                if mask.any():
+                    # 截取前 width 个字符避免名称过长
+                    key_info[mask] = f"{field}:" + frame.loc[mask, field].astype(str).str[:width]
+            if key_info.notna().all():
                 break
 
-        # 如果没有找到主键字段，尝试使用名称字段
-        if not key_fields:
-            for name_field in ['name', '名称', 'title', '产品名称', '促销名称', 'customer_name']:
-                if name_field in row_data and row_data[name_field]:
-                    # 截取前20个字符避免名称过长
-                    name_value = str(row_data[name_field])[:20]
-                    key_fields.append(f"{name_field}:{name_value}")
-                    break
-
-        # 如果还是没有找到关键字段，使用前两个非空字段
-        if not key_fields:
-            non_empty_fields = [(k, v) for k, v in row_data.items() if v not in [None, '']]
-            for i, (field, value) in enumerate(non_empty_fields[:2]):  # 最多取前两个字段
-                if i < 2:
-                    value_str = str(value)[:15]  # 截断长值
-                    key_fields.append(f"{field}:{value_str}")
-
-        # 构建最终名称
-        if key_fields:
-            key_info = " | ".join(key_fields)
-            return f"{table_name}记录{row_index}[{key_info}]"
-        else:
-            return f"{table_name}记录{row_index}"
-
-    def collect_metadata(self) -> List[DataAsset]:
-        assets: List[DataAsset] = []
-        now = datetime.now().isoformat()
+        missing = key_info.isna()
+        if missing.any():
+            # 每行第 1、2 个非空字段
+            rank = non_empty.cumsum(axis=1)
+            labels = pd.DataFrame({col: f"{col}:" + frame[col].astype(str).str[:15] for col in frame.columns})
+            first = labels.where(non_empty & (rank == 1)).bfill(axis=1).iloc[:, 0]
+            second = labels.where(non_empty & (rank == 2)).bfill(axis=1).iloc[:, 0]
+            fallback = first.where(second.isna(), first + " | " + second)
+            key_info[missing] = fallback[missing]
+
+        names = table_name + "记录" + indexes.astype(str).reset_index(drop=True)
+        return names.where(key_info.isna(), names + "[" + key_info + "]")
+
+    def _write_column_sketches(self, table_id: str, frame: pd.DataFrame,
+                               sketches: Optional[Dict[str, ColumnSketch]] = None):
+        """
+        写入表中各列的取值摘要：sketches 为全量扫描得到的摘要（CSV），
+        缺省时由样本行计算（Excel/SQLite/Parquet/Arrow 只读取样本）
+        """
+        if sketches is None:
+            sketches = {}
+            update_column_sketches(sketches, frame)
+        try:
+            self.sketch_store.write_sketches(
+                table_id, {f"{table_id}.{self._make_safe_id(col)}": sketch for col, sketch in sketches.items()}
+            )
+        except Exception as e:
+            logging.warning(f"列摘要写入失败 {table_id}: {e}")
+
+    def _build_row_batch(self, table_id: str, table_name: str, source_name: str, frame: pd.DataFrame,
+                         indexes: pd.Series, tags: List[str], timestamp: str,
+                         sketches: Optional[Dict[str, ColumnSketch]] = None) -> List[RowBatch]:
+        """
+        样本行 -> 按列存放的 RowBatch（哈希、id、名称均整列计算），
+        行内容整表写入行样本存储，各列摘要写入列摘要存储；没有样本行时返回空列表
+        """
+        # 重名字段保留最后一列，与按字段名取值的语义一致
+        frame = frame.loc[:, ~frame.columns.duplicated(keep='last')]
+        if frame.empty:
+            return []
+        self._write_column_sketches(table_id, frame, sketches)
+
+        row_hashes = self._row_hashes(frame)
+        index_text = indexes.astype(str).reset_index(drop=True)
+        ids = (f"{table_id}.row_" + index_text + "_" + pd.Series(row_hashes).str[:8]).tolist()
+        names = self._generate_row_names(table_name, indexes, frame).tolist()
+        descriptions = ("数据行 " + index_text + f" in {source_name} - 包含{len(frame.columns)}个字段").tolist()
+        row_indexes = [int(idx) for idx in indexes]
 
-        if not self.base_path.exists():
-            logging.warning(f"Base path does not exist: {self.base_path}")
-            return assets
+        try:
+            self.row_store.write_rows(table_id, list(frame.columns),
+                                      list(zip(ids, row_indexes, row_hashes,
+                                               frame.itertuples(index=False, name=None))))
+        except Exception as e:
+            logging.warning(f"行样本写入失败 {table_id}: {e}")
 
-        # 收集CSV文件
-        for pattern in ["*.csv", "*.txt"]:
-            for file_path in self.base_path.rglob(pattern):
-                assets.extend(self._collect_csv_metadata(file_path, now))
-
-        # 收集Excel文件
-        for pattern in ["*.xlsx", "*.xls"]:
-            for file_path in self.base_path.rglob(pattern):
-                assets.extend(self._collect_excel_metadata(file_path, now))
-
-        # 收集SQLite数据库文件 - 增强模式匹配
-        sqlite_patterns = ["*.db", "*.sqlite", "*.sqlite3", "*.db3"]
-        for pattern in sqlite_patterns:
-            for file_path in self.base_path.rglob(pattern):
-                logging.info(f"发现SQLite数据库文件: {file_path}")
-                sqlite_assets = self._collect_sqlite_metadata(file_path, now)
-                assets.extend(sqlite_assets)
-                logging.info(f"从 {file_path.name} 采集到 {len(sqlite_assets)} 个资产")
-
-        # 立即写入图数据库
+        return [RowBatch(
+            table_id=table_id,
+            owner="文件采集器",
+            tags=tags,
+            created_time=timestamp,
+            updated_time=timestamp,
+            ids=ids,
+            names=names,
+            descriptions=descriptions,
+            row_hashes=row_hashes,
+            row_indexes=row_indexes
+        )]
+
+    def discover_files(self) -> List[SourceFile]:
+        """列出待采集的文件，按类型再按路径排序，保证合并顺序确定"""
+        files = []
+        for kind, patterns in FILE_PATTERNS.items():
+            if kind in COLUMNAR_KINDS and pa is None:
+                if any(True for pattern in patterns for _ in self.base_path.rglob(pattern)):
+                    logging.warning(f"未安装 pyarrow，跳过 {kind} 文件")
+                continue
+            paths = {file_path for pattern in patterns for file_path in self.base_path.rglob(pattern)}
+            files.extend(SourceFile(kind, file_path) for file_path in sorted(paths))
+        return files
+
+    def source_prefix(self, source: SourceFile) -> str:
+        """数据源文件下全部资产共有的 id 前缀"""
+        return f"{SOURCE_PREFIXES[source.kind]}.{self._make_safe_id(source.path.stem)}"
+
+    def sqlite_table_prefix(self, source: SourceFile, table_name: str) -> str:
+        return f"{self.source_prefix(source)}.table.{self._make_safe_id(table_name)}"
+
+    def collect_file(self, source: SourceFile, timestamp: str) -> List[CollectedAsset]:
+        """采集单个文件的全部资产"""
+        if source.kind == "csv":
+            return self._collect_csv_metadata(source.path, timestamp)
+        if source.kind == "excel":
+            return self._collect_excel_metadata(source.path, timestamp)
+        if source.kind == "parquet":
+            return self._collect_parquet_metadata(source.path, timestamp)
+        if source.kind == "arrow":
+            return self._collect_arrow_metadata(source.path, timestamp)
+        logging.info(f"发现SQLite数据库文件: {source.path}")
+        sqlite_assets = self._collect_sqlite_metadata(source.path, timestamp, source.tables)
+        logging.info(f"从 {source.path.name} 采集到 {len(sqlite_assets)} 个资产")
+        return sqlite_assets
+
+    def iter_file_batches(self, timestamp: str,
+                          files: Optional[List[SourceFile]] = None) -> Iterator[Tuple[Path, List[CollectedAsset]]]:
+        """
+        逐文件产出 (路径, 资产批)，files 缺省为 discover_files() 的结果。
+        workers > 1 时文件分发到进程池并行解析，结果仍按 files 的顺序产出；
+        单个文件失败只记录日志、产出空批，并记入 failed_sources
+        """
+        files = self.discover_files() if files is None else files
+        self.failed_sources = []
+        if self.workers <= 1 or len(files) <= 1:
+            for source in files:
+                yield source.path, self._collect_file_isolated(source, timestamp)
+            return
+
+        row_store_path, sketch_store_path = str(self.row_store.path), str(self.sketch_store.path)
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(files))) as pool:
+            def submit(source: SourceFile):
+                return source, pool.submit(_collect_file_task, str(self.base_path), self.sample_rows,
+                                                row_store_path, sketch_store_path, source, timestamp)
+
+            # 最多 2 * workers 个文件在途，已完成但未轮到的批不会无限堆积
+            file_iter = iter(files)
+            pending = deque(submit(source) for source in itertools.islice(file_iter, 2 * self.workers))
+            while pending:
+                source, future = pending.popleft()
+                try:
+                    assets = future.result()
+                except Exception as e:
+                    # 采集异常或子进程异常退出
+                    logging.error(f"文件采集失败 {source.path}: {e}")
+                    self.failed_sources.append(source)
+                    assets = []
+                yield source.path, assets
+                pending.extend(submit(source) for source in itertools.islice(file_iter, 1))
+
+    def _collect_file_isolated(self, source: SourceFile, timestamp: str) -> List[CollectedAsset]:
         try:
-            from backend.services.graph_service import GraphService
-            gs = GraphService("bolt://localhost:7687", "neo4j", "password")
-            for ast in assets:
-                gs.create_asset(ast)
-            gs.close()
+            return self.collect_file(source, timestamp)
         except Exception as e:
-            logging.warning(f"写入图数据库失败: {e}")
+            logging.error(f"文件采集失败 {source.path}: {e}")
+            self.failed_sources.append(source)
+            return []
+
+    def iter_asset_batches(self, files: Optional[List[SourceFile]] = None) -> Iterator[List[CollectedAsset]]:
+        """
+        逐文件产出资产批，供采集流水线（asset_pipeline.run_pipeline）消费；
+        同一次采集的资产使用相同的时间戳
+        """
+        if not self.base_path.exists():
+            logging.warning(f"Base path does not exist: {self.base_path}")
+            return
+        now = datetime.now().isoformat()
+        for _, file_assets in self.iter_file_batches(now, files):
+            yield file_assets
+
+    def collect_metadata(self, files: Optional[List[SourceFile]] = None) -> List[CollectedAsset]:
+        """
+        采集 files（缺省为 base_path 下的全部文件）的资产并全部返回，不写入图存储。
+        数据量大时使用 iter_asset_batches 配合 run_pipeline 流式写入
+        """
+        assets: List[CollectedAsset] = []
+        for file_assets in self.iter_asset_batches(files):
+            assets.extend(file_assets)
 
         # 统计各类资产数量
-        asset_types = {}
-        for asset in assets:
-            asset_types[asset.type] = asset_types.get(asset.type, 0) + 1
+        asset_types = count_assets_by_type(assets)
 
-        logging.info(f"✅ FileCollector 已写入 {len(assets)} 个资产")
+        logging.info(f"✅ FileCollector 已采集 {sum(asset_types.values())} 个资产")
         for asset_type, count in asset_types.items():
             logging.info(f"  - {asset_type}: {count}个")
 
         return assets
 
-    def _collect_csv_metadata(self, file_path: Path, timestamp: str) -> List[DataAsset]:
+    def _collect_csv_metadata(self, file_path: Path, timestamp: str) -> List[CollectedAsset]:
         """收集CSV文件元数据"""
         assets = []
-        columns = self.get_csv_columns(file_path)
-        if not columns:
+        sniff = try_sniff_csv(file_path)
+        if not sniff or not sniff.header:
             return assets
+        columns = sniff.header
+
+        profile = self._profile_csv(file_path, sniff)
 
         # 1. 文件资产
         safe_file_id = self._make_safe_id(file_path.stem)
-        file_asset = DataAsset(
+        file_asset = DataFile(
             id=f"file.{safe_file_id}",
             name=file_path.name,
             type="file",
@@ -131,7 +388,12 @@ class FileCollector(BaseMetadataCollector):
             owner="文件采集器",
             tags=["csv", "数据文件"],
             created_time=timestamp,
-            updated_time=timestamp
+            updated_time=timestamp,
+            file_path=str(file_path),
+            size_bytes=sniff.size_bytes,
+            row_count=profile["row_count"],
+            sample_size=len(profile["sample"]),
+            column_stats=profile["column_stats"]
         )
         assets.append(file_asset)
 
@@ -152,196 +414,436 @@ class FileCollector(BaseMetadataCollector):
             assets.append(col_asset)
 
         # 3. 行级资产收集
-        row_assets = self._collect_csv_row_metadata(file_path, safe_file_id, file_path.stem, columns, timestamp)
+        row_assets = self._collect_csv_row_metadata(file_path, safe_file_id, file_path.stem, profile["sample"],
+                                                    timestamp, profile.get("sketches"))
         assets.extend(row_assets)
 
         return assets
 
-    def _collect_excel_metadata(self, file_path: Path, timestamp: str) -> List[DataAsset]:
-        """收集Excel文件元数据"""
+    def _profile_csv(self, file_path: Path, sniff: CsvSniff) -> Dict[str, Any]:
+        """
+        分块流式扫描整个 CSV，内存占用与文件大小无关：
+        精确行数、每列空值数、覆盖全部取值的列摘要（去重计数取自其中的 HyperLogLog），
+        以及覆盖全文件的均匀样本（样本索引为行在文件中的位置）
+        """
+        sample = BottomKSample(self.sample_rows, SAMPLE_SEED)
+        nulls: Dict[str, int] = {}
+        sketches: Dict[str, ColumnSketch] = {}
+        row_count = 0
+
+        # 按字符串读取，避免各块类型推断不一致
+        for chunk in pd.read_csv(file_path, dtype=str, chunksize=CSV_CHUNK_ROWS, **sniff.read_csv_kwargs()):
+            chunk.index = pd.RangeIndex(row_count, row_count + len(chunk))
+            row_count += len(chunk)
+            for col, count in chunk.isna().sum().items():
+                nulls[col] = nulls.get(col, 0) + int(count)
+            update_column_sketches(sketches, chunk)
+            sample.update(chunk)
+
+        column_stats = {col: {"nulls": nulls[col], "distinct": sketches[col].distinct()} for col in nulls}
+        return {"row_count": row_count, "column_stats": column_stats, "sample": sample.result(),
+                "sketches": sketches}
+
+    def _collect_excel_metadata(self, file_path: Path, timestamp: str) -> List[CollectedAsset]:
+        """
+        收集Excel文件元数据：每个文件只打开一次只读工作簿（共享字符串表只解析一次），各工作表依次流式处理；
+        文件级并行由采集进程池提供
+        """
         assets = []
 
+        # 1. 文件资产
+        safe_file_id = self._make_safe_id(file_path.stem)
+        file_asset = DataAsset(
+            id=f"excel.{safe_file_id}",
+            name=file_path.name,
+            type="file",
+            description=f"Excel数据文件: {file_path}",
+            owner="文件采集器",
+            tags=["excel", "数据文件"],
+            created_time=timestamp,
+            updated_time=timestamp
+        )
+        assets.append(file_asset)
+
+        # 2. 逐个工作表流式采集（只读模式不会一次加载全部单元格）
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
         try:
-            # 1. 文件资产
-            safe_file_id = self._make_safe_id(file_path.stem)
-            file_asset = DataAsset(
-                id=f"excel.{safe_file_id}",
-                name=file_path.name,
-                type="file",
-                description=f"Excel数据文件: {file_path}",
-                owner="文件采集器",
-                tags=["excel", "数据文件"],
-                created_time=timestamp,
-                updated_time=timestamp
-            )
-            assets.append(file_asset)
+            for sheet_name in workbook.sheetnames:
+                assets.extend(self._collect_excel_sheet(workbook, file_path, safe_file_id, sheet_name,
+                                                        timestamp))
+        finally:
+            workbook.close()
 
-            # 2. 读取Excel文件
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
+        return assets
 
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-
-                # 获取列名（第一行）
-                columns = []
-                for col_idx in range(1, sheet.max_column + 1):
-                    cell_value = sheet.cell(row=1, column=col_idx).value
-                    if cell_value:
-                        columns.append(str(cell_value))
-                    else:
-                        columns.append(f"Column_{col_idx}")
-
-                if not columns:
-                    continue
+    def _collect_excel_sheet(self, workbook, file_path: Path, file_id: str, sheet_name: str,
+                             timestamp: str) -> List[CollectedAsset]:
+        """流式采集已打开工作簿中的单个工作表：读取标题行与前 sample_rows 行后停止"""
+        assets = []
+        try:
+            sheet = workbook[sheet_name]
+            rows = sheet.iter_rows(values_only=True)
+
+            # 获取列名（第一行）
+            header = next(rows, None)
+            if not header:
+                return assets
+            columns = [str(value) if value else f"Column_{col_idx}" for col_idx, value in enumerate(header, 1)]
 
-                # 3. 工作表资产
-                safe_sheet_id = self._make_safe_id(sheet_name)
-                sheet_asset = Sheet(
-                    id=f"excel.{safe_file_id}.sheet.{safe_sheet_id}",
-                    name=sheet_name,
-                    type="sheet",
-                    description=f"Excel工作表: {sheet_name}",
+            sample = list(itertools.islice(rows, self.sample_rows))
+            # 只读模式的行数来自工作表的尺寸记录，缺失时继续流式计数
+            if sheet.max_row is not None:
+                row_count = sheet.max_row - 1  # 减去标题行
+            else:
+                row_count = len(sample) + sum(1 for _ in rows)
+
+            # 3. 工作表资产
+            safe_sheet_id = self._make_safe_id(sheet_name)
+            sheet_asset = Sheet(
+                id=f"excel.{file_id}.sheet.{safe_sheet_id}",
+                name=sheet_name,
+                type="sheet",
+                description=f"Excel工作表: {sheet_name}",
+                owner="文件采集器",
+                tags=["excel", "sheet", "工作表"],
+                created_time=timestamp,
+                updated_time=timestamp,
+                file_id=f"excel.{file_id}",
+                sheet_name=sheet_name,
+                row_count=row_count,
+                column_count=len(columns)
+            )
+            assets.append(sheet_asset)
+
+            # 4. 列资产
+            for col_name in columns:
+                safe_col_id = self._make_safe_id(col_name)
+                col_asset = Column(
+                    id=f"excel.{file_id}.sheet.{safe_sheet_id}.{safe_col_id}",
+                    name=col_name,
+                    type="column",
+                    data_type="string",
+                    description=f"列: {col_name} in {sheet_name}",
                     owner="文件采集器",
-                    tags=["excel", "sheet", "工作表"],
+                    tags=["column", "数据列"],
                     created_time=timestamp,
-                    updated_time=timestamp,
-                    file_id=f"excel.{safe_file_id}",
-                    sheet_name=sheet_name,
-                    row_count=sheet.max_row - 1,  # 减去标题行
-                    column_count=sheet.max_column
+                    updated_time=timestamp
                 )
-                assets.append(sheet_asset)
-
-                # 4. 列资产
-                for col_name in columns:
-                    safe_col_id = self._make_safe_id(col_name)
-                    col_asset = Column(
-                        id=f"excel.{safe_file_id}.sheet.{safe_sheet_id}.{safe_col_id}",
-                        name=col_name,
-                        type="column",
-                        data_type="string",
-                        description=f"列: {col_name} in {sheet_name}",
-                        owner="文件采集器",
-                        tags=["column", "数据列"],
-                        created_time=timestamp,
-                        updated_time=timestamp
-                    )
-                    assets.append(col_asset)
-
-                # 5. 行级资产收集
-                row_assets = self._collect_excel_row_metadata(sheet, safe_file_id, safe_sheet_id, sheet_name, columns,
-                                                              timestamp)
-                assets.extend(row_assets)
-
-            workbook.close()
+                assets.append(col_asset)
 
+            # 5. 行级资产收集
+            assets.extend(self._collect_excel_row_metadata(sample, file_id, safe_sheet_id, sheet_name, columns,
+                                                           timestamp))
         except Exception as e:
-            logging.warning(f"Excel文件处理失败 {file_path}: {e}")
+            logging.warning(f"Excel工作表处理失败 {file_path} [{sheet_name}]: {e}")
+
+        return assets
+
+    def _collect_sqlite_metadata(self, file_path: Path, timestamp: str,
+                                 only_tables: Optional[Tuple[str, ...]] = None) -> List[CollectedAsset]:
+        """收集SQLite数据库元数据；only_tables 给定时只采集这些表（增量采集）"""
+        assets = []
+
+        # 验证SQLite文件有效性（空文件/非SQLite文件不是采集失败，内容变化后会重新采集）
+        if not self._is_valid_sqlite_file(file_path):
+            logging.warning(f"无效的SQLite文件: {file_path}")
+            return assets
+
+        # 1. 数据库资产
+        safe_db_id = self._make_safe_id(file_path.stem)
+        db_asset = Database(
+            id=f"sqlite.{safe_db_id}",
+            name=file_path.name,
+            type="database",
+            description=f"SQLite数据库: {file_path}",
+            owner="文件采集器",
+            tags=["sqlite", "数据库"],
+            created_time=timestamp,
+            updated_time=timestamp,
+            file_path=str(file_path),
+            table_count=0,
+            connection_string=f"sqlite:///{file_path}"
+        )
+        assets.append(db_asset)
+
+        # 2. 只读打开，一次查询取回全部表的列信息
+        with closing(_open_sqlite_readonly(file_path)) as conn:
+            catalog: Dict[str, List[tuple]] = {}
+            for table_name, cid, col_name, col_type, pk in conn.execute(SQLITE_CATALOG_QUERY):
+                catalog.setdefault(table_name, []).append((col_name, col_type, pk))
+            row_counts = self._sqlite_stat_row_counts(conn)
+        db_asset.table_count = len(catalog)
+
+        logging.info(f"在数据库 {file_path.name} 中发现 {len(catalog)} 个表: {list(catalog)}")
+
+        tables = [(table_name, columns_info) for table_name, columns_info in catalog.items()
+                  if only_tables is None or table_name in only_tables]
+        workers = min(SQLITE_TABLE_WORKERS, len(tables))
+
+        def collect(table):
+            table_name, columns_info = table
+            return self._collect_sqlite_table(file_path, safe_db_id, table_name, columns_info,
+                                              row_counts.get(table_name), timestamp)
+
+        if workers <= 1:
+            table_assets = [collect(table) for table in tables]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                table_assets = list(pool.map(collect, tables))
+        for batch in table_assets:
+            assets.extend(batch)
+
+        logging.info(f"成功处理SQLite数据库 {file_path.name}，共生成 {len(assets)} 个资产")
 
         return assets
 
-    def _collect_sqlite_metadata(self, file_path: Path, timestamp: str) -> List[DataAsset]:
-        """收集SQLite数据库元数据"""
+    def _sqlite_stat_row_counts(self, conn) -> Dict[str, int]:
+        """从 sqlite_stat1（ANALYZE 生成）读取各表的行数；stat 的第一个数即表的行数"""
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'").fetchone()
+        if not exists:
+            return {}
+        counts: Dict[str, int] = {}
+        for table_name, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+            try:
+                counts[table_name] = max(counts.get(table_name, 0), int(str(stat).split()[0]))
+            except (ValueError, IndexError):
+                continue
+        return counts
+
+    def _collect_sqlite_table(self, file_path: Path, db_id: str, table_name: str, columns_info: List[tuple],
+                              row_count: Optional[int], timestamp: str) -> List[CollectedAsset]:
+        """采集单个表（在线程池中执行，使用独立的只读连接）"""
         assets = []
+        safe_table_id = self._make_safe_id(table_name)
+        quoted = _quote_identifier(table_name)
+        column_names = [col_info[0] for col_info in columns_info]
 
         try:
-            # 验证SQLite文件有效性
-            if not self._is_valid_sqlite_file(file_path):
-                logging.warning(f"无效的SQLite文件: {file_path}")
-                return assets
+            with closing(_open_sqlite_readonly(file_path)) as conn:
+                if row_count is None:
+                    row_count = conn.execute(f"SELECT count(*) FROM {quoted}").fetchone()[0]
+                sample = self._sample_sqlite_rows(conn, quoted)
+        except Exception as e:
+            logging.warning(f"SQLite表读取失败 {table_name}: {e}")
+            sample = []
+
+        # 3. 表资产
+        table_asset = Table(
+            id=f"sqlite.{db_id}.table.{safe_table_id}",
+            name=table_name,
+            type="table",
+            description=f"SQLite表: {table_name}",
+            owner="文件采集器",
+            tags=["sqlite", "table", "数据表"],
+            created_time=timestamp,
+            updated_time=timestamp,
+            database=file_path.name,
+            schema="main",
+            columns=[],
+            row_count=row_count
+        )
+        assets.append(table_asset)
 
-            # 1. 数据库资产
-            safe_db_id = self._make_safe_id(file_path.stem)
-            db_asset = Database(
-                id=f"sqlite.{safe_db_id}",
-                name=file_path.name,
-                type="database",
-                description=f"SQLite数据库: {file_path}",
+        # 4. 推断数据类型（使用抽样行）
+        inferred_types = self._infer_column_types([values for _, values in sample], column_names)
+
+        # 5. 列资产
+        for col_name, col_type, pk in columns_info:
+            # 使用声明的数据类型，如果为空则使用推断类型
+            data_type = col_type if col_type else inferred_types.get(col_name, "unknown")
+            safe_col_id = self._make_safe_id(col_name)
+
+            col_asset = Column(
+                id=f"sqlite.{db_id}.table.{safe_table_id}.{safe_col_id}",
+                name=col_name,
+                type="column",
+                data_type=data_type,
+                is_primary_key=bool(pk),
+                description=f"列: {col_name} in {table_name}",
                 owner="文件采集器",
-                tags=["sqlite", "数据库"],
+                tags=["column", "数据列"],
                 created_time=timestamp,
-                updated_time=timestamp,
-                file_path=str(file_path),
-                table_count=0,
-                connection_string=f"sqlite:///{file_path}"
+                updated_time=timestamp
             )
-            assets.append(db_asset)
-
-            # 2. 连接数据库获取表信息
-            conn = sqlite3.connect(file_path)
-            cursor = conn.cursor()
-
-            # 获取所有表
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = cursor.fetchall()
-            db_asset.table_count = len(tables)
+            assets.append(col_asset)
 
-            logging.info(f"在数据库 {file_path.name} 中发现 {len(tables)} 个表: {[table[0] for table in tables]}")
+        logging.info(f"表 {table_name} 有 {len(columns_info)} 个列")
 
-            for table_info in tables:
-                table_name = table_info[0]
-                safe_table_id = self._make_safe_id(table_name)
+        # 6. 行级资产收集
+        assets.extend(self._collect_sqlite_row_metadata(sample, table_name, db_id, safe_table_id,
+                                                        column_names, timestamp))
+        return assets
 
-                # 3. 表资产
-                table_asset = DataAsset(
-                    id=f"sqlite.{safe_db_id}.table.{safe_table_id}",
-                    name=table_name,
-                    type="table",
-                    description=f"SQLite表: {table_name}",
-                    owner="文件采集器",
-                    tags=["sqlite", "table", "数据表"],
-                    created_time=timestamp,
-                    updated_time=timestamp
-                )
-                assets.append(table_asset)
-
-                # 4. 获取列信息和数据类型
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns_info = cursor.fetchall()
-
-                # 获取表的前几行数据以推断数据类型
-                cursor.execute(f"SELECT * FROM {table_name} LIMIT 5")
-                sample_data = cursor.fetchall()
-                column_names = [col[1] for col in columns_info]
-
-                # 推断数据类型
-                inferred_types = self._infer_column_types(sample_data, column_names)
-
-                # 5. 列资产
-                for col_info in columns_info:
-                    col_name = col_info[1]
-                    # 使用PRAGMA中的数据类型，如果为NULL则使用推断类型
-                    data_type = col_info[2] if col_info[2] else inferred_types.get(col_name, "unknown")
-                    safe_col_id = self._make_safe_id(col_name)
-
-                    col_asset = Column(
-                        id=f"sqlite.{safe_db_id}.table.{safe_table_id}.{safe_col_id}",
-                        name=col_name,
-                        type="column",
-                        data_type=data_type,
-                        description=f"列: {col_name} in {table_name}",
-                        owner="文件采集器",
-                        tags=["column", "数据列"],
-                        created_time=timestamp,
-                        updated_time=timestamp
-                    )
-                    assets.append(col_asset)
-
-                logging.info(f"表 {table_name} 有 {len(columns_info)} 个列")
-
-                # 6. 行级资产收集
-                row_assets = self._collect_sqlite_row_metadata(conn, table_name, safe_db_id, safe_table_id,
-                                                               column_names, timestamp)
-                assets.extend(row_assets)
-
-            conn.close()
-            logging.info(f"成功处理SQLite数据库 {file_path.name}，共生成 {len(assets)} 个资产")
+    def _sample_sqlite_rows(self, conn, quoted: str) -> List[Tuple[int, tuple]]:
+        """
+        按 rowid 随机抽样（带种子），返回按 rowid 排序的 (rowid, 行值)。
+        先在 [min(rowid), max(rowid)] 内随机取候选 rowid 点查，空洞过多时改为从全部 rowid 中抽取；
+        WITHOUT ROWID 表退化为取前 sample_rows 行
+        """
+        n = self.sample_rows
+        try:
+            low, high = conn.execute(f"SELECT min(rowid), max(rowid) FROM {quoted}").fetchone()
+        except sqlite3.OperationalError:
+            rows = conn.execute(f"SELECT * FROM {quoted} LIMIT ?", (n,)).fetchall()
+            return list(enumerate(rows))
+        if low is None or n <= 0:
+            return []
+        if high - low + 1 <= n:
+            rows = conn.execute(f"SELECT rowid, * FROM {quoted} ORDER BY rowid").fetchall()
+            return [(row[0], row[1:]) for row in rows]
+
+        rng = np.random.default_rng(SAMPLE_SEED)
+        sampled: Dict[int, tuple] = {}
+        for _ in range(5):
+            wanted = n - len(sampled)
+            if wanted <= 0:
+                break
+            candidates = np.unique(rng.integers(low, high + 1, size=wanted * 2)).tolist()
+            for start in range(0, len(candidates), 500):
+                chunk = candidates[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT rowid, * FROM {quoted} WHERE rowid IN ({placeholders})", chunk):
+                    sampled.setdefault(row[0], row[1:])
+
+        if len(sampled) < n:
+            # rowid 分布稀疏：只扫描 rowid（不读取行内容）后抽取
+            rowids = np.array([row[0] for row in conn.execute(f"SELECT rowid FROM {quoted}")])
+            chosen = rng.choice(rowids, size=min(n, len(rowids)), replace=False).tolist()
+            sampled = {}
+            for start in range(0, len(chosen), 500):
+                chunk = chosen[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT rowid, * FROM {quoted} WHERE rowid IN ({placeholders})", chunk):
+                    sampled[row[0]] = row[1:]
+
+        rowids = sorted(rng.choice(sorted(sampled), size=n, replace=False).tolist()) if len(sampled) > n \
+            else sorted(sampled)
+        return [(rowid, sampled[rowid]) for rowid in rowids]
+
+    def _collect_parquet_metadata(self, file_path: Path, timestamp: str) -> List[CollectedAsset]:
+        """
+        只读取 Parquet 文件尾部的元数据：行数、列类型，以及各行组统计汇总出的最小/最大值与空值数，
+        不扫描数据页；样本行来自（按种子选取的）单个行组，通过内存映射读取
+        """
+        parquet_file = pq.ParquetFile(file_path, memory_map=True)
+        metadata = parquet_file.metadata
+        schema = parquet_file.schema_arrow
+
+        # 各行组的列统计按列路径汇总，缺少统计的行组使该项未知
+        column_stats: Dict[str, Dict[str, Any]] = {}
+        for rg in range(metadata.num_row_groups):
+            row_group = metadata.row_group(rg)
+            for ci in range(row_group.num_columns):
+                chunk = row_group.column(ci)
+                stats = column_stats.setdefault(chunk.path_in_schema, {"nulls": 0, "min": None, "max": None})
+                statistics = chunk.statistics
+                if statistics is None or not statistics.has_null_count:
+                    stats["nulls"] = None
+                elif stats["nulls"] is not None:
+                    stats["nulls"] += statistics.null_count
+                if statistics is None or not statistics.has_min_max:
+                    stats["complete"] = False
+                    continue
+                low, high = _statistic_value(statistics.min), _statistic_value(statistics.max)
+                try:
+                    stats["min"] = low if stats["min"] is None else min(stats["min"], low)
+                    stats["max"] = high if stats["max"] is None else max(stats["max"], high)
+                except TypeError:
+                    stats["complete"] = False
+        for stats in column_stats.values():
+            if stats.pop("complete", True) is False:
+                stats["min"] = stats["max"] = None
+
+        # 样本：按种子选取一个行组，只读取该行组
+        frame, indexes = pd.DataFrame(), pd.Series(dtype=int)
+        if metadata.num_row_groups and metadata.num_rows and self.sample_rows > 0:
+            rng = np.random.default_rng(SAMPLE_SEED)
+            rg = int(rng.integers(metadata.num_row_groups))
+            offset = sum(metadata.row_group(i).num_rows for i in range(rg))
+            frame, indexes = self._sample_arrow_table(parquet_file.read_row_group(rg), offset, rng)
+
+        return self._build_columnar_assets(file_path, "parquet", "Parquet", schema, metadata.num_rows,
+                                           column_stats, frame, indexes, timestamp)
+
+    def _collect_arrow_metadata(self, file_path: Path, timestamp: str) -> List[CollectedAsset]:
+        """
+        Arrow IPC 文件（含 Feather v2）：内存映射打开，记录批的行数与空值数来自批头部，不读取数据缓冲区；
+        IPC 没有最小/最大值统计，样本行来自（按种子选取的）单个记录批
+        """
+        with pa.memory_map(str(file_path), 'r') as source:
+            reader = pa.ipc.open_file(source)
+            schema = reader.schema
+            batch_rows = []
+            nulls = [0] * len(schema)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                batch_rows.append(batch.num_rows)
+                for ci, column in enumerate(batch.columns):
+                    nulls[ci] += column.null_count
+            row_count = sum(batch_rows)
+            column_stats = {field.name: {"nulls": nulls[ci], "min": None, "max": None}
+                            for ci, field in enumerate(schema)}
+
+            frame, indexes = pd.DataFrame(), pd.Series(dtype=int)
+            if reader.num_record_batches and row_count and self.sample_rows > 0:
+                rng = np.random.default_rng(SAMPLE_SEED)
+                bi = int(rng.integers(reader.num_record_batches))
+                offset = sum(batch_rows[:bi])
+                frame, indexes = self._sample_arrow_table(pa.Table.from_batches([reader.get_batch(bi)]), offset, rng)
+
+        return self._build_columnar_assets(file_path, "arrow", "Arrow", schema, row_count,
+                                           column_stats, frame, indexes, timestamp)
+
+    def _sample_arrow_table(self, table, offset: int, rng) -> Tuple[pd.DataFrame, pd.Series]:
+        """从一个行组/记录批中按种子无放回抽取 sample_rows 行，索引为行在文件中的位置"""
+        count = min(self.sample_rows, table.num_rows)
+        positions = np.sort(rng.choice(table.num_rows, size=count, replace=False))
+        records = table.take(pa.array(positions)).to_pylist()
+        frame = pd.DataFrame(records, columns=table.column_names, dtype=object)
+        frame = frame.apply(lambda col: col.map(_columnar_cell_value))
+        return frame, pd.Series(positions + offset)
+
+    def _build_columnar_assets(self, file_path: Path, kind: str, label: str, schema, row_count: int,
+                               column_stats: Dict[str, Dict[str, Any]], frame: pd.DataFrame, indexes: pd.Series,
+                               timestamp: str) -> List[CollectedAsset]:
+        """Parquet/Arrow 共用：文件、列与样本行资产"""
+        prefix = SOURCE_PREFIXES[kind]
+        safe_file_id = self._make_safe_id(file_path.stem)
+        assets: List[CollectedAsset] = [DataFile(
+            id=f"{prefix}.{safe_file_id}",
+            name=file_path.name,
+            type="file",
+            description=f"{label}数据文件: {file_path}",
+            owner="文件采集器",
+            tags=[kind, "数据文件", "列式存储"],
+            created_time=timestamp,
+            updated_time=timestamp,
+            file_path=str(file_path),
+            size_bytes=file_path.stat().st_size,
+            row_count=row_count,
+            sample_size=len(frame),
+            column_stats=column_stats
+        )]
+
+        for field in schema:
+            safe_col_id = self._make_safe_id(field.name)
+            assets.append(Column(
+                id=f"{prefix}.{safe_file_id}.{safe_col_id}",
+                name=field.name,
+                type="column",
+                data_type=str(field.type),
+                description=f"列: {field.name} in {file_path.name}",
+                owner="文件采集器",
+                tags=["column", "数据列"],
+                created_time=timestamp,
+                updated_time=timestamp
+            ))
 
+        try:
+            assets.extend(self._build_row_batch(f"{prefix}.{safe_file_id}", file_path.stem, file_path.name,
+                                                frame, indexes, ["data_row", "行数据", f"{kind}数据"], timestamp))
         except Exception as e:
-            logging.error(f"SQLite数据库处理失败 {file_path}: {e}")
-            import traceback
-            traceback.print_exc()
-
+            logging.warning(f"{label}行级元数据收集失败 {file_path}: {e}")
         return assets
 
     def _is_valid_sqlite_file(self, file_path: Path) -> bool:
@@ -392,156 +894,52 @@ class FileCollector(BaseMetadataCollector):
 
         return inferred_types
 
-    def _collect_csv_row_metadata(self, file_path: Path, file_id: str, table_name: str, columns: List[str],
-                                  timestamp: str) -> List[DataRow]:
-        """收集CSV行级元数据"""
-        row_assets = []
+    def _collect_csv_row_metadata(self, file_path: Path, file_id: str, table_name: str, sample: pd.DataFrame,
+                                  timestamp: str, sketches: Optional[Dict[str, ColumnSketch]] = None) -> List[RowBatch]:
+        """收集CSV行级元数据：sample 为流式扫描得到的样本，索引为行在文件中的位置；sketches 为全量列摘要"""
         try:
-            enc = self.detect_encoding(file_path)
-            df = pd.read_csv(file_path, encoding=enc, nrows=self.sample_rows)
-
-            for idx, row in df.iterrows():
-                row_data = row.to_dict()
-                row_hash = self._calculate_row_hash(row_data)
-
-                # 生成更清晰的行名称
-                row_name = self._generate_row_name(table_name, idx, row_data)
-
-                row_asset = DataRow(
-                    id=f"file.{file_id}.row_{idx}_{row_hash[:8]}",
-                    name=row_name,  # 使用新生成的清晰名称
-                    type="row",
-                    description=f"数据行 {idx} in {file_path.name} - 包含{len(row_data)}个字段",
-                    owner="文件采集器",
-                    tags=["data_row", "行数据", "csv数据"],
-                    created_time=timestamp,
-                    updated_time=timestamp,
-                    table_id=f"file.{file_id}",
-                    row_hash=row_hash,
-                    row_data=row_data,
-                    row_index=idx
-                )
-                row_assets.append(row_asset)
-
+            return self._build_row_batch(f"file.{file_id}", table_name, file_path.name, sample,
+                                         sample.index.to_series(), ["data_row", "行数据", "csv数据"], timestamp,
+                                         sketches)
         except Exception as e:
             logging.warning(f"CSV行级元数据收集失败 {file_path}: {e}")
+            return []
 
-        return row_assets
-
-    def _collect_excel_row_metadata(self, sheet, file_id: str, sheet_id: str, sheet_name: str, columns: List[str],
-                                    timestamp: str) -> List[DataRow]:
-        """收集Excel行级元数据"""
-        row_assets = []
+    def _collect_excel_row_metadata(self, rows: List[tuple], file_id: str, sheet_id: str, sheet_name: str,
+                                    columns: List[str], timestamp: str) -> List[RowBatch]:
+        """收集Excel行级元数据：rows 为标题行之后的样本行取值，行索引从0开始"""
         try:
-            # 从第二行开始（跳过标题行），采样指定行数
-            max_rows = min(self.sample_rows + 1, sheet.max_row + 1)  # +1 因为从第二行开始
-
-            for row_idx in range(2, max_rows):
-                row_data = {}
-                for col_idx, col_name in enumerate(columns, 1):
-                    cell_value = sheet.cell(row=row_idx, column=col_idx).value
-                    # 处理Excel中的特殊类型（如日期）
-                    if hasattr(cell_value, 'strftime'):
-                        row_data[col_name] = cell_value.strftime('%Y-%m-%d %H:%M:%S')
-                    else:
-                        row_data[col_name] = str(cell_value) if cell_value is not None else ""
-
-                row_hash = self._calculate_row_hash(row_data)
-                actual_row_index = row_idx - 2  # 从0开始计数
-
-                # 生成更清晰的行名称
-                row_name = self._generate_row_name(sheet_name, actual_row_index, row_data)
-
-                row_asset = DataRow(
-                    id=f"excel.{file_id}.sheet.{sheet_id}.row_{actual_row_index}_{row_hash[:8]}",
-                    name=row_name,  # 使用新生成的清晰名称
-                    type="row",
-                    description=f"数据行 {actual_row_index} in {sheet.title} - 包含{len(row_data)}个字段",
-                    owner="文件采集器",
-                    tags=["data_row", "行数据", "excel数据"],
-                    created_time=timestamp,
-                    updated_time=timestamp,
-                    table_id=f"excel.{file_id}.sheet.{sheet_id}",
-                    row_hash=row_hash,
-                    row_data=row_data,
-                    row_index=actual_row_index
-                )
-                row_assets.append(row_asset)
-
+            width = len(columns)
+            records = [tuple(values[:width]) + (None,) * (width - len(values)) for values in rows]
+            # object 类型保留单元格原值（整数不会因空值变为浮点数）
+            frame = pd.DataFrame(records, columns=columns, dtype=object)
+            frame = frame.apply(lambda col: col.map(_excel_cell_text))
+            return self._build_row_batch(f"excel.{file_id}.sheet.{sheet_id}", sheet_name, sheet_name, frame,
+                                         pd.Series(range(len(records))), ["data_row", "行数据", "excel数据"],
+                                         timestamp)
         except Exception as e:
-            logging.warning(f"Excel行级元数据收集失败 {sheet.title}: {e}")
-
-        return row_assets
+            logging.warning(f"Excel行级元数据收集失败 {sheet_name}: {e}")
+            return []
 
-    def _collect_sqlite_row_metadata(self, conn, table_name: str, db_id: str, table_id: str, columns: List[str],
-                                     timestamp: str) -> List[DataRow]:
-        """收集SQLite行级元数据"""
-        row_assets = []
+    def _collect_sqlite_row_metadata(self, sample: List[Tuple[int, tuple]], table_name: str, db_id: str,
+                                     table_id: str, columns: List[str], timestamp: str) -> List[RowBatch]:
+        """收集SQLite行级元数据：sample 为 (rowid, 行值)，rowid 作为行索引"""
         try:
-            cursor = conn.cursor()
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT {self.sample_rows}")
-            rows = cursor.fetchall()
-
-            for idx, row in enumerate(rows):
-                row_data = dict(zip(columns, row))
-                # 处理SQLite中的特殊类型
-                for key, value in row_data.items():
-                    if value is None:
-                        row_data[key] = ""
-                    elif isinstance(value, (int, float)):
-                        row_data[key] = value
-                    elif isinstance(value, bytes):
-                        # 处理BLOB类型数据
-                        try:
-                            row_data[key] = value.decode('utf-8')
-                        except:
-                            row_data[key] = f"BLOB_data_{hashlib.md5(value).hexdigest()[:8]}"
-                    else:
-                        row_data[key] = str(value)
-
-                row_hash = self._calculate_row_hash(row_data)
-
-                # 生成更清晰的行名称
-                row_name = self._generate_row_name(table_name, idx, row_data)
-
-                row_asset = DataRow(
-                    id=f"sqlite.{db_id}.table.{table_id}.row_{idx}_{row_hash[:8]}",
-                    name=row_name,  # 使用新生成的清晰名称
-                    type="row",
-                    description=f"数据行 {idx} in {table_name} - 包含{len(row_data)}个字段",
-                    owner="文件采集器",
-                    tags=["data_row", "行数据", "sqlite数据"],
-                    created_time=timestamp,
-                    updated_time=timestamp,
-                    table_id=f"sqlite.{db_id}.table.{table_id}",
-                    row_hash=row_hash,
-                    row_data=row_data,
-                    row_index=idx
-                )
-                row_assets.append(row_asset)
-
+            frame = pd.DataFrame([values for _, values in sample], columns=columns, dtype=object)
+            frame = frame.apply(lambda col: col.map(_sqlite_cell_value))
+            return self._build_row_batch(f"sqlite.{db_id}.table.{table_id}", table_name, table_name, frame,
+                                         pd.Series([rowid for rowid, _ in sample]), ["data_row", "行数据", "sqlite数据"],
+                                         timestamp)
         except Exception as e:
             logging.warning(f"SQLite行级元数据收集失败 {table_name}: {e}")
-
-        return row_assets
+            return []
 
     def detect_encoding(self, file_path: Path) -> str:
-        """检测文件编码"""
-        for enc in ('utf-8-sig', 'gbk', 'latin1'):
-            try:
-                with file_path.open('r', encoding=enc) as f:
-                    f.read(1024)
-                return enc
-            except UnicodeDecodeError:
-                continue
-        return 'utf-8'
+        """检测文件编码（来自嗅探缓存）"""
+        sniff = try_sniff_csv(file_path)
+        return sniff.encoding if sniff else 'utf-8'
 
     def get_csv_columns(self, file_path: Path) -> List[str]:
-        """安全读取 CSV 头"""
-        enc = self.detect_encoding(file_path)
-        try:
-            df = pd.read_csv(file_path, encoding=enc, nrows=0)
-            return list(df.columns)
-        except Exception as e:
-            logging.warning(f"无法读取列信息 {file_path}: {e}")
-            return []
\ No newline at end of file
+        """安全读取 CSV 头（来自嗅探缓存）"""
+        sniff = try_sniff_csv(file_path)
+        return list(sniff.header) if sniff else []
@@ -0,0 +1,88 @@
+# backend/collectors/file_sniffer.py
+"""
+CSV 文件嗅探：只读取一次文件头部字节，得到编码、分隔符/引号方言、表头和行数估计。
+结果按 (路径, 大小, 修改时间) 缓存，同一文件的各个采集步骤共享
+"""
+import csv
+import io
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+import pandas as pd
+
+# 嗅探读取的头部字节数
+SNIFF_BYTES = 64 * 1024
+ENCODINGS = ("utf-8-sig", "gbk", "latin1")
+DELIMITERS = ",;\t|"
+
+
+class CsvSniff(NamedTuple):
+    encoding: str
+    delimiter: str
+    quotechar: str
+    header: List[str]
+    size_bytes: int
+    estimated_rows: Optional[int]
+
+    def read_csv_kwargs(self) -> dict:
+        """传给 pd.read_csv 的编码与方言参数"""
+        return {"encoding": self.encoding, "sep": self.delimiter, "quotechar": self.quotechar}
+
+
+def _decode(raw: bytes) -> tuple:
+    for encoding in ENCODINGS:
+        try:
+            return encoding, raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return "utf-8", raw.decode("utf-8", errors="replace")
+
+
+def _sniff_dialect(text: str) -> tuple:
+    try:
+        dialect = csv.Sniffer().sniff(text, delimiters=DELIMITERS)
+        return dialect.delimiter, dialect.quotechar or '"'
+    except csv.Error:
+        return ",", '"'
+
+
+@lru_cache(maxsize=4096)
+def _sniff(path: str, size_bytes: int, mtime_ns: int) -> CsvSniff:
+    with open(path, "rb") as f:
+        raw = f.read(SNIFF_BYTES)
+
+    truncated = size_bytes > len(raw)
+    if truncated and b"\n" in raw:
+        # 截断在最后一个换行处，避免多字节字符被截断导致误判编码
+        raw = raw[:raw.rfind(b"\n") + 1]
+    encoding, text = _decode(raw)
+
+    delimiter, quotechar = _sniff_dialect(text)
+    header = list(pd.read_csv(io.StringIO(text), sep=delimiter, quotechar=quotechar, nrows=0).columns)
+
+    # 按头部数据行的平均字节数估计总行数
+    lines = raw.count(b"\n")
+    estimated_rows = None
+    if lines > 1:
+        header_bytes = raw.find(b"\n") + 1
+        estimated_rows = round((size_bytes - header_bytes) / ((len(raw) - header_bytes) / (lines - 1)))
+    elif not truncated:
+        estimated_rows = max(0, len(text.splitlines()) - 1)
+
+    return CsvSniff(encoding, delimiter, quotechar, header, size_bytes, estimated_rows)
+
+
+def sniff_csv(file_path: Path) -> CsvSniff:
+    """嗅探 CSV 文件；文件未变化时直接返回缓存结果（只需一次 stat）"""
+    stat = file_path.stat()
+    return _sniff(str(file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+def try_sniff_csv(file_path: Path) -> Optional[CsvSniff]:
+    try:
+        return sniff_csv(file_path)
+    except Exception as e:
+        logging.warning(f"无法读取列信息 {file_path}: {e}")
+        return None
@@ -0,0 +1,87 @@
+# backend/config.py
+"""
+运行时配置：统一从环境变量读取，提供本地默认值
+"""
+import os
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 本地缓存/索引文件目录
+CACHE_DIR = Path(os.getenv("DATA_FABRIC_CACHE_DIR", str(PROJECT_ROOT / ".cache")))
+
+# 血缘可达性索引文件
+REACHABILITY_INDEX_PATH = Path(os.getenv("LINEAGE_INDEX_PATH", str(CACHE_DIR / "lineage_reachability.json")))
+
+# 行样本存储（按 table_id 分表的 SQLite 文件，见 backend/services/row_store.py）
+ROW_STORE_PATH = Path(os.getenv("ROW_STORE_PATH", str(CACHE_DIR / "row_store.sqlite")))
+
+# 列摘要存储（MinHash/HyperLogLog/直方图，见 backend/services/sketch_store.py）
+COLUMN_SKETCH_PATH = Path(os.getenv("COLUMN_SKETCH_PATH", str(CACHE_DIR / "column_sketches.sqlite")))
+
+# SQL 血缘解析结果缓存（按文件内容哈希与解析器版本，见 backend/services/sql_lineage.py）
+SQL_LINEAGE_CACHE_PATH = Path(os.getenv("SQL_LINEAGE_CACHE_PATH", str(CACHE_DIR / "sql_lineage_cache.sqlite")))
+
+# 增量采集清单（源文件大小/修改时间/哈希及 SQLite 表签名）
+COLLECTION_MANIFEST_PATH = Path(os.getenv("COLLECTION_MANIFEST_PATH", str(CACHE_DIR / "collection_manifest.json")))
+
+# 文件采集并行进程数，<= 1 表示在当前进程内顺序采集
+COLLECTOR_WORKERS = int(os.getenv("COLLECTOR_WORKERS", str(os.cpu_count() or 1)))
+
+# CSV 流式扫描每块行数；样本抽样的随机种子（保证重复采集得到相同样本）
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "50000"))
+SAMPLE_SEED = int(os.getenv("SAMPLE_SEED", "0"))
+
+# SQLite 表并行线程数（每个表使用独立的只读连接）
+SQLITE_TABLE_WORKERS = int(os.getenv("SQLITE_TABLE_WORKERS", "4"))
+
+# 采集流水线的写入阶段：graph（写入图存储，默认）、file（写入 JSON Lines 文件）、null（只采集不写入，试运行）
+COLLECTION_SINK = os.getenv("COLLECTION_SINK", "graph")
+COLLECTION_SINK_PATH = Path(os.getenv("COLLECTION_SINK_PATH", str(CACHE_DIR / "collected_assets.jsonl")))
+# 采集端与写入端之间的队列容量（以文件批次计），队列满时采集端等待
+COLLECTION_QUEUE_SIZE = int(os.getenv("COLLECTION_QUEUE_SIZE", "8"))
+
+# SQL 血缘解析并行进程数，<= 1 表示在当前进程内顺序解析
+SQL_PARSE_WORKERS = int(os.getenv("SQL_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+# MySQL 采集：并行扫描的库（schema）数，同时也是连接池大小
+MYSQL_SCHEMA_WORKERS = int(os.getenv("MYSQL_SCHEMA_WORKERS", "4"))
+
+# 血缘发现写边的批大小（LineageEdgeSink 每批一次 UNWIND 事务）
+LINEAGE_BATCH_SIZE = int(os.getenv("LINEAGE_BATCH_SIZE", "5000"))
+
+# 名称相似性血缘：trigram TF-IDF 余弦相似度阈值，以及每列最多保留的相似列数
+NAME_MATCH_THRESHOLD = float(os.getenv("NAME_MATCH_THRESHOLD", "0.7"))
+NAME_MATCH_TOP_K = int(os.getenv("NAME_MATCH_TOP_K", "5"))
+
+# 数据指纹血缘：去重取值集合的 Jaccard 阈值、参与比较的最少不同值数、值分布直方图的最低相似度
+FINGERPRINT_THRESHOLD = float(os.getenv("FINGERPRINT_THRESHOLD", "0.5"))
+FINGERPRINT_MIN_DISTINCT = int(os.getenv("FINGERPRINT_MIN_DISTINCT", "5"))
+FINGERPRINT_HISTOGRAM_SIMILARITY = float(os.getenv("FINGERPRINT_HISTOGRAM_SIMILARITY", "0.8"))
+# LSH 桶内列数上限：被更多列共有的取值集合（自增主键、是/否标记等）不作为血缘证据
+FINGERPRINT_MAX_BUCKET = int(os.getenv("FINGERPRINT_MAX_BUCKET", "50"))
+
+# 外键血缘：外键列样本值被唯一键列覆盖的最低比例（按键表抽样比例折算），以及参与比较的最少不同值数
+FK_MIN_COVERAGE = float(os.getenv("FK_MIN_COVERAGE", "0.9"))
+FK_MIN_DISTINCT = int(os.getenv("FK_MIN_DISTINCT", "5"))
+
+# GraphService 读缓存：最大条目数（0 表示关闭）与过期秒数
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+# 跨进程的图版本标记文件：采集/发现脚本写图后替换该文件，API 进程的读缓存据此失效
+GRAPH_VERSION_PATH = Path(os.getenv("GRAPH_VERSION_PATH", str(CACHE_DIR / "graph_version")))
+
+# Neo4j 连接与连接池（进程内共享驱动，见 backend/services/neo4j_driver.py）
+NEO4J_HOST = os.getenv("NEO4J_HOST", "localhost")
+NEO4J_URI = os.getenv("NEO4J_URI", f"bolt://{NEO4J_HOST}:7687")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+
+# 图存储后端：neo4j（默认）或 memory（进程内图，无需外部服务）
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "neo4j")
+# 内存图快照文件，设为空字符串则不落盘
+GRAPH_MEMORY_PATH = os.getenv("GRAPH_MEMORY_PATH", str(CACHE_DIR / "memory_graph.pkl"))
+GRAPH_MEMORY_PATH = Path(GRAPH_MEMORY_PATH) if GRAPH_MEMORY_PATH else None
@@ -30,6 +30,26 @@ class DataRow(DataAsset):
     row_data: Dict[str, Any]  # 行数据内容
     row_index: int  # 行索引位置
 
+class RowBatch(BaseModel):
+    """
+    新增：同一个表的一批数据行，按列存放（每个字段一个数组，下标对应同一行），
+    各行共有的属性只存一份；行内容在行样本存储中，不随批次传递
+    """
+    type: str = "row"
+    table_id: str  # 所属表的ID
+    owner: Optional[str]
+    tags: List[str] = []
+    created_time: str
+    updated_time: str
+    ids: List[str]
+    names: List[str]
+    descriptions: List[str]
+    row_hashes: List[str]
+    row_indexes: List[int]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
 class LineageEdge(BaseModel):
     source_id: str
     target_id: str
@@ -43,6 +63,16 @@ class Sheet(DataAsset):
     row_count: int
     column_count: int
 
+class DataFile(DataAsset):
+    """新增：数据文件资产，统计信息来自全文件流式扫描"""
+    file_path: str = ""
+    size_bytes: int = 0
+    row_count: Optional[int] = None
+    sample_size: int = 0
+    # 列名 -> 统计：CSV 为 {"nulls": 空值数, "distinct": 去重计数（估计）}，
+    # Parquet/Arrow 为 {"nulls", "min", "max"}（来自文件元数据，未知时为 None）
+    column_stats: Dict[str, Dict[str, Any]] = {}
+
 class Database(DataAsset):
     """新增：数据库资产"""
     file_path: str
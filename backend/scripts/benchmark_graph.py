@@ -0,0 +1,73 @@
+# scripts/benchmark_graph.py
+"""
+图服务基准测试：默认使用进程内内存图后端，无需外部服务
+
+    python backend/scripts/benchmark_graph.py --columns 20000 --fanout 2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')))
+sys.path.insert(0, str(project_root))
+
+from backend.models.metadata import Column
+from backend.services.graph_backend import create_graph_backend
+from backend.services.graph_service import GraphService
+from backend.services.memory_backend import MemoryGraphBackend
+from backend.services.reachability_index import ReachabilityIndex
+
+
+def _timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"  {label}: {(time.perf_counter() - started) * 1000:.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GraphService 基准测试")
+    parser.add_argument("--backend", default="memory", help="memory 或 neo4j")
+    parser.add_argument("--columns", type=int, default=10000, help="列资产数量")
+    parser.add_argument("--fanout", type=int, default=2, help="每列的上游血缘边数量")
+    parser.add_argument("--depth", type=int, default=10, help="血缘查询深度")
+    args = parser.parse_args()
+
+    # 内存后端不落盘，避免覆盖本地快照
+    backend = MemoryGraphBackend() if args.backend == "memory" else create_graph_backend(kind=args.backend)
+    gs = GraphService(backend=backend)
+    random.seed(42)
+    now = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    print(f"后端: {backend.name}，列: {args.columns}，扇入: {args.fanout}")
+    columns = [
+        Column(id=f"bench.t{i // 50}.c{i}", name=f"c{i}", type="column", data_type="string",
+               description=f"benchmark column {i}", owner="benchmark", created_time=now, updated_time=now)
+        for i in range(args.columns)
+    ]
+    stats = _timed("create_assets_bulk", lambda: gs.create_assets_bulk(columns))
+    print(f"    {stats['assets_per_second']} 个/秒")
+
+    # 只从编号更小的列派生，保证是 DAG
+    edges = [
+        {"source": f"bench.t{j // 50}.c{j}", "target": f"bench.t{i // 50}.c{i}", "method": "benchmark", "level": "column"}
+        for i in range(1, args.columns)
+        for j in random.sample(range(i), min(args.fanout, i))
+    ]
+    _timed(f"create_lineage_edges ({len(edges)})", lambda: gs.create_lineage_edges(edges))
+
+    probe = f"bench.t{(args.columns // 2) // 50}.c{args.columns // 2}"
+    _timed("search_assets", lambda: gs.search_assets("column 123"))
+    lineage = _timed(f"get_lineage depth={args.depth}",
+                     lambda: gs._get_lineage(probe, args.depth, "both", None, 5000, 20000))
+    print(f"    {len(lineage['nodes'])} 个节点, {len(lineage['edges'])} 条边, 截断: {lineage['truncated']}")
+    index = _timed("ReachabilityIndex.build", lambda: ReachabilityIndex.build(gs.get_lineage_edges()))
+    impact = _timed("impact", lambda: index.impact(probe, limit=10))
+    print(f"    上游 {impact['upstream']['count']}，下游 {impact['downstream']['count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# scripts/compact_lineage.py
+"""
+血缘关系迁移：把旧版本写入的 LINEAGE 副本折叠为单一的 DERIVED_FROM 关系
+（携带 method/level/similarity 属性），并去掉重复关系，完成后重建可达性索引
+
+    python backend/scripts/compact_lineage.py --batch-size 10000
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+project_root = Path(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')))
+sys.path.insert(0, str(project_root))
+
+from backend.services.graph_backend import close_graph_backends
+from backend.services.graph_service import GraphService
+from backend.services.reachability_index import rebuild_reachability_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压缩血缘关系：LINEAGE -> DERIVED_FROM")
+    parser.add_argument("--batch-size", type=int, default=10000, help="每个事务处理的关系数")
+    args = parser.parse_args()
+
+    graph_service = GraphService()
+    try:
+        before = {rel: graph_service.count_relationships(rel) for rel in ("DERIVED_FROM", "LINEAGE")}
+        print(f"📊 压缩前: DERIVED_FROM {before['DERIVED_FROM']} 条，LINEAGE {before['LINEAGE']} 条")
+
+        stats = graph_service.compact_lineage(args.batch_size)
+        print(f"🗑️ 删除 LINEAGE 副本 {stats['lineage_removed']} 条")
+        print(f"🔁 转换 LINEAGE 关系 {stats['lineage_converted']} 条")
+        print(f"🧹 去除重复 DERIVED_FROM {stats['deduplicated']} 条")
+
+        after = {rel: graph_service.count_relationships(rel) for rel in ("DERIVED_FROM", "LINEAGE")}
+        print(f"✅ 压缩后: DERIVED_FROM {after['DERIVED_FROM']} 条，LINEAGE {after['LINEAGE']} 条")
+
+        index = rebuild_reachability_index(graph_service)
+        print(f"✅ 可达性索引已刷新: {len(index.node_ids)} 个节点")
+    except Exception as e:
+        print(f"❌ 血缘关系压缩失败: {e}")
+        sys.exit(1)
+    finally:
+        close_graph_backends()
+
+
+if __name__ == "__main__":
+    main()
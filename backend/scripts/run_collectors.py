@@ -1,4 +1,14 @@
 # scripts/run_collectors.py
+"""
+采集元数据并执行血缘发现
+
+    python backend/scripts/run_collectors.py                # 清空后全量采集
+    python backend/scripts/run_collectors.py --incremental  # 只采集新增/变更的数据源
+    python backend/scripts/run_collectors.py --sink null    # 试运行：只采集计数，不改动图数据
+
+采集与写入组成流水线：采集器逐文件产出资产批，唯一的写入阶段经有界队列写入 --sink 指定的目标
+"""
+import argparse
 import sys
 import os
 from pathlib import Path
@@ -11,8 +21,14 @@ sys.path.insert(0, str(project_root))
 
 try:
     from backend.services.graph_service import GraphService
+    from backend.services.graph_backend import close_graph_backends
+    from backend.services.row_store import get_row_store
+    from backend.services.sketch_store import get_sketch_store
     from backend.models.metadata import DataAsset, Column
     from backend.collectors.file_collector import FileCollector
+    from backend.collectors.asset_pipeline import SINK_KINDS, create_asset_sink, run_pipeline
+    from backend.collectors.collection_manifest import CollectionManifest
+    from backend.config import COLLECTION_SINK
     from backend.services.lineage_discovery import discover_lineage_auto, AutoLineageService
     from backend.services.policy_engine import PolicyEngine
     import logging
@@ -27,14 +43,29 @@ except ImportError as e:
 def clear_existing_data(graph_service):
     """清空现有数据"""
     try:
-        with graph_service.driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
+        graph_service.clear_all()
+        get_row_store().clear()
+        get_sketch_store().clear()
         print("✅ 已清空现有数据")
     except Exception as e:
         print(f"⚠️ 清空数据时出错: {e}")
 
 
-def collect_file_metadata_with_fallback(graph_service):
+def apply_deletions(graph_service, delete_prefixes):
+    """删除已移除/已变更数据源的资产、样本行与列摘要"""
+    row_store, sketch_store = get_row_store(), get_sketch_store()
+    for prefix in delete_prefixes:
+        deleted = graph_service.delete_assets_by_prefix(prefix)
+        row_store.delete_tables(prefix)
+        sketch_store.delete_tables(prefix)
+        print(f"🗑️ 已删除 {prefix} 下的 {deleted} 个资产")
+
+
+def collect_file_metadata_with_fallback(graph_service, incremental: bool = False, sink_kind: str = "graph"):
+    """
+    按清单采集文件元数据，经流水线写入 sink_kind 指定的目标，返回采集计划；
+    所有路径都不可用时返回 None。只有写入图存储时才删除旧资产并更新采集清单
+    """
     possible_paths = [
         "E:/py_temp_project1/data",
         str(project_root / "data"),
@@ -47,26 +78,38 @@ def collect_file_metadata_with_fallback(graph_service):
             file_collector = FileCollector(path, sample_rows=100)  # 增加采样参数
             if file_collector.test_connection():
                 print(f"✅ 找到文件路径: {path}")
-                assets = file_collector.collect_metadata()
-                print(f"采集到 {len(assets)} 个资产")
+                manifest = CollectionManifest()
+                if not incremental:
+                    manifest.reset()
+                plan = manifest.plan(file_collector)
+                print(f"数据源: 新增 {plan['added']}，变更 {plan['changed']}，"
+                      f"删除 {plan['removed']}，未变 {plan['unchanged']}")
+
+                if sink_kind == "graph":
+                    apply_deletions(graph_service, plan["delete_prefixes"])
+                sink = create_asset_sink(sink_kind, graph_service)
+                stats = run_pipeline(file_collector.iter_asset_batches(plan["files"]) if plan["files"] else [], sink)
+                print(f"采集到 {stats['assets']} 个资产")
 
                 # 统计各类资产数量
-                asset_types = {}
-                for asset in assets:
-                    asset_types[asset.type] = asset_types.get(asset.type, 0) + 1
-
-                for asset_type, count in asset_types.items():
+                for asset_type, count in stats["types"].items():
                     print(f"  - {asset_type}: {count}个")
 
-                for asset in assets:
-                    graph_service.create_asset(asset)
-                print(f"✅ 成功采集了 {len(assets)} 个文件资产")
-                return True
+                print(f"✅ 成功采集了 {stats['assets']} 个文件资产 "
+                      f"(写入 {stats['sink']}，{stats['batches']} 批，{stats['seconds']}s)")
+                failed = file_collector.failed_sources
+                if failed:
+                    print(f"⚠️ {len(failed)} 个数据源采集失败，下次增量采集时重试:")
+                    for source in failed:
+                        print(f"  - {source.path}")
+                if sink_kind == "graph":
+                    manifest.commit(failed)
+                return plan
             else:
                 print(f"❌ 路径不存在: {path}")
         except Exception as e:
             print(f"⚠️ 路径 {path} 采集失败: {e}")
-    return False
+    return None
 
 
 def run_lineage_discovery(graph_service):
@@ -101,33 +144,51 @@ def run_lineage_discovery(graph_service):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="采集元数据并执行血缘发现")
+    parser.add_argument("--incremental", action="store_true",
+                        help="按采集清单只处理新增/变更/删除的数据源，不清空现有数据")
+    parser.add_argument("--sink", choices=SINK_KINDS, default=COLLECTION_SINK,
+                        help="采集结果写入目标：graph 图存储，file JSON Lines 文件，null 只计数（试运行）")
+    args = parser.parse_args()
+    dry_run = args.sink != "graph"
+
     # 初始化图数据库服务
-    graph_service = GraphService("bolt://localhost:7687", "neo4j", "password")
+    graph_service = GraphService()
 
     print("开始元数据采集...")
 
-    # 清空现有数据
-    clear_existing_data(graph_service)
+    # 全量模式先清空现有数据（不写入图存储时保留现有数据）
+    if not args.incremental and not dry_run:
+        clear_existing_data(graph_service)
+
+    # 确保约束和索引存在，并校验查询计划命中索引
+    try:
+        graph_service.ensure_schema()
+        for check, used in graph_service.verify_index_usage().items():
+            print(f"  {'✅' if used else '⚠️'} 索引校验 {check}: {'命中索引' if used else '未命中索引'}")
+    except Exception as e:
+        print(f"⚠️ 图模式初始化失败: {e}")
 
     # 采集文件元数据（带备用方案）
-    file_success = collect_file_metadata_with_fallback(graph_service)
+    plan = collect_file_metadata_with_fallback(graph_service, args.incremental, args.sink)
 
-    if file_success:
+    if plan is not None and dry_run:
+        print(f"✅ 采集结果已写入 {args.sink}，图数据未改动，跳过血缘发现")
+    elif plan is not None and not (plan["files"] or plan["delete_prefixes"]):
+        print("✅ 数据源均未变化，跳过采集与血缘发现")
+    elif plan is not None:
         print("✅ 元数据采集完成")
 
         # 验证数据
         print("\n验证采集结果...")
         try:
-            with graph_service.driver.session() as session:
-                result = session.run("MATCH (a:DataAsset) RETURN count(a) as count")
-                count = result.single()["count"]
-                print(f"✅ 数据库中共有 {count} 个资产")
+            type_counts = graph_service.count_assets_by_type()
+            print(f"✅ 数据库中共有 {sum(type_counts.values())} 个资产")
 
-                # 显示资产类型分布
-                result = session.run("MATCH (a:DataAsset) RETURN a.type as type, count(a) as count")
-                print("资产类型分布:")
-                for record in result:
-                    print(f"  - {record['type']}: {record['count']}个")
+            # 显示资产类型分布
+            print("资产类型分布:")
+            for asset_type, count in type_counts.items():
+                print(f"  - {asset_type}: {count}个")
 
         except Exception as e:
             print(f"❌ 验证失败: {e}")
@@ -138,21 +199,14 @@ def main():
         # 验证血缘关系
         print("\n验证血缘关系...")
         try:
-            with graph_service.driver.session() as session:
-                # 检查血缘关系数量
-                result = session.run("MATCH ()-[r:DERIVED_FROM]->() RETURN count(r) as relationship_count")
-                rel_count = result.single()["relationship_count"]
-                print(f"✅ 发现 {rel_count} 个血缘关系")
-
-                # 显示部分血缘关系
-                result = session.run("""
-                    MATCH (src)-[r:DERIVED_FROM]->(dst) 
-                    RETURN src.id as source, dst.id as target, type(r) as relationship 
-                    LIMIT 10
-                """)
-                print("血缘关系示例:")
-                for record in result:
-                    print(f"  - {record['source']} -> {record['target']} ({record['relationship']})")
+            # 检查血缘关系数量
+            rel_count = graph_service.count_relationships("DERIVED_FROM")
+            print(f"✅ 发现 {rel_count} 个血缘关系")
+
+            # 显示部分血缘关系
+            print("血缘关系示例:")
+            for record in graph_service.list_relationships(["DERIVED_FROM"], limit=10):
+                print(f"  - {record['source']} -> {record['target']} ({record['relationship']})")
 
         except Exception as e:
             print(f"❌ 血缘关系验证失败: {e}")
@@ -165,15 +219,12 @@ def main():
     policy_engine = PolicyEngine()
 
     # 对现有资产进行策略分析
-    with graph_service.driver.session() as session:
-        result = session.run("MATCH (a:DataAsset) RETURN a LIMIT 5")
-        for record in result:
-            asset_data = dict(record["a"])
-            policy = policy_engine.analyze_asset(asset_data)
-            print(f"资产 {asset_data.get('name', 'Unknown')} 策略分析: {policy['sensitivity_level']}")
+    for asset_data in graph_service.list_assets(limit=5):
+        policy = policy_engine.analyze_asset(asset_data)
+        print(f"资产 {asset_data.get('name', 'Unknown')} 策略分析: {policy['sensitivity_level']}")
 
     print("🎉 所有采集和分析任务完成！")
-    graph_service.close()
+    close_graph_backends()
 
 
 if __name__ == "__main__":
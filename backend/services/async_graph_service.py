@@ -0,0 +1,174 @@
+# backend/services/async_graph_service.py
+"""
+GraphService 的异步版本：基于 AsyncGraphDatabase，供 FastAPI 协程端点使用，
+查询期间不阻塞事件循环，并发能力取决于驱动连接池大小。
+非 Neo4j 后端（进程内内存图）通过 SyncGraphServiceAdapter 提供同样的接口
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.config import QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+from backend.models.metadata import DataAsset
+from backend.services.graph_service import (
+    ASSET_LABELS, LINEAGE_MERGE_KEYS, LINEAGE_RELATIONSHIP, GraphService, LineageTraversal,
+    _asset_properties, _asset_summary, _relationship_rows
+)
+from backend.services.neo4j_backend import (
+    GET_ASSET_QUERY, _lineage_hop_query, _lineage_pairs_query, _merge_asset_query,
+    _merge_relationship_query, _search_query
+)
+from backend.services.neo4j_driver import get_async_driver
+from backend.services.query_cache import QueryCache
+
+
+async def _run_read(tx, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    result = await tx.run(query, parameters=params)
+    return await result.data()
+
+
+async def _run_write(tx, query: str, params: Dict[str, Any]):
+    result = await tx.run(query, parameters=params)
+    await result.consume()
+
+
+class AsyncGraphService:
+    def __init__(self, uri=None, user=None, password=None, cache: Optional[QueryCache] = None):
+        self.driver = get_async_driver(uri, user, password)
+        # 与同进程的 GraphService 共享缓存，写入任一方都会使缓存失效
+        self.cache = cache if cache is not None else QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+
+    async def verify_connectivity(self):
+        """启动时预热连接池，提前完成握手与认证"""
+        await self.driver.verify_connectivity()
+
+    def invalidate_cache(self):
+        """递增缓存版本并替换跨进程的版本标记文件（文件 IO，协程中经 _invalidate 在线程池调用）"""
+        self.cache.bump_version()
+
+    async def _invalidate(self):
+        await asyncio.to_thread(self.invalidate_cache)
+
+    async def _cached(self, name: str, params: Dict[str, Any], loader: Callable[[], Awaitable[Any]]):
+        hit, value = self.cache.lookup(name, params)
+        if hit:
+            return value
+        version = self.cache.version
+        value = await loader()
+        self.cache.store(name, params, value, version)
+        return value
+
+    async def _read(self, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with self.driver.session() as session:
+            return await session.execute_read(_run_read, query, params)
+
+    async def create_asset(self, asset: DataAsset):
+        """创建资产节点"""
+        label = ASSET_LABELS.get(asset.type)
+        async with self.driver.session() as session:
+            await session.execute_write(_run_write, _merge_asset_query(label), {"rows": [_asset_properties(asset)]})
+        await self._invalidate()
+
+    async def create_lineage(self, source_id: str, target_id: str, relationship: str):
+        rows = _relationship_rows([{"source": source_id, "target": target_id,
+                                    "method": "manual", "relationship": relationship}])
+        async with self.driver.session() as session:
+            await session.execute_write(
+                _run_write, _merge_relationship_query(LINEAGE_RELATIONSHIP, LINEAGE_MERGE_KEYS, False),
+                {"rows": rows}
+            )
+        await self._invalidate()
+
+    async def search_assets(self, query: str, asset_type: str = None) -> List[Dict[str, Any]]:
+        async def load():
+            cypher_query, params = _search_query(query, asset_type)
+            try:
+                records = await self._read(cypher_query, params)
+            except Exception as e:
+                logging.warning(f"搜索出错: {e}")
+                raise
+            return [_asset_summary(record["a"]) for record in records]
+
+        return await self._cached("search_assets", {"query": query, "asset_type": asset_type}, load)
+
+    async def get_asset(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        async def load():
+            records = await self._read(GET_ASSET_QUERY, {"asset_id": asset_id})
+            return dict(records[0]["a"]) if records else None
+
+        return await self._cached("get_asset", {"asset_id": asset_id}, load)
+
+    async def get_lineage(self, asset_id: str, depth: int = 3, direction: str = "both",
+                          relationship_types: Optional[List[str]] = None,
+                          max_nodes: int = 500, max_edges: int = 1000) -> Dict[str, Any]:
+        """多跳有界血缘查询，所有跳在同一个读事务内完成"""
+        params = {"asset_id": asset_id, "depth": depth, "direction": direction,
+                  "relationship_types": relationship_types, "max_nodes": max_nodes, "max_edges": max_edges}
+        LineageTraversal(depth, direction, relationship_types, max_nodes, max_edges)  # 提前校验参数
+
+        async def expand(tx):
+            # 事务函数可能被驱动重试，遍历状态必须在函数内创建
+            traversal = LineageTraversal(depth, direction, relationship_types, max_nodes, max_edges)
+            start = await _run_read(tx, GET_ASSET_QUERY, {"asset_id": asset_id})
+            if not start:
+                return traversal.result()
+            traversal.add_start(dict(start[0]["a"]))
+            for hop_direction in traversal.directions:
+                while traversal.has_frontier(hop_direction):
+                    query = _lineage_hop_query(hop_direction, traversal.rel_types)
+                    hop_params = {"frontier": traversal.frontier(hop_direction), "limit": traversal.hop_limit()}
+                    traversal.absorb(hop_direction, await _run_read(tx, query, hop_params))
+            return traversal.result()
+
+        async def load():
+            async with self.driver.session() as session:
+                return await session.execute_read(expand)
+
+        return await self._cached("get_lineage", params, load)
+
+    async def get_lineage_edges(self, relationship_types: Optional[List[str]] = None) -> List[tuple]:
+        rel_types = LineageTraversal.resolve_relationship_types(relationship_types)
+        records = await self._read(_lineage_pairs_query(rel_types), {})
+        return [(rec["source"], rec["target"]) for rec in records]
+
+
+class SyncGraphServiceAdapter:
+    """
+    把同步 GraphService 包装为异步接口，用于进程内后端。内存后端的读写可能重新加载快照文件、
+    写版本标记文件，因此每个调用都在线程池中执行，不阻塞事件循环
+    """
+
+    def __init__(self, graph_service: GraphService):
+        self.graph_service = graph_service
+        self.cache = graph_service.cache
+
+    async def verify_connectivity(self):
+        return None
+
+    def invalidate_cache(self):
+        self.graph_service.invalidate_cache()
+
+    async def create_asset(self, asset: DataAsset):
+        await asyncio.to_thread(self.graph_service.create_asset, asset)
+
+    async def create_lineage(self, source_id: str, target_id: str, relationship: str):
+        await asyncio.to_thread(self.graph_service.create_lineage, source_id, target_id, relationship)
+
+    async def search_assets(self, query: str, asset_type: str = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.graph_service.search_assets, query, asset_type)
+
+    async def get_asset(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.graph_service.get_asset, asset_id)
+
+    async def get_lineage(self, asset_id: str, depth: int = 3, **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.graph_service.get_lineage, asset_id, depth, **kwargs)
+
+    async def get_lineage_edges(self, relationship_types: Optional[List[str]] = None) -> List[tuple]:
+        return await asyncio.to_thread(self.graph_service.get_lineage_edges, relationship_types)
+
+
+def create_async_graph_service(graph_service: GraphService):
+    """按同步服务的后端类型创建对应的异步服务，两者共享读缓存"""
+    if graph_service.backend.name == "neo4j":
+        return AsyncGraphService(cache=graph_service.cache)
+    return SyncGraphServiceAdapter(graph_service)
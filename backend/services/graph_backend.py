@@ -0,0 +1,130 @@
+# backend/services/graph_backend.py
+"""
+图存储后端接口：GraphService 只依赖这里定义的操作，
+具体实现有 Neo4j（neo4j_backend.py）和进程内内存图（memory_backend.py），
+通过 GRAPH_BACKEND 环境变量选择
+"""
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import GRAPH_BACKEND, GRAPH_MEMORY_PATH
+
+
+class GraphBackend(ABC):
+    """图存储后端。资产以属性字典表示，关系以 (source, target, 类型, 属性) 表示"""
+
+    name = "abstract"
+
+    def ensure_schema(self):
+        """创建约束/索引（无模式的后端可忽略）"""
+
+    def verify_index_usage(self) -> Dict[str, bool]:
+        return {}
+
+    def flush(self):
+        """持久化未落盘的数据（无持久化需求的后端可忽略）"""
+
+    @abstractmethod
+    def merge_assets(self, label: Optional[str], rows: List[Dict[str, Any]]):
+        """按 id 合并一批同标签资产的属性"""
+
+    @abstractmethod
+    def merge_asset_columns(self, label: Optional[str], columns: Dict[str, List[Any]], shared: Dict[str, Any]):
+        """
+        按列合并一批同标签资产：columns 为 属性名 -> 数组（须含 "id"，下标对应同一资产），
+        shared 为各资产共有的属性
+        """
+
+    @abstractmethod
+    def merge_relationships(self, rel_type: str, rows: List[Dict[str, Any]], create_missing: bool = False,
+                            merge_keys: Optional[List[str]] = None) -> int:
+        """
+        合并一批关系，rows 元素为 {"source", "target", "props"}；
+        同类型且 merge_keys 属性相同的关系只保留一条，其余属性覆盖写入
+        （merge_keys=None 时全部属性参与匹配）。
+        create_missing=False 时两端节点必须已存在，返回实际处理的关系数
+        """
+
+    @abstractmethod
+    def compact_lineage(self, batch_size: int = 10000) -> Dict[str, int]:
+        """
+        把旧版本的 LINEAGE 关系折叠为单一的 DERIVED_FROM 关系并去重，
+        返回 lineage_removed/lineage_converted/deduplicated 计数
+        """
+
+    @abstractmethod
+    def get_asset(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        """按 id 返回资产属性"""
+
+    @abstractmethod
+    def search_assets(self, query: str, asset_type: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """名称或描述包含关键字的资产"""
+
+    @abstractmethod
+    def list_assets(self, asset_type: str = None, id_prefix: str = None,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按类型/ID前缀列出资产属性"""
+
+    @abstractmethod
+    def expand_lineage(self, frontier: List[str], direction: str, rel_types: List[str],
+                       limit: int) -> List[Dict[str, Any]]:
+        """
+        单跳扩展：返回与前沿节点相连的关系记录，
+        字段为 source/target/relationship/method/level/similarity 以及邻居的 id/name/type
+        """
+
+    @abstractmethod
+    def lineage_pairs(self, rel_types: List[str]) -> List[Tuple[str, str]]:
+        """全部 (source_id, target_id) 关系对（去重）"""
+
+    @abstractmethod
+    def list_relationships(self, rel_types: List[str], asset_type: str = None,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """列出关系 {"source", "target", "relationship", "props"}；asset_type 限定两端资产类型"""
+
+    @abstractmethod
+    def count_assets_by_type(self) -> Dict[str, int]:
+        """各类型资产数量"""
+
+    @abstractmethod
+    def count_relationships(self, rel_type: str) -> int:
+        """某类型关系数量"""
+
+    @abstractmethod
+    def delete_assets_by_prefix(self, id_prefix: str) -> int:
+        """删除 id 等于 id_prefix 或以 "id_prefix." 开头的资产及其关系，返回删除的资产数"""
+
+    @abstractmethod
+    def clear(self):
+        """删除全部节点与关系"""
+
+
+_lock = threading.Lock()
+_memory_backends: Dict[str, GraphBackend] = {}
+
+
+def create_graph_backend(uri=None, user=None, password=None, kind: str = None) -> GraphBackend:
+    """按配置创建后端；内存后端在进程内按快照路径共享"""
+    kind = (kind or GRAPH_BACKEND).lower()
+    if kind == "neo4j":
+        from backend.services.neo4j_backend import Neo4jBackend
+        return Neo4jBackend(uri, user, password)
+    if kind == "memory":
+        from backend.services.memory_backend import MemoryGraphBackend
+        path = str(GRAPH_MEMORY_PATH) if GRAPH_MEMORY_PATH else ""
+        with _lock:
+            if path not in _memory_backends:
+                _memory_backends[path] = MemoryGraphBackend(GRAPH_MEMORY_PATH)
+            return _memory_backends[path]
+    raise ValueError(f"不支持的图后端: {kind}，可选 neo4j/memory")
+
+
+def close_graph_backends():
+    """进程退出时调用：内存后端落盘，关闭全部 Neo4j 驱动"""
+    with _lock:
+        backends = list(_memory_backends.values())
+    for backend in backends:
+        backend.flush()
+    from backend.services.neo4j_driver import close_drivers
+    close_drivers()
@@ -1,199 +1,391 @@
 # services/graph_service.py
 import json
-from neo4j import GraphDatabase
+import logging
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
 from backend.models.metadata import *
+from backend.config import QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+from backend.services.graph_backend import GraphBackend, create_graph_backend
+from backend.services.query_cache import QueryCache
+
+# 资产类型 -> 附加标签
+ASSET_LABELS = {
+    "column": "Column",
+    "row": "Row",
+    "sheet": "Sheet",
+    "database": "Database",
+}
+
+# 资产类型 -> 类型特定属性及默认值
+TYPE_PROPERTIES = {
+    "column": {"data_type": None, "is_primary_key": False},
+    # 行内容存放在行样本存储（row_store.py），节点只保留引用
+    "row": {"table_id": None, "row_hash": None, "row_index": 0},
+    "file": {"file_path": "", "size_bytes": 0, "row_count": None, "sample_size": 0, "column_stats": {}},
+    "sheet": {"file_id": "", "sheet_name": "", "row_count": 0, "column_count": 0},
+    "database": {"file_path": "", "table_count": 0, "connection_string": ""},
+    "table": {"database": "", "schema": "", "row_count": None},
+}
+
+
+def _asset_properties(asset: DataAsset) -> Dict[str, Any]:
+    """将资产转换为节点属性字典"""
+    props = {
+        "id": asset.id,
+        "name": asset.name,
+        "type": asset.type,
+        "description": asset.description or "",
+        "owner": asset.owner or "",
+        "tags": asset.tags or [],
+        "created_time": asset.created_time,
+        "updated_time": asset.updated_time
+    }
+
+    for field, default in TYPE_PROPERTIES.get(asset.type, {}).items():
+        if not hasattr(asset, field):
+            continue
+        value = getattr(asset, field)
+        if value is None:
+            value = default
+        if isinstance(value, dict):
+            # 节点属性不支持嵌套结构，存为JSON字符串
+            value = json.dumps(value, ensure_ascii=False)
+        props[field] = value
+
+    if asset.type == "row":
+        # 空值会删除属性，清理旧版本写入节点的 row_data
+        props["row_data"] = None
+
+    return props
+
+
+def _row_batch_columns(batch: RowBatch) -> tuple:
+    """RowBatch -> (逐行属性的列数组, 共有属性)，属性与 _asset_properties 生成的行节点一致"""
+    columns = {
+        "id": batch.ids,
+        "name": batch.names,
+        "description": batch.descriptions,
+        "row_hash": batch.row_hashes,
+        "row_index": batch.row_indexes,
+    }
+    shared = {
+        "type": batch.type,
+        "owner": batch.owner or "",
+        "tags": batch.tags or [],
+        "created_time": batch.created_time,
+        "updated_time": batch.updated_time,
+        "table_id": batch.table_id,
+        "row_data": None,
+    }
+    return columns, shared
+
+
+def _asset_summary(asset_data) -> Dict[str, Any]:
+    return {
+        "id": asset_data["id"],
+        "name": asset_data["name"],
+        "type": asset_data["type"],
+        "description": asset_data.get("description", ""),
+        "owner": asset_data.get("owner", ""),
+        "tags": asset_data.get("tags", [])
+    }
+
+
+# 血缘统一使用 DERIVED_FROM 关系：method（及手工血缘的 relationship）确定一条关系，
+# level/similarity 为附加属性
+LINEAGE_RELATIONSHIP = "DERIVED_FROM"
+LINEAGE_MERGE_KEYS = ["method", "relationship"]
+
+
+def _relationship_rows(edges: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """血缘边 -> 关系行；空值属性不写入"""
+    rows = []
+    for edge in edges:
+        props = {key: edge.get(key) for key in ("method", "level", "similarity", "relationship")
+                 if edge.get(key) is not None}
+        rows.append({"source": edge["source"], "target": edge["target"], "props": props})
+    return rows
+
+
+# 已完成模式初始化的后端，避免共享驱动上重复执行
+_schema_ready = set()
+
 
 class GraphService:
-    def __init__(self, uri, user, password):
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None, init_schema: bool = True,
+                 backend: Optional[GraphBackend] = None):
+        # 后端由 GRAPH_BACKEND 配置选择；Neo4j 驱动来自进程级注册表
+        self.backend = backend or create_graph_backend(uri, user, password)
+        self.cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+        schema_key = id(getattr(self.backend, "driver", self.backend))
+        if init_schema and schema_key not in _schema_ready:
+            try:
+                self.ensure_schema()
+                _schema_ready.add(schema_key)
+            except Exception as e:
+                logging.warning(f"图模式初始化失败: {e}")
+
+    @property
+    def driver(self):
+        """底层 Neo4j 驱动，仅 Neo4j 后端可用"""
+        return self.backend.driver
 
     def close(self):
-        self.driver.close()
+        """持久化后端数据；Neo4j 驱动由注册表统一管理，进程退出时调用 close_graph_backends() 关闭"""
+        self.backend.flush()
+
+    def ensure_schema(self):
+        """幂等创建唯一约束与索引"""
+        self.backend.ensure_schema()
+
+    def verify_index_usage(self) -> Dict[str, bool]:
+        """EXPLAIN 校验关键查询是否走索引"""
+        return self.backend.verify_index_usage()
+
+    def invalidate_cache(self):
+        """图数据变更后调用：递增图版本号，使读缓存失效"""
+        self.cache.bump_version()
 
     def create_asset(self, asset: DataAsset):
         """
         创建资产节点，支持所有类型包括Row、Sheet、Database
         """
-        with self.driver.session() as session:
-            # 基础DataAsset节点
-            query = """
-            MERGE (a:DataAsset {id: $id})
-            SET a.name = $name,
-                a.type = $type,
-                a.description = $description,
-                a.owner = $owner,
-                a.tags = $tags,
-                a.created_time = $created_time,
-                a.updated_time = $updated_time
-            """
-
-            # 根据类型添加额外标签和属性
-            if asset.type == "column":
-                query += " SET a:Column"
-                if hasattr(asset, 'data_type'):
-                    query += ", a.data_type = $data_type"
-            elif asset.type == "row":
-                query += " SET a:Row"
-                # 添加行特定属性
-                if hasattr(asset, 'table_id'):
-                    query += ", a.table_id = $table_id"
-                if hasattr(asset, 'row_hash'):
-                    query += ", a.row_hash = $row_hash"
-                if hasattr(asset, 'row_data'):
-                    # 将行数据存储为JSON字符串
-                    query += ", a.row_data = $row_data"
-                if hasattr(asset, 'row_index'):
-                    query += ", a.row_index = $row_index"
-            elif asset.type == "sheet":
-                query += " SET a:Sheet"
-                if hasattr(asset, 'file_id'):
-                    query += ", a.file_id = $file_id"
-                if hasattr(asset, 'sheet_name'):
-                    query += ", a.sheet_name = $sheet_name"
-                if hasattr(asset, 'row_count'):
-                    query += ", a.row_count = $row_count"
-                if hasattr(asset, 'column_count'):
-                    query += ", a.column_count = $column_count"
-            elif asset.type == "database":
-                query += " SET a:Database"
-                if hasattr(asset, 'file_path'):
-                    query += ", a.file_path = $file_path"
-                if hasattr(asset, 'table_count'):
-                    query += ", a.table_count = $table_count"
-                if hasattr(asset, 'connection_string'):
-                    query += ", a.connection_string = $connection_string"
-
-            query += " RETURN a"
-
-            params = {
-                "id": asset.id,
-                "name": asset.name,
-                "type": asset.type,
-                "description": asset.description or "",
-                "owner": asset.owner or "",
-                "tags": asset.tags or [],
-                "created_time": asset.created_time,
-                "updated_time": asset.updated_time
-            }
-
-            # 添加类型特定参数
-            if asset.type == "column" and hasattr(asset, 'data_type'):
-                params["data_type"] = asset.data_type
-            elif asset.type == "row" and hasattr(asset, 'table_id'):
-                params["table_id"] = asset.table_id
-                params["row_hash"] = asset.row_hash
-                params["row_data"] = json.dumps(asset.row_data, ensure_ascii=False) if hasattr(asset, 'row_data') else "{}"
-                params["row_index"] = getattr(asset, 'row_index', 0)
-            elif asset.type == "sheet":
-                params["file_id"] = getattr(asset, 'file_id', "")
-                params["sheet_name"] = getattr(asset, 'sheet_name', "")
-                params["row_count"] = getattr(asset, 'row_count', 0)
-                params["column_count"] = getattr(asset, 'column_count', 0)
-            elif asset.type == "database":
-                params["file_path"] = getattr(asset, 'file_path', "")
-                params["table_count"] = getattr(asset, 'table_count', 0)
-                params["connection_string"] = getattr(asset, 'connection_string', "")
-
-            session.run(query, **params)
+        self.backend.merge_assets(ASSET_LABELS.get(asset.type), [_asset_properties(asset)])
+        self.invalidate_cache()
+
+    def create_assets_bulk(self, assets: Iterable[Union[DataAsset, RowBatch]],
+                           batch_size: int = 1000) -> Dict[str, Any]:
+        """
+        批量创建资产节点：按类型/标签分组，每批一次 UNWIND 事务写入；
+        RowBatch 不展开为逐行的属性字典，按列数组分批写入
+        """
+        started = time.perf_counter()
+        pending: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        written, batches = 0, 0
+
+        for asset in assets:
+            if isinstance(asset, RowBatch):
+                columns, shared = _row_batch_columns(asset)
+                for start in range(0, len(asset), batch_size):
+                    chunk = {key: values[start:start + batch_size] for key, values in columns.items()}
+                    self.backend.merge_asset_columns(ASSET_LABELS["row"], chunk, shared)
+                    written += len(chunk["id"])
+                    batches += 1
+                continue
+            label = ASSET_LABELS.get(asset.type)
+            rows = pending.setdefault(label, [])
+            rows.append(_asset_properties(asset))
+            if len(rows) >= batch_size:
+                self.backend.merge_assets(label, rows)
+                written += len(rows)
+                batches += 1
+                pending[label] = []
+
+        for label, rows in pending.items():
+            if rows:
+                self.backend.merge_assets(label, rows)
+                written += len(rows)
+                batches += 1
+
+        self.invalidate_cache()
+        elapsed = time.perf_counter() - started
+        stats = {
+            "assets": written,
+            "batches": batches,
+            "seconds": round(elapsed, 3),
+            "assets_per_second": round(written / elapsed, 1) if elapsed > 0 else float(written),
+        }
+        logging.info(f"批量写入 {written} 个资产，{batches} 批，耗时 {stats['seconds']}s "
+                     f"({stats['assets_per_second']} 个/秒)")
+        return stats
 
     def create_lineage(self, source_id: str, target_id: str, relationship: str):
-        with self.driver.session() as session:
-            query = """
-            MATCH (source:DataAsset {id: $source_id})
-            MATCH (target:DataAsset {id: $target_id})
-            MERGE (source)-[r:LINEAGE {type: $relationship}]->(target)
-            RETURN r
-            """
-            session.run(query,
-                        source_id=source_id,
-                        target_id=target_id,
-                        relationship=relationship)
+        """手工登记血缘：method='manual'，业务关系名记录在 relationship 属性"""
+        self.create_lineage_edges([{"source": source_id, "target": target_id,
+                                    "method": "manual", "relationship": relationship}])
+
+    def create_lineage_edges(self, edges: List[Dict[str, Any]], create_missing: bool = False) -> int:
+        """
+        批量写入血缘边，edges 元素为 {source, target, method, level?, similarity?}，
+        每条边写为一条带属性的 DERIVED_FROM 关系
+        """
+        if not edges:
+            return 0
+        count = self.backend.merge_relationships(LINEAGE_RELATIONSHIP, _relationship_rows(edges),
+                                                 create_missing, merge_keys=LINEAGE_MERGE_KEYS)
+        self.invalidate_cache()
+        return count
+
+    def compact_lineage(self, batch_size: int = 10000) -> Dict[str, int]:
+        """迁移旧数据：LINEAGE 副本折叠进 DERIVED_FROM，并去除重复关系"""
+        stats = self.backend.compact_lineage(batch_size)
+        self.invalidate_cache()
+        return stats
 
     def search_assets(self, query: str, asset_type: str = None):
+        return self.cache.get_or_load(
+            "search_assets", {"query": query, "asset_type": asset_type},
+            lambda: self._search_assets(query, asset_type)
+        )
+
+    def _search_assets(self, query: str, asset_type: str = None):
         try:
-            with self.driver.session() as session:
-                cypher_query = """
-                MATCH (a:DataAsset)
-                WHERE a.name CONTAINS $query OR a.description CONTAINS $query
-                """
-                params = {"query": query}
-
-                if asset_type:
-                    cypher_query += " AND a.type = $asset_type"
-                    params["asset_type"] = asset_type
-
-                cypher_query += " RETURN a LIMIT 50"
-
-                # 修改这一行：直接传递 params 字典，而不是使用 **params
-                result = session.run(cypher_query, parameters=params)
-
-                assets = []
-                for record in result:
-                    asset_data = record["a"]
-                    assets.append({
-                        "id": asset_data["id"],
-                        "name": asset_data["name"],
-                        "type": asset_data["type"],
-                        "description": asset_data.get("description", ""),
-                        "owner": asset_data.get("owner", ""),
-                        "tags": asset_data.get("tags", [])
-                    })
-                return assets
+            return [_asset_summary(asset) for asset in self.backend.search_assets(query, asset_type)]
         except Exception as e:
             print(f"搜索出错: {e}")
             raise e
 
-    # 在 graph_service.py 中修改 get_lineage 方法
-    def get_lineage(self, asset_id: str, depth: int = 3):
-        with self.driver.session() as session:
-            query = """
-            MATCH (start:DataAsset {id: $asset_id})
-            OPTIONAL MATCH up = (otherUp)-[:DERIVED_FROM|LINEAGE]->(start)
-            OPTIONAL MATCH down = (start)-[:DERIVED_FROM|LINEAGE]->(otherDown)
-            RETURN start, 
-                   [x IN collect(distinct otherUp) WHERE x IS NOT NULL] as ups, 
-                   [x IN collect(distinct otherDown) WHERE x IS NOT NULL] as downs
-            """
-            result = session.run(query, asset_id=asset_id)
-            return self._parse_lineage_result(result)
-
-    # 确保 _parse_lineage_result 方法存在且正确
-    def _parse_lineage_result(self, result):
-        nodes, edges = {}, []
-
-        for record in result:
-            # 添加起始节点
-            start_node = record["start"]
-            nodes[start_node["id"]] = {
-                "id": start_node["id"],
-                "name": start_node["name"],
-                "type": start_node["type"]
-            }
-
-            # 处理上游节点
-            for up_node in record["ups"] or []:
-                nodes[up_node["id"]] = {
-                    "id": up_node["id"],
-                    "name": up_node["name"],
-                    "type": up_node["type"]
-                }
-                edges.append({
-                    "source": up_node["id"],
-                    "target": start_node["id"],
-                    "relationship": "DERIVED_FROM"
-                })
-
-            # 处理下游节点
-            for down_node in record["downs"] or []:
-                nodes[down_node["id"]] = {
-                    "id": down_node["id"],
-                    "name": down_node["name"],
-                    "type": down_node["type"]
+    def get_asset(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        """按ID读取资产全部属性，不存在时返回 None"""
+        return self.cache.get_or_load("get_asset", {"asset_id": asset_id},
+                                      lambda: self.backend.get_asset(asset_id))
+
+    def list_assets(self, asset_type: str = None, id_prefix: str = None,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按类型/ID前缀批量读取资产属性（供血缘发现使用，不走缓存）"""
+        return self.backend.list_assets(asset_type, id_prefix, limit)
+
+    def list_relationships(self, relationship_types: Optional[List[str]] = None, asset_type: str = None,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        rel_types = LineageTraversal.resolve_relationship_types(relationship_types)
+        return self.backend.list_relationships(rel_types, asset_type, limit)
+
+    def count_assets_by_type(self) -> Dict[str, int]:
+        return self.backend.count_assets_by_type()
+
+    def count_relationships(self, relationship_type: str) -> int:
+        return self.backend.count_relationships(LineageTraversal.resolve_relationship_types([relationship_type])[0])
+
+    def delete_assets_by_prefix(self, id_prefix: str) -> int:
+        """删除某个数据源（id 前缀）下的全部资产及其关系"""
+        deleted = self.backend.delete_assets_by_prefix(id_prefix)
+        self.invalidate_cache()
+        return deleted
+
+    def clear_all(self):
+        """删除全部节点与关系"""
+        self.backend.clear()
+        self.invalidate_cache()
+
+    def get_lineage(self, asset_id: str, depth: int = 3, direction: str = "both",
+                    relationship_types: Optional[List[str]] = None,
+                    max_nodes: int = 500, max_edges: int = 1000) -> Dict[str, Any]:
+        """
+        多跳血缘查询：逐层扩展前沿节点，全局去重，受节点/边数量上限约束
+        """
+        params = {"asset_id": asset_id, "depth": depth, "direction": direction,
+                  "relationship_types": relationship_types, "max_nodes": max_nodes, "max_edges": max_edges}
+        return self.cache.get_or_load("get_lineage", params, lambda: self._get_lineage(**params))
+
+    def _get_lineage(self, asset_id: str, depth: int, direction: str,
+                     relationship_types: Optional[List[str]], max_nodes: int, max_edges: int) -> Dict[str, Any]:
+        traversal = LineageTraversal(depth, direction, relationship_types, max_nodes, max_edges)
+        start = self.backend.get_asset(asset_id)
+        if start is None:
+            return traversal.result()
+        traversal.add_start(start)
+
+        for hop_direction in traversal.directions:
+            while traversal.has_frontier(hop_direction):
+                records = self.backend.expand_lineage(traversal.frontier(hop_direction), hop_direction,
+                                                      traversal.rel_types, traversal.hop_limit())
+                traversal.absorb(hop_direction, records)
+
+        return traversal.result()
+
+    def get_lineage_edges(self, relationship_types: Optional[List[str]] = None) -> List[tuple]:
+        """导出全部血缘边 (source_id, target_id)，用于离线构建可达性索引"""
+        return self.backend.lineage_pairs(LineageTraversal.resolve_relationship_types(relationship_types))
+
+
+class LineageTraversal:
+    """
+    有界血缘遍历状态：每跳只扩展上一跳新发现的节点，已访问节点不再扩展，
+    避免可变长路径枚举带来的组合爆炸
+    """
+
+    DIRECTIONS = {"up": ("up",), "down": ("down",), "both": ("up", "down")}
+    DEFAULT_RELATIONSHIPS = (LINEAGE_RELATIONSHIP,)
+    MAX_DEPTH = 10
+
+    def __init__(self, depth: int = 3, direction: str = "both",
+                 relationship_types: Optional[List[str]] = None,
+                 max_nodes: int = 500, max_edges: int = 1000):
+        if direction not in self.DIRECTIONS:
+            raise ValueError(f"不支持的方向: {direction}，可选 up/down/both")
+        rel_types = self.resolve_relationship_types(relationship_types)
+
+        self.depth = max(0, min(int(depth), self.MAX_DEPTH))
+        self.directions = self.DIRECTIONS[direction]
+        self.rel_types = rel_types
+        self.max_nodes = max(1, int(max_nodes))
+        self.max_edges = max(0, int(max_edges))
+
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: Dict[tuple, Dict[str, Any]] = {}
+        self.truncated = False
+        self._frontier: Dict[str, List[str]] = {}
+        self._visited: Dict[str, set] = {}
+        self._hops: Dict[str, int] = {}
+
+    @classmethod
+    def resolve_relationship_types(cls, relationship_types: Optional[List[str]] = None) -> List[str]:
+        """补全默认关系类型并校验名称（关系类型会拼接进查询语句）"""
+        rel_types = list(relationship_types or cls.DEFAULT_RELATIONSHIPS)
+        for rel_type in rel_types:
+            if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", rel_type):
+                raise ValueError(f"非法的关系类型: {rel_type}")
+        return rel_types
+
+    def add_start(self, start: Dict[str, Any]):
+        self.nodes[start["id"]] = {"id": start["id"], "name": start["name"], "type": start["type"], "depth": 0}
+        for d in self.directions:
+            self._frontier[d] = [start["id"]]
+            self._visited[d] = {start["id"]}
+            self._hops[d] = 0
+
+    def has_frontier(self, direction: str) -> bool:
+        return (not self.truncated and bool(self._frontier.get(direction))
+                and self._hops[direction] < self.depth)
+
+    def frontier(self, direction: str) -> List[str]:
+        return self._frontier[direction]
+
+    def hop_limit(self) -> int:
+        """单跳最多取回的关系数：比剩余边配额多 1，用于判断是否截断"""
+        return self.max_edges - len(self.edges) + 1
+
+    def absorb(self, direction: str, records: List[Dict[str, Any]]):
+        """合并一跳的扩展结果，生成下一跳前沿"""
+        self._hops[direction] += 1
+        next_frontier = []
+        for rec in records:
+            if rec["id"] not in self.nodes and len(self.nodes) >= self.max_nodes:
+                self.truncated = True
+                break
+            # 同一对节点间不同 method 的血缘各算一条边
+            key = (rec["source"], rec["target"], rec["relationship"], rec.get("method"))
+            if key not in self.edges:
+                if len(self.edges) >= self.max_edges:
+                    self.truncated = True
+                    break
+                self.edges[key] = {
+                    "source": rec["source"],
+                    "target": rec["target"],
+                    "relationship": rec["relationship"],
+                    "method": rec.get("method"),
+                    "level": rec.get("level"),
+                    "similarity": rec.get("similarity")
                 }
-                edges.append({
-                    "source": start_node["id"],
-                    "target": down_node["id"],
-                    "relationship": "DERIVED_FROM"
-                })
+            if rec["id"] not in self.nodes:
+                self.nodes[rec["id"]] = {"id": rec["id"], "name": rec["name"], "type": rec["type"],
+                                         "depth": self._hops[direction]}
+            if rec["id"] not in self._visited[direction]:
+                self._visited[direction].add(rec["id"])
+                next_frontier.append(rec["id"])
+        self._frontier[direction] = next_frontier
 
-        return {"nodes": list(nodes.values()), "edges": edges}
\ No newline at end of file
+    def result(self) -> Dict[str, Any]:
+        return {"nodes": list(self.nodes.values()), "edges": list(self.edges.values()),
+                "truncated": self.truncated}
@@ -1,19 +1,30 @@
 # backend/services/lineage_discovery.py
 """
-方案2完整实现：自动发现时同时写 LINEAGE 边（与 DERIVED_FROM 同构）
+自动血缘发现：各策略产生的边经 LineageEdgeSink 缓冲，
+按批写为带 method/level/similarity 属性的 DERIVED_FROM 关系
 """
-import json
 import os
 import re
 import hashlib
-from difflib import SequenceMatcher
-from typing import Dict, List, Tuple, Set
+from typing import Any, Dict, List, Optional, Tuple, Set
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-import sqlglot
+from scipy import sparse
 
+from backend.config import (
+    FINGERPRINT_HISTOGRAM_SIMILARITY, FINGERPRINT_MAX_BUCKET, FINGERPRINT_MIN_DISTINCT, FINGERPRINT_THRESHOLD,
+    FK_MIN_COVERAGE, FK_MIN_DISTINCT, LINEAGE_BATCH_SIZE,
+    NAME_MATCH_THRESHOLD, NAME_MATCH_TOP_K
+)
 from backend.services.graph_service import GraphService
+from backend.services.name_matcher import NameMatcher
+from backend.services.reachability_index import rebuild_reachability_index
+from backend.services.row_store import REFERENCE_COLUMNS, RowStore, get_row_store
+from backend.services.sketch_store import SketchStore, get_sketch_store
+from backend.services.sql_lineage import SqlLineageCache, get_sql_lineage_cache, parse_sql_files
+from backend.services.sketches import MinHasher, lsh_band_keys, lsh_params, mix64
 
 
 # ------------------------------------------------------------------
@@ -23,146 +34,395 @@ def _safe_id(raw: str) -> str:
     return re.sub(r'[^0-9A-Za-z._-]', '_', str(raw))
 
 
-def _is_similar_name(n1: str, n2: str, threshold: float = 0.7) -> bool:
-    n1_clean = n1.lower().replace('_col', '').replace('_', '')
-    n2_clean = n2.lower().replace('_col', '').replace('_', '')
-    return SequenceMatcher(None, n1_clean, n2_clean).ratio() >= threshold
-
-
-def _column_fingerprint(series: pd.Series, sample: int = 100) -> str:
-    valid = series.dropna().astype(str)
-    if len(valid) == 0:
-        return ""
-    sampled = sorted(valid.sample(min(sample, len(valid))))
-    return hashlib.sha256("".join(sampled).encode("utf-8")).hexdigest()
-
-
-def _is_pk_candidate(series: pd.Series, unique_ratio: float = 0.8) -> bool:
-    if len(series.dropna()) == 0:
-        return False
-    return series.nunique() / len(series.dropna()) >= unique_ratio
-
-
-def _is_fk_candidate(series: pd.Series, pk_series: pd.Series) -> bool:
-    fk_vals = set(series.dropna().astype(str))
-    pk_vals = set(pk_series.dropna().astype(str))
-    if not fk_vals:
-        return False
-    common_vals = fk_vals.intersection(pk_vals)
-    return len(common_vals) > 0 and len(common_vals) / len(fk_vals) >= 0.1
+# ------------------------------------------------------------------
+# 外键候选：样本值哈希为每列升序去重数组，列与唯一键候选的共有取值数由稀疏矩阵乘积得到
+# ------------------------------------------------------------------
+FK_BLOCK_SIZE = 2000
+# 整数取值与字符串取值的哈希分属不同取值域，二者不会被计为共有取值
+INTEGER_VALUE_SALT = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _key_values(values: pd.Series) -> Optional[Tuple[np.ndarray, bool, float, float]]:
+    """
+    列样本值的去重哈希（升序）、是否整数列及取值范围（非整数列为 nan）。
+    全部非空值可解析为整数的列按整数取值哈希，"2" 与 2 视为相同；其余列按去除首尾空白的字符串哈希；
+    含小数的数值列（金额、比率等）不会是键，返回 None
+    """
+    values = values.dropna()
+    if values.dtype == object:
+        values = values[values.astype(str).str.strip() != ""]
+    if values.empty:
+        return None
+    numbers = pd.to_numeric(values, errors="coerce")
+    if numbers.notna().all():
+        numbers = numbers.to_numpy(np.float64)
+        if not np.all(np.mod(numbers, 1) == 0):
+            return None
+        hashed = mix64(pd.util.hash_array(numbers.astype(np.int64)) ^ INTEGER_VALUE_SALT)
+        return np.unique(hashed), True, float(numbers.min()), float(numbers.max())
+    hashed = pd.util.hash_array(values.astype(str).str.strip().to_numpy(object))
+    return np.unique(hashed), False, np.nan, np.nan
+
+
+def _shared_value_counts(hashes: List[np.ndarray], keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    每列与每个键列共有的取值数，只返回至少共有一个取值的 (列, 键列, 共有取值数)。
+    取值哈希映射为全局取值编号后构成列 × 取值的 0/1 稀疏矩阵，按列分块与键列子矩阵相乘，
+    只有确实共享取值的列对才会产生非零项
+    """
+    sizes = np.array([len(hashed) for hashed in hashes])
+    value_ids = np.unique(np.concatenate(hashes), return_inverse=True)[1].ravel()
+    owners = np.repeat(np.arange(len(hashes)), sizes)
+    incidence = sparse.csr_matrix((np.ones(len(value_ids), dtype=np.int32), (owners, value_ids)),
+                                  shape=(len(hashes), int(value_ids.max()) + 1))
+    key_matrix = incidence[keys].T.tocsc()
+
+    columns, key_columns, counts = [], [], []
+    for start in range(0, len(hashes), FK_BLOCK_SIZE):
+        block = (incidence[start:start + FK_BLOCK_SIZE] @ key_matrix).tocoo()
+        columns.append(block.row + start)
+        key_columns.append(keys[block.col])
+        counts.append(block.data)
+    return np.concatenate(columns), np.concatenate(key_columns), np.concatenate(counts)
 
 
 # ------------------------------------------------------------------
-# SQL 解析
+# 行相似性候选：按表对的共同字段分组，哈希连接或 MinHash/LSH 分桶
 # ------------------------------------------------------------------
-def parse_sql_column_lineage(sql_path: Path) -> Dict[str, Set[str]]:
-    lineage: Dict[str, Set[str]] = {}
-    try:
-        with open(sql_path, encoding="utf-8-sig") as f:
-            sql_content = f.read()
+ROW_MINHASH_PERMUTATIONS = 128
+
+
+def _canonical_value(value: Any) -> Any:
+    """整数值的浮点数与布尔值转为 int：1、1.0、True 在 _calculate_row_similarity 中用 == 判为相同，哈希也须相同"""
+    if isinstance(value, (bool, np.bool_, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return int(value)
+    return value
+
+
+def _canonical_values(values: pd.Series) -> pd.Series:
+    """逐值规范化后的对象列（含空值的整数列从行样本存储读回时为 float64）"""
+    return values.astype(object).map(_canonical_value)
+
+
+def _value_hashes(frame: pd.DataFrame, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """某列规范化取值与列名合并的哈希，及非空标记"""
+    values = frame[column]
+    hashed = pd.util.hash_pandas_object(_canonical_values(values), index=False).to_numpy(np.uint64)
+    column_hash = mix64(np.uint64(int(hashlib.md5(str(column).encode("utf-8")).hexdigest()[:16], 16)))
+    return mix64(hashed ^ column_hash), values.notna().to_numpy()
+
+
+def _bucket_pairs(tables: np.ndarray, positions: np.ndarray, keys: np.ndarray,
+                  allowed: Set[Tuple[int, int]]) -> Set[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """同一桶键下、来自 allowed 中表对的行对，每对为 ((表, 行位置), (表, 行位置))，表编号小者在前"""
+    # 输入按表、行位置排列，稳定排序后桶内仍保持该顺序
+    order = np.argsort(keys, kind="stable")
+    tables, positions, keys = tables[order], positions[order], keys[order]
+    boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])
+    starts, ends = boundaries[:-1], boundaries[1:]
+    # 只保留含多个表的桶（桶内按表排序，首尾表不同即可）
+    mixed = tables[starts] != tables[ends - 1]
+    starts, ends = starts[mixed], ends[mixed]
+
+    # 绝大多数桶恰好两个成员，整列生成行对；更大的桶逐个展开
+    left, right = [starts[ends - starts == 2]], [starts[ends - starts == 2] + 1]
+    for start, end in zip(starts[ends - starts > 2].tolist(), ends[ends - starts > 2].tolist()):
+        i, j = np.triu_indices(end - start, k=1)
+        left.append(i + start)
+        right.append(j + start)
+    left, right = np.concatenate(left), np.concatenate(right)
+    left, right = left[tables[left] != tables[right]], right[tables[left] != tables[right]]
+
+    # 同一行对可能出现在多个分段的桶中，先去重再转为元组
+    pairs = np.unique(np.stack([tables[left], positions[left], tables[right], positions[right]], axis=1), axis=0)
+    return {((a, i), (b, j)) for a, i, b, j in pairs.tolist() if (a, b) in allowed}
+
+
+def _lsh_pairs(band_keys: np.ndarray, max_bucket: Optional[int] = None) -> np.ndarray:
+    """
+    band_keys 为 (集合数, bands)，返回至少在一个分段中同桶的集合对 (i, j)，i < j，已去重；
+    成员超过 max_bucket 的桶（大量集合共有的取值，如自增主键、是/否标记）不展开
+    """
+    bands = band_keys.shape[1]
+    # 不同分段的桶互不相同：桶键混入分段编号
+    keys = mix64(band_keys ^ mix64(np.arange(bands, dtype=np.uint64))[None, :]).ravel()
+    members = np.repeat(np.arange(len(band_keys)), bands)
+    order = np.argsort(keys, kind="stable")
+    keys, members = keys[order], members[order]
+    boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])
+    starts, ends = boundaries[:-1], boundaries[1:]
+    if max_bucket is not None:
+        starts, ends = starts[ends - starts <= max_bucket], ends[ends - starts <= max_bucket]
+
+    left, right = [starts[ends - starts == 2]], [starts[ends - starts == 2] + 1]
+    for start, end in zip(starts[ends - starts > 2].tolist(), ends[ends - starts > 2].tolist()):
+        i, j = np.triu_indices(end - start, k=1)
+        left.append(i + start)
+        right.append(j + start)
+    left, right = members[np.concatenate(left)], members[np.concatenate(right)]
+    pairs = np.stack([np.minimum(left, right), np.maximum(left, right)], axis=1)
+    return np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+
+
+def _histogram_similarity(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """逐行比较两组直方图：1 - 归一化后的总变差距离，空直方图视为完全相似"""
+    left = left / np.maximum(left.sum(axis=1, keepdims=True), 1)
+    right = right / np.maximum(right.sum(axis=1, keepdims=True), 1)
+    return 1 - 0.5 * np.abs(left - right).sum(axis=1)
+
+
+def _row_similarity_candidates(frames: List[pd.DataFrame],
+                               threshold: float) -> Set[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    不同表之间可能达到阈值的行对（可能含少量未达阈值的候选，需精确校验）。
+    两行相似度只取决于两表的共同字段 C：需要至少 m 个字段取值相同（m/|C| >= threshold）。
+    m = |C| 时按 C 上的整行取值哈希连接（精确）；否则只对 C 上的非空 (字段, 取值) 计算 MinHash，
+    此时两行的 Jaccard 不低于 m/(2|C|-m)，LSH 分段保证该 Jaccard 以 99.9% 概率成为候选
+    """
+    column_sets = [set(frame.columns) for frame in frames]
+    groups: Dict[frozenset, Set[Tuple[int, int]]] = {}
+    for a in range(len(frames)):
+        for b in range(a + 1, len(frames)):
+            common = column_sets[a] & column_sets[b]
+            if common:
+                groups.setdefault(frozenset(common), set()).add((a, b))
+
+    candidates = set()
+    minhasher = MinHasher(ROW_MINHASH_PERMUTATIONS)
+    for common, allowed in groups.items():
+        columns = sorted(common, key=str)
+        required = next((m for m in range(len(columns) + 1) if m / len(columns) >= threshold), None)
+        if required is None:
+            continue
+        members = sorted({table for pair in allowed for table in pair})
+
+        if required == 0:
+            # 阈值不大于 0：所有跨表行对都满足
+            for a, b in allowed:
+                candidates.update(((a, i), (b, j)) for i in range(len(frames[a])) for j in range(len(frames[b])))
+            continue
+
+        tables, positions, keys = [], [], []
+        if required == len(columns):
+            # 共同字段需全部相同（空值不算相同）：按取值哈希连接
+            for table in members:
+                restricted = frames[table][columns]
+                complete = np.flatnonzero(restricted.notna().all(axis=1).to_numpy())
+                hashed = pd.util.hash_pandas_object(restricted.iloc[complete].apply(_canonical_values),
+                                                    index=False).to_numpy(np.uint64)
+                tables.append(np.full(len(complete), table))
+                positions.append(complete)
+                keys.append(hashed)
+        else:
+            bands, rows = lsh_params(required / (2 * len(columns) - required), ROW_MINHASH_PERMUTATIONS)
+            for table in members:
+                tokens, valid = zip(*(_value_hashes(frames[table], column) for column in columns))
+                tokens, valid = np.column_stack(tokens), np.column_stack(valid)
+                # 共同字段全为空的行不可能匹配
+                present = np.flatnonzero(valid.any(axis=1))
+                if len(present) == 0:
+                    continue
+                signatures = minhasher.signatures(tokens[present], valid[present])
+                band_keys = lsh_band_keys(signatures, bands, rows)
+                # 不同分段的桶互不相同：桶键混入分段编号
+                band_keys = mix64(band_keys ^ mix64(np.arange(bands, dtype=np.uint64))[None, :])
+                tables.append(np.full(band_keys.size, table))
+                positions.append(np.repeat(present, bands))
+                keys.append(band_keys.ravel())
+        if tables:
+            candidates |= _bucket_pairs(np.concatenate(tables), np.concatenate(positions),
+                                        np.concatenate(keys), allowed)
+    return candidates
 
-        target_match = re.search(r"--\s*target:\s*(\w+)", sql_content, re.I)
-        if not target_match:
-            return lineage
-        target_table = target_match.group(1)
 
-        try:
-            parsed = sqlglot.parse(sql_content)
-            if not parsed:
-                return lineage
-        except Exception:
-            return _fallback_sql_parsing(sql_content, target_table)
-
-        for stmt in parsed:
-            for select in stmt.find_all(sqlglot.expressions.Select):
-                for expr in select.expressions:
-                    src_tables, src_columns = set(), set()
-                    for column in expr.find_all(sqlglot.expressions.Column):
-                        if column.table:
-                            src_tables.add(column.table)
-                        if column.name:
-                            src_columns.add(column.name)
-                    target_col = expr.alias_or_name if hasattr(expr, 'alias_or_name') else "unknown"
-
-                    for src_table in src_tables:
-                        for src_col in src_columns:
-                            src_full = f"file.{_safe_id(src_table)}.{_safe_id(src_col)}"
-                            tgt_full = f"virtual.{_safe_id(target_table)}.{_safe_id(target_col)}"
-                            lineage.setdefault(tgt_full, set()).add(src_full)
-        return lineage
-
-    except Exception as e:
-        print(f"❌ SQL 解析失败 {sql_path}: {e}")
-        return lineage
-
-
-def _fallback_sql_parsing(sql_content: str, target_table: str) -> Dict[str, Set[str]]:
-    lineage = {}
-    insert_pattern = r'INSERT\s+INTO\s+(\w+)\s+SELECT\s+(.+?)\s+FROM\s+(\w+)'
-    for m in re.finditer(insert_pattern, sql_content, re.I | re.S):
-        tgt, cols, src = m.groups()
-        for i, col in enumerate(cols.split(',')):
-            src_col = f"col_{i}"
-            src_full = f"file.{_safe_id(src)}.{_safe_id(src_col)}"
-            tgt_full = f"virtual.{_safe_id(tgt)}.{_safe_id(col.strip())}"
-            lineage.setdefault(tgt_full, set()).add(src_full)
-
-    view_pattern = r'CREATE\s+VIEW\s+(\w+)\s+AS\s+SELECT\s+(.+?)\s+FROM\s+(\w+)'
-    for m in re.finditer(view_pattern, sql_content, re.I | re.S):
-        tgt, cols, src = m.groups()
-        for col_expr in cols.split(','):
-            col_match = re.match(r'(.+?)\s+AS\s+(\w+)', col_expr, re.I)
-            if col_match:
-                src_col = col_match.group(1).strip().split()[-1]
-                tgt_col = col_match.group(2).strip()
-                src_full = f"file.{_safe_id(src)}.{_safe_id(src_col)}"
-                tgt_full = f"virtual.{_safe_id(tgt)}.{_safe_id(tgt_col)}"
-                lineage.setdefault(tgt_full, set()).add(src_full)
-    return lineage
+# ------------------------------------------------------------------
+# 批量写边
+# ------------------------------------------------------------------
+class LineageEdgeSink:
+    """
+    血缘边缓冲区：累积到 batch_size 条时以一次 UNWIND 事务写入，
+    退出 with 块时写入剩余的边
+    """
+
+    def __init__(self, graph_service: GraphService, batch_size: int = LINEAGE_BATCH_SIZE,
+                 create_missing: bool = False):
+        self.gs = graph_service
+        self.batch_size = max(1, int(batch_size))
+        self.create_missing = create_missing
+        self.pending: List[Dict[str, Any]] = []
+        self.added = 0
+        self.written = 0
+        self.batches = 0
+
+    def add(self, source: str, target: str, method: str, level: str = "column",
+            similarity: Optional[float] = None):
+        self.pending.append({"source": source, "target": target, "method": method,
+                             "level": level, "similarity": similarity})
+        self.added += 1
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        self.written += self.gs.create_lineage_edges(batch, create_missing=self.create_missing)
+        self.batches += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
 
 
 class AutoLineageService:
-    def __init__(self, graph_service: GraphService):
+    def __init__(self, graph_service: GraphService, batch_size: int = LINEAGE_BATCH_SIZE,
+                 row_store: Optional[RowStore] = None, sketch_store: Optional[SketchStore] = None,
+                 sql_cache: Optional[SqlLineageCache] = None):
         self.gs = graph_service
+        self.batch_size = batch_size
+        self.row_store = row_store or get_row_store()
+        self.sketch_store = sketch_store or get_sketch_store()
+        self.sql_cache = sql_cache or get_sql_lineage_cache()
+
+    def edge_sink(self, create_missing: bool = False) -> LineageEdgeSink:
+        return LineageEdgeSink(self.gs, self.batch_size, create_missing)
 
     # 新增缺失的方法
-    def discover_by_name(self):
-        """基于名称相似性发现血缘关系"""
+    def discover_by_name(self, threshold: float = NAME_MATCH_THRESHOLD, top_k: int = NAME_MATCH_TOP_K,
+                         id_prefix: str = "file."):
+        """基于名称相似性发现血缘关系：一次读出全部列名，字符 trigram TF-IDF 余弦相似度匹配"""
         print("🔍 开始基于名称相似性的血缘发现...")
         try:
-            with self.gs.driver.session() as session:
-                # 查找名称相似的列
-                result = session.run("""
-                    MATCH (c1:Column), (c2:Column)
-                    WHERE c1.id < c2.id 
-                    AND c1.name =~ '(?i).*' + replace(c2.name, '_', '.*') + '.*'
-                    AND c1.id STARTS WITH 'file.' AND c2.id STARTS WITH 'file.'
-                    MERGE (c1)-[:DERIVED_FROM {method: 'name_similarity', level: 'column'}]->(c2)
-                    MERGE (c1)-[:LINEAGE {type: 'DERIVED_FROM', level: 'column'}]->(c2)
-                    RETURN count(*) as relationships_created
-                """)
-                count = result.single()["relationships_created"]
-                print(f"✅ 基于名称相似性发现 {count} 个血缘关系")
+            columns = sorted(self.gs.list_assets("column", id_prefix=id_prefix), key=lambda c: c["id"])
+            tables = [c["id"].rsplit(".", 1)[0] for c in columns]
+            # 同一张表内的列不构成血缘
+            matches = NameMatcher(threshold, top_k).fit([c["name"] for c in columns]).match(tables) if columns else []
+            with self.edge_sink() as sink:
+                for i, j, score in matches:
+                    sink.add(columns[i]["id"], columns[j]["id"], "name_similarity", similarity=round(score, 4))
+            print(f"✅ 基于名称相似性发现 {sink.written} 个血缘关系（{len(columns)} 列，{len(matches)} 个相似名称对）")
         except Exception as e:
             print(f"❌ 基于名称相似性的血缘发现失败: {e}")
 
-    def discover_by_fk(self, csv_root: Path):
-        """基于外键关系发现血缘关系"""
+    def discover_by_fk(self, csv_root: Path, min_coverage: float = FK_MIN_COVERAGE):
+        """
+        基于外键（包含依赖）发现血缘关系：读取行样本存储中各表（CSV、Excel、SQLite 等）的样本值，
+        csv_root 仅为接口兼容保留。样本中无空值、无重复的列为唯一键候选；按类型（整数/字符串取值域）、
+        基数（外键列不同值数不超过键表行数）与取值范围剪枝后，
+        覆盖率 = 共有取值数 / 外键列不同值数，再除以键列样本占键表行数的比例
+        （键表只抽样部分行时，真实外键的取值也只有同样比例能在键样本中找到）。
+        覆盖率不低于 min_coverage 时写入 键列 -> 外键列 的边，similarity 为覆盖率
+        """
         print("🔍 开始基于外键关系的血缘发现...")
         try:
-            # 这里可以添加具体的外键发现逻辑
-            # 例如分析CSV文件中的数据关系
+            row_counts = {asset["id"]: asset.get("row_count") for asset_type in ("file", "sheet", "table")
+                          for asset in self.gs.list_assets(asset_type)}
+            column_ids, tables, hashes, integer, lows, highs, unique, population = [], [], [], [], [], [], [], []
+            for table_id, frame in self.row_store.iter_tables():
+                values = frame.drop(columns=REFERENCE_COLUMNS)
+                for column in values.columns:
+                    profile = _key_values(values[column])
+                    if profile is None or len(profile[0]) < FK_MIN_DISTINCT:
+                        continue
+                    column_ids.append(f"{table_id}.{_safe_id(column)}")
+                    tables.append(table_id)
+                    hashes.append(profile[0])
+                    integer.append(profile[1])
+                    lows.append(profile[2])
+                    highs.append(profile[3])
+                    unique.append(len(profile[0]) == len(values))
+                    population.append(max(row_counts.get(table_id) or 0, len(values)))
+
+            keys = np.flatnonzero(unique)
             count = 0
+            if len(keys) and len(column_ids) > 1:
+                tables, integer = np.array(tables, dtype=object), np.array(integer)
+                lows, highs, population = np.array(lows), np.array(highs), np.array(population)
+                distinct = np.array([len(hashed) for hashed in hashes])
+                columns, key_columns, shared = _shared_value_counts(hashes, keys)
+                candidates = len(columns)
+
+                # 键列样本占键表行数的比例，以及外键列在键样本中的期望命中数
+                fraction = distinct[key_columns] / population[key_columns]
+                expected = distinct[columns] * fraction
+                complete = fraction >= 1
+                # 键表全量采样时键列范围即真实范围，外键取值须落在其中
+                in_range = ~integer[columns] | ~complete | (
+                    (lows[columns] >= lows[key_columns]) & (highs[columns] <= highs[key_columns]))
+                keep = ((tables[columns] != tables[key_columns]) & (distinct[columns] <= population[key_columns])
+                        & in_range & (expected >= FK_MIN_DISTINCT))
+                columns, key_columns = columns[keep], key_columns[keep]
+                coverage = np.minimum(shared[keep] / expected[keep], 1.0)
+                keep = coverage >= min_coverage
+                columns, key_columns, coverage = columns[keep], key_columns[keep], coverage[keep]
+
+                # 每列最多引用一个键：覆盖率最高者优先，其次取行数最少（最紧的超集）的键表，
+                # 避免 1..N 的自增主键因包含所有小整数而被各个整数列引用
+                order = np.lexsort((key_columns, population[key_columns], -coverage, columns))
+                columns, key_columns, coverage = columns[order], key_columns[order], coverage[order]
+                first = np.r_[True, columns[1:] != columns[:-1]]
+                columns, key_columns, coverage = columns[first], key_columns[first], coverage[first]
+
+                # 两个唯一键列互相包含（一对一）时只保留一个方向：行数较多的表作为被引用方
+                size = len(column_ids)
+                mutual = np.isin(key_columns * size + columns, columns * size + key_columns)
+                reversed_ = (population[columns] > population[key_columns]) | (
+                    (population[columns] == population[key_columns]) & (columns < key_columns))
+                keep = ~(mutual & reversed_)
+                with self.edge_sink() as sink:
+                    for key, column, score in zip(key_columns[keep].tolist(), columns[keep].tolist(),
+                                                  coverage[keep].tolist()):
+                        sink.add(column_ids[key], column_ids[column], "foreign_key", similarity=round(score, 4))
+                count = sink.written
+                print(f"   {len(column_ids)} 列样本，{len(keys)} 个唯一键候选，{candidates} 个共有取值的列对")
             print(f"✅ 基于外键关系发现 {count} 个血缘关系")
         except Exception as e:
             print(f"❌ 基于外键关系的血缘发现失败: {e}")
 
-    def discover_by_fingerprint(self, csv_root: Path):
-        """基于数据指纹发现血缘关系"""
+    def discover_by_fingerprint(self, csv_root: Path, threshold: float = FINGERPRINT_THRESHOLD):
+        """
+        基于数据指纹发现血缘关系：只读取采集时写入列摘要存储的摘要（csv_root 仅为接口兼容保留）。
+        MinHash 签名经 LSH 分段得到候选列对，按签名估计去重取值集合的 Jaccard，
+        并要求值长度/数值分布直方图相近（排除取值集合偶然重合的低区分度列）；
+        不同值较多的列作为来源，另一列视为由其复制/派生
+        """
         print("🔍 开始基于数据指纹的血缘发现...")
         try:
-            # 这里可以添加数据指纹分析逻辑
+            sketches = self.sketch_store.load(FINGERPRINT_MIN_DISTINCT)
+            column_ids, table_ids, distinct = sketches["column_ids"], sketches["table_ids"], sketches["distinct"]
             count = 0
+            if len(column_ids) > 1:
+                signatures = sketches["signatures"]
+                pairs = _lsh_pairs(lsh_band_keys(signatures, *lsh_params(threshold, signatures.shape[1])),
+                                   FINGERPRINT_MAX_BUCKET)
+                left, right = pairs[:, 0], pairs[:, 1]
+                cross = table_ids[left] != table_ids[right]
+                left, right = left[cross], right[cross]
+
+                jaccard = (signatures[left] == signatures[right]).mean(axis=1)
+                similarity = _histogram_similarity(sketches["length_histograms"][left],
+                                                   sketches["length_histograms"][right])
+                # 两列都以数值为主时再比较数量级分布
+                numeric_share = sketches["numeric_histograms"].sum(axis=1) / \
+                    np.maximum(sketches["length_histograms"].sum(axis=1), 1)
+                numeric = (numeric_share[left] >= 0.5) & (numeric_share[right] >= 0.5)
+                similarity = np.where(numeric, np.minimum(similarity, _histogram_similarity(
+                    sketches["numeric_histograms"][left], sketches["numeric_histograms"][right])), similarity)
+                keep = (jaccard >= threshold) & (similarity >= FINGERPRINT_HISTOGRAM_SIMILARITY)
+                left, right, jaccard = left[keep], right[keep], jaccard[keep]
+
+                with self.edge_sink() as sink:
+                    for i, j, score in zip(left.tolist(), right.tolist(), jaccard.tolist()):
+                        # 不同值数为 HyperLogLog 估计
+                        source, target = (j, i) if distinct[j] > distinct[i] else (i, j)
+                        sink.add(column_ids[source], column_ids[target], "fingerprint", similarity=round(score, 4))
+                count = sink.written
+                print(f"   {len(column_ids)} 列摘要，{len(pairs)} 个 LSH 候选列对")
             print(f"✅ 基于数据指纹发现 {count} 个血缘关系")
         except Exception as e:
             print(f"❌ 基于数据指纹的血缘发现失败: {e}")
@@ -175,92 +435,62 @@ class AutoLineageService:
                 print(f"❌ SQL目录不存在: {sql_dir}")
                 return
 
-            sql_files = list(sql_dir.glob("*.sql"))
+            sql_files = sorted(sql_dir.glob("*.sql"))
             if not sql_files:
                 print("ℹ️ 未找到SQL文件")
                 return
 
-            relationships_created = 0
-            for sql_file in sql_files:
-                try:
-                    lineage = parse_sql_column_lineage(sql_file)
-                    with self.gs.driver.session() as session:
-                        for target, sources in lineage.items():
-                            for source in sources:
-                                session.run("""
-                                    MERGE (src:DataAsset {id: $source_id})
-                                    MERGE (tgt:DataAsset {id: $target_id})
-                                    MERGE (src)-[:DERIVED_FROM {method: 'sql_parsing', level: 'column'}]->(tgt)
-                                    MERGE (src)-[:LINEAGE {type: 'DERIVED_FROM', level: 'column'}]->(tgt)
-                                """, source_id=source, target_id=target)
-                                relationships_created += 1
-                except Exception as e:
-                    print(f"❌ 处理SQL文件 {sql_file} 失败: {e}")
-
+            # 内容未变化的文件直接使用解析缓存，其余在进程池中并行解析
+            results, parsed = parse_sql_files(sql_files, self.sql_cache)
+            # SQL 中的目标表可能尚未采集，缺失节点按需创建
+            with self.edge_sink(create_missing=True) as sink:
+                for lineage in results.values():
+                    for target, sources in lineage.items():
+                        for source in sources:
+                            sink.add(source, target, "sql_parsing")
+            relationships_created = sink.added
+
+            print(f"   重新解析 {parsed} 个SQL文件，其余命中解析缓存")
             print(f"✅ 基于SQL解析发现 {relationships_created} 个血缘关系，处理了 {len(sql_files)} 个SQL文件")
         except Exception as e:
             print(f"❌ 基于SQL解析的血缘发现失败: {e}")
 
     # 新增：行级数据相似性分析
     def discover_row_similarity(self, csv_root: Path, similarity_threshold: float = 0.8):
-        """基于行数据相似性发现行级血缘关系"""
+        """
+        基于行数据相似性发现行级血缘关系：只比较来自不同表的行。
+        候选行对由 _row_similarity_candidates 分块得到（近线性），再按 _calculate_row_similarity 精确校验
+        """
         print("🔍 开始行级数据相似性分析...")
 
-        all_rows = {}
-        with self.gs.driver.session() as session:
-            # 收集所有行数据
-            result = session.run("""
-                MATCH (r:DataAsset {type: 'row'})
-                WHERE r.id STARTS WITH 'file.' AND r.row_data IS NOT NULL
-                RETURN r.id as row_id, r.row_data as row_data, r.table_id as table_id
-            """)
-
-            for record in result:
-                row_data = record["row_data"]
-                if isinstance(row_data, str):
-                    try:
-                        row_data = json.loads(row_data)
-                    except:
-                        continue
+        # 从行样本存储按表读取样本行
+        row_ids: List[List[str]] = []
+        frames: List[pd.DataFrame] = []
+        for table_id, frame in self.row_store.iter_tables("file."):
+            values = frame.drop(columns=REFERENCE_COLUMNS)
+            frames.append(values.astype(object).where(values.notna(), None))
+            row_ids.append(frame["row_id"].tolist())
 
-                all_rows[record["row_id"]] = {
-                    "data": row_data,
-                    "table": record["table_id"]
-                }
+        candidates = _row_similarity_candidates(frames, similarity_threshold)
+        records: Dict[int, List[Dict[str, Any]]] = {}
 
-        # 计算行间相似度
+        def row_data(table: int, position: int) -> Dict[str, Any]:
+            if table not in records:
+                records[table] = frames[table].to_dict("records")
+            return records[table][position]
+
+        # 按表、行的顺序写边，方向与原先的逐对扫描一致
         matches = 0
-        row_ids = list(all_rows.keys())
-
-        with self.gs.driver.session() as session:
-            for i in range(len(row_ids)):
-                for j in range(i + 1, len(row_ids)):
-                    row1_id = row_ids[i]
-                    row2_id = row_ids[j]
-
-                    row1_data = all_rows[row1_id]["data"]
-                    row2_data = all_rows[row2_id]["data"]
-
-                    similarity = self._calculate_row_similarity(row1_data, row2_data)
-
-                    if similarity >= similarity_threshold:
-                        # 创建行级血缘关系
-                        session.run("""
-                            MATCH (r1:DataAsset {id: $row1_id}), (r2:DataAsset {id: $row2_id})
-                            MERGE (r1)-[:DERIVED_FROM {
-                                method: 'row_similarity', 
-                                similarity: $similarity,
-                                level: 'row'
-                            }]->(r2)
-                            MERGE (r1)-[:LINEAGE {
-                                type: 'DERIVED_FROM',
-                                level: 'row',
-                                similarity: $similarity
-                            }]->(r2)
-                        """, row1_id=row1_id, row2_id=row2_id, similarity=similarity)
-                        matches += 1
-
-        print(f"✅ 行级相似性分析完成，发现 {matches} 个行级匹配")
+        with self.edge_sink() as sink:
+            for left, right in sorted(candidates):
+                similarity = self._calculate_row_similarity(row_data(*left), row_data(*right))
+                if similarity >= similarity_threshold:
+                    # 创建行级血缘关系
+                    sink.add(row_ids[left[0]][left[1]], row_ids[right[0]][right[1]], "row_similarity",
+                             level="row", similarity=similarity)
+                    matches += 1
+
+        print(f"✅ 行级相似性分析完成，{len(candidates)} 个候选行对，发现 {matches} 个行级匹配")
 
     def _calculate_row_similarity(self, row1: Dict, row2: Dict) -> float:
         """计算两行数据的相似度"""
@@ -273,7 +503,8 @@ class AutoLineageService:
 
         matches = 0
         for key in common_keys:
-            if row1.get(key) == row2.get(key):
+            # 空值不算作相同
+            if row1.get(key) is not None and row1.get(key) == row2.get(key):
                 matches += 1
 
         return matches / len(common_keys)
@@ -299,19 +530,14 @@ class AutoLineageService:
     def _analyze_discount_derivation(self, csv_root: Path) -> int:
         """分析折扣率推导关系"""
         relationships = 0
-        with self.gs.driver.session() as session:
-            # 查找包含价格和折扣的列
-            result = session.run("""
-                MATCH (c:Column) 
-                WHERE c.name =~ '(?i).*折扣.*|.*discount.*|.*率.*'
-                RETURN c.id as col_id, c.name as col_name
-            """)
-
-            for record in result:
-                col_id = record["col_id"]
-                # 这里可以添加具体的折扣推导逻辑
-                # 例如：折扣率 = (原价-促销价)/原价
-                pass
+        # 查找包含价格和折扣的列
+        pattern = re.compile(r"(?i).*折扣.*|.*discount.*|.*率.*")
+        for record in self.gs.list_assets("column"):
+            if not pattern.fullmatch(record.get("name") or ""):
+                continue
+            col_id = record["id"]
+            # 这里可以添加具体的折扣推导逻辑
+            # 例如：折扣率 = (原价-促销价)/原价
 
         return relationships
 
@@ -343,8 +569,20 @@ class AutoLineageService:
         self.discover_row_similarity(csv_root)
         self.discover_promotion_lineage(csv_root)
 
+        # 发现过程直接写图，需要使读缓存失效
+        self.gs.invalidate_cache()
+        self.refresh_reachability_index()
+
         print("🎉 全面血缘发现完成（包含行级分析）")
 
+    def refresh_reachability_index(self):
+        """血缘发现后重建本地可达性索引，供影响分析使用"""
+        try:
+            index = rebuild_reachability_index(self.gs)
+            print(f"✅ 可达性索引已刷新: {len(index.node_ids)} 个节点")
+        except Exception as e:
+            print(f"❌ 可达性索引刷新失败: {e}")
+
 
 # ------------------------------------------------------------------
 # 向后兼容导出
@@ -359,23 +597,16 @@ def discover_lineage_auto(graph_service: GraphService, csv_root: str, sql_dir: s
 
 
 def get_lineage_graph_for_frontend() -> list:
-    gs = GraphService("bolt://localhost:7687", "neo4j", "password")
-    with gs.driver.session() as session:
-        nodes = session.run("""
-            MATCH (c:Column)
-            RETURN c.id as id, c.name as label, 'column' as group
-            LIMIT 100
-        """).data()
-        edges = session.run("""
-            MATCH (src:Column)-[r:LINEAGE]->(dst:Column)
-            RETURN src.id as from, dst.id as to, r.type as method
-            LIMIT 200
-        """).data()
-    gs.close()
+    gs = GraphService()
+    nodes = gs.list_assets("column", limit=100)
+    edges = gs.list_relationships(["DERIVED_FROM"], asset_type="column", limit=200)
 
     result = []
     for node in nodes:
-        result.append({"id": node["id"], "label": node["label"], "group": node["group"], "type": "node"})
+        result.append({"id": node["id"], "label": node["name"], "group": "column", "type": "node"})
     for edge in edges:
-        result.append({"from": edge["from"], "to": edge["to"], "method": edge.get("method", "unknown"), "type": "edge"})
+        props = edge["props"]
+        result.append({"from": edge["source"], "to": edge["target"],
+                       "method": props.get("method", "unknown"), "level": props.get("level"),
+                       "similarity": props.get("similarity"), "type": "edge"})
     return result
\ No newline at end of file
@@ -0,0 +1,389 @@
+# backend/services/memory_backend.py
+"""
+进程内内存图后端：邻接表 + id 哈希索引 + 类型索引，
+用于无 Neo4j 环境下运行采集/发现/API，以及算法基准测试。
+多个进程（采集脚本、API）可共享同一个快照文件：读写前发现快照被其他进程改写时重新加载，
+并在其上重放本进程尚未落盘的写操作；落盘在文件锁内完成，不会覆盖其他进程已写入的数据
+"""
+import functools
+import logging
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from backend.services.graph_backend import GraphBackend
+from backend.services.query_cache import touch_graph_version
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _freeze(props: Dict[str, Any], keys: Optional[List[str]] = None) -> tuple:
+    """关系属性转为可哈希键，keys（缺省为全部属性）相同的关系视为同一条"""
+    items = props.items() if keys is None else ((k, props[k]) for k in keys if k in props)
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in items))
+
+
+@contextmanager
+def _snapshot_lock(snapshot_path: Path):
+    """跨进程的快照文件排他锁（快照旁的 .lock 文件）"""
+    lock_path = snapshot_path.with_suffix(snapshot_path.suffix + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK 重试约 10 秒后仍未取得锁时抛出，继续等待
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _journaled(method):
+    """写操作：先同步快照，再记入日志（快照被其他进程改写时据此重放）并执行"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self._refresh()
+            if self.snapshot_path:
+                self._journal.append((method, args, kwargs))
+            self._dirty = True
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _fresh(method):
+    """读操作：快照被其他进程改写后先重新加载"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self._refresh()
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class MemoryGraphBackend(GraphBackend):
+    name = "memory"
+
+    def __init__(self, snapshot_path: Optional[Path] = None):
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._lock = threading.RLock()
+        self._dirty = False
+        # 上次加载/写入时快照文件的 (修改时间, 大小, inode)，以及此后尚未落盘的写操作
+        self._stamp: Optional[tuple] = None
+        self._journal: List[tuple] = []
+        # id -> 属性；id -> 标签集合
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.labels: Dict[str, Set[str]] = {}
+        # 类型 -> id 集合
+        self.by_type: Dict[str, Set[str]] = {}
+        # 邻接表：节点 -> {(邻居, 关系类型, 冻结属性): 属性}
+        self.out_edges: Dict[str, Dict[tuple, Dict[str, Any]]] = {}
+        self.in_edges: Dict[str, Dict[tuple, Dict[str, Any]]] = {}
+        self._load()
+
+    # ------------------------------------------------------------------
+    # 快照持久化
+    # ------------------------------------------------------------------
+    def _snapshot_stamp(self) -> Optional[tuple]:
+        try:
+            stat = self.snapshot_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _load(self):
+        if not self.snapshot_path:
+            return
+        self._stamp = self._snapshot_stamp()
+        self.nodes, self.labels, self.out_edges = {}, {}, {}
+        if self._stamp is not None:
+            try:
+                with open(self.snapshot_path, "rb") as f:
+                    state = pickle.load(f)
+                self.nodes, self.labels, self.out_edges = state["nodes"], state["labels"], state["out_edges"]
+                logging.info(f"已加载内存图快照 {self.snapshot_path}: {len(self.nodes)} 个节点")
+            except Exception as e:
+                logging.warning(f"内存图快照加载失败 {self.snapshot_path}: {e}")
+        self._rebuild_indexes()
+
+    def _refresh(self):
+        """快照文件自上次加载/写入后被其他进程改写时重新加载，并重放本进程尚未落盘的写操作"""
+        if not self.snapshot_path or self._snapshot_stamp() == self._stamp:
+            return
+        self._load()
+        for method, args, kwargs in self._journal:
+            method(self, *args, **kwargs)
+
+    def _rebuild_indexes(self):
+        self.by_type, self.in_edges = {}, {}
+        for node_id, props in self.nodes.items():
+            self.by_type.setdefault(props.get("type"), set()).add(node_id)
+        for source, edges in self.out_edges.items():
+            for (target, rel_type, frozen), props in edges.items():
+                self.in_edges.setdefault(target, {})[(source, rel_type, frozen)] = props
+
+    def flush(self):
+        """在文件锁内合并其他进程的改动后写入快照（先写临时文件再原子替换）"""
+        if not self.snapshot_path or not self._dirty:
+            return
+        with self._lock, _snapshot_lock(self.snapshot_path):
+            self._refresh()
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"nodes": self.nodes, "labels": self.labels, "out_edges": self.out_edges}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.snapshot_path)
+            self._stamp = self._snapshot_stamp()
+            self._journal = []
+            self._dirty = False
+        # 快照落盘后其他进程才能读到本进程的写入，再次通知其读缓存失效
+        touch_graph_version()
+
+    # ------------------------------------------------------------------
+    # 写操作
+    # ------------------------------------------------------------------
+    def _merge_node(self, node_id: str, props: Dict[str, Any], label: Optional[str] = None):
+        node = self.nodes.get(node_id)
+        if node is None:
+            node = self.nodes[node_id] = {"id": node_id}
+            self.labels[node_id] = {"DataAsset"}
+        old_type = node.get("type")
+        for key, value in props.items():
+            # 与 Cypher 的 SET a += map 一致：null 值删除属性
+            if value is None:
+                node.pop(key, None)
+            else:
+                node[key] = value
+        if node.get("type") != old_type:
+            self.by_type.get(old_type, set()).discard(node_id)
+        self.by_type.setdefault(node.get("type"), set()).add(node_id)
+        if label:
+            self.labels[node_id].add(label)
+
+    @_journaled
+    def merge_assets(self, label: Optional[str], rows: List[Dict[str, Any]]):
+        with self._lock:
+            for row in rows:
+                self._merge_node(row["id"], row, label)
+            self._dirty = True
+
+    @_journaled
+    def merge_asset_columns(self, label: Optional[str], columns: Dict[str, List[Any]], shared: Dict[str, Any]):
+        keys = list(columns)
+        with self._lock:
+            for values in zip(*columns.values()):
+                props = dict(shared)
+                props.update(zip(keys, values))
+                self._merge_node(props["id"], props, label)
+            self._dirty = True
+
+    @_journaled
+    def merge_relationships(self, rel_type: str, rows: List[Dict[str, Any]], create_missing: bool = False,
+                            merge_keys: Optional[List[str]] = None) -> int:
+        merged = 0
+        with self._lock:
+            for row in rows:
+                source, target = row["source"], row["target"]
+                if source not in self.nodes or target not in self.nodes:
+                    if not create_missing:
+                        continue
+                    for node_id in (source, target):
+                        if node_id not in self.nodes:
+                            self._merge_node(node_id, {})
+                self._merge_edge(source, target, rel_type, row["props"], merge_keys)
+                merged += 1
+            self._dirty = True
+        return merged
+
+    def _merge_edge(self, source: str, target: str, rel_type: str, props: Dict[str, Any],
+                    merge_keys: Optional[List[str]] = None) -> bool:
+        """合并一条关系，出/入邻接表共享同一个属性字典；返回是否新建"""
+        key = (target, rel_type, _freeze(props, merge_keys))
+        existing = self.out_edges.setdefault(source, {}).get(key)
+        if existing is not None:
+            existing.update(props)
+            return False
+        props = dict(props)
+        self.out_edges[source][key] = props
+        self.in_edges.setdefault(target, {})[(source, rel_type, key[2])] = props
+        return True
+
+    @_journaled
+    def compact_lineage(self, batch_size: int = 10000) -> Dict[str, int]:
+        stats = {"lineage_removed": 0, "lineage_converted": 0, "deduplicated": 0}
+        with self._lock:
+            old_edges, self.out_edges, self.in_edges = self.out_edges, {}, {}
+            for source, edges in old_edges.items():
+                derived = [(target, props) for (target, rel_type, _), props in edges.items()
+                           if rel_type == "DERIVED_FROM"]
+                lineage = [(target, props) for (target, rel_type, _), props in edges.items()
+                           if rel_type == "LINEAGE"]
+                # 相似度高的先写入，同一 method 的重复关系被合并掉
+                derived.sort(key=lambda item: item[1].get("similarity") or 0, reverse=True)
+                for target, props in derived:
+                    key = (target, "DERIVED_FROM", _freeze(props, ["method", "relationship"]))
+                    if key in self.out_edges.get(source, {}):
+                        stats["deduplicated"] += 1
+                        continue
+                    self._merge_edge(source, target, "DERIVED_FROM", props, ["method", "relationship"])
+                derived_targets = {target for target, _ in derived}
+                for target, props in lineage:
+                    if props.get("type") == "DERIVED_FROM":
+                        if target in derived_targets:
+                            stats["lineage_removed"] += 1
+                            continue
+                        converted = {"method": props.get("method") or "unknown",
+                                     **{k: props[k] for k in ("level", "similarity") if props.get(k) is not None}}
+                    else:
+                        converted = {"method": "manual", "relationship": props.get("type") or "LINEAGE"}
+                    self._merge_edge(source, target, "DERIVED_FROM", converted, ["method", "relationship"])
+                    stats["lineage_converted"] += 1
+                for (target, rel_type, _), props in edges.items():
+                    if rel_type not in ("DERIVED_FROM", "LINEAGE"):
+                        self._merge_edge(source, target, rel_type, props)
+            self._dirty = True
+        return stats
+
+    @_journaled
+    def delete_assets_by_prefix(self, id_prefix: str) -> int:
+        with self._lock:
+            doomed = [node_id for node_id in self.nodes
+                      if node_id == id_prefix or node_id.startswith(id_prefix + ".")]
+            for node_id in doomed:
+                for (other, rel_type, frozen) in self.out_edges.pop(node_id, {}):
+                    self.in_edges.get(other, {}).pop((node_id, rel_type, frozen), None)
+                for (other, rel_type, frozen) in self.in_edges.pop(node_id, {}):
+                    self.out_edges.get(other, {}).pop((node_id, rel_type, frozen), None)
+                self.by_type.get(self.nodes[node_id].get("type"), set()).discard(node_id)
+                del self.nodes[node_id]
+                self.labels.pop(node_id, None)
+            if doomed:
+                self._dirty = True
+            return len(doomed)
+
+    @_journaled
+    def clear(self):
+        with self._lock:
+            self.nodes, self.labels, self.by_type = {}, {}, {}
+            self.out_edges, self.in_edges = {}, {}
+            self._dirty = True
+
+    # ------------------------------------------------------------------
+    # 读操作（与写操作互斥，避免并发请求遍历时字典被修改）
+    # ------------------------------------------------------------------
+    @_fresh
+    def get_asset(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            node = self.nodes.get(asset_id)
+            return dict(node) if node is not None else None
+
+    @_fresh
+    def search_assets(self, query: str, asset_type: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            candidates = self.by_type.get(asset_type, set()) if asset_type else self.nodes.keys()
+            results = []
+            for node_id in candidates:
+                node = self.nodes[node_id]
+                if query in (node.get("name") or "") or query in (node.get("description") or ""):
+                    results.append(dict(node))
+                    if len(results) >= limit:
+                        break
+            return results
+
+    @_fresh
+    def list_assets(self, asset_type: str = None, id_prefix: str = None,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            candidates = self.by_type.get(asset_type, set()) if asset_type else self.nodes.keys()
+            results = []
+            for node_id in candidates:
+                if id_prefix and not node_id.startswith(id_prefix):
+                    continue
+                results.append(dict(self.nodes[node_id]))
+                if limit is not None and len(results) >= limit:
+                    break
+            return results
+
+    @_fresh
+    def expand_lineage(self, frontier: List[str], direction: str, rel_types: List[str],
+                       limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            adjacency = self.out_edges if direction == "down" else self.in_edges
+            allowed = set(rel_types)
+            records, seen = [], set()
+            for node_id in frontier:
+                for (other, rel_type, _), props in adjacency.get(node_id, {}).items():
+                    if rel_type not in allowed:
+                        continue
+                    source, target = (node_id, other) if direction == "down" else (other, node_id)
+                    neighbour = self.nodes[other]
+                    record = (source, target, rel_type, props.get("method"))
+                    if record in seen:
+                        continue
+                    seen.add(record)
+                    records.append({
+                        "source": source, "target": target, "relationship": rel_type, "method": props.get("method"),
+                        "level": props.get("level"), "similarity": props.get("similarity"),
+                        "id": other, "name": neighbour.get("name"), "type": neighbour.get("type")
+                    })
+                    if len(records) >= limit:
+                        return records
+            return records
+
+    @_fresh
+    def lineage_pairs(self, rel_types: List[str]) -> List[Tuple[str, str]]:
+        with self._lock:
+            allowed = set(rel_types)
+            pairs = set()
+            for source, edges in self.out_edges.items():
+                for target, rel_type, _ in edges:
+                    if rel_type in allowed:
+                        pairs.add((source, target))
+            return list(pairs)
+
+    @_fresh
+    def list_relationships(self, rel_types: List[str], asset_type: str = None,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            allowed = set(rel_types)
+            results = []
+            for source, edges in self.out_edges.items():
+                if asset_type and self.nodes[source].get("type") != asset_type:
+                    continue
+                for (target, rel_type, _), props in edges.items():
+                    if rel_type not in allowed or (asset_type and self.nodes[target].get("type") != asset_type):
+                        continue
+                    results.append({"source": source, "target": target, "relationship": rel_type, "props": dict(props)})
+                    if limit is not None and len(results) >= limit:
+                        return results
+            return results
+
+    @_fresh
+    def count_assets_by_type(self) -> Dict[str, int]:
+        with self._lock:
+            return {asset_type: len(ids) for asset_type, ids in self.by_type.items() if ids}
+
+    @_fresh
+    def count_relationships(self, rel_type: str) -> int:
+        with self._lock:
+            return sum(1 for edges in self.out_edges.values() for _, t, _ in edges if t == rel_type)
@@ -0,0 +1,170 @@
+# backend/services/name_matcher.py
+"""
+列名相似性匹配：名称规范化后切分为字符 n-gram，构建 TF-IDF 稀疏矩阵（即 gram 倒排索引），
+只对共享 gram 的名称对计算余弦相似度，按阈值与每列 top-k 取匹配
+"""
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # 可选依赖：未安装时中文按单字切分
+    lazy_pinyin = None
+    logging.warning("未安装 pypinyin，中文列名按单字切分，无法与拼音命名的列名匹配（pip install pypinyin）")
+
+CJK_PATTERN = re.compile(r"[一-鿿]+")
+CAMEL_PATTERN = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+SEPARATOR_PATTERN = re.compile(r"[^0-9a-z一-鿿]+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    规范化列名：全角转半角、拆分驼峰、去掉 _col 后缀、分隔符统一为空格；
+    中文转为空格分隔的拼音（未安装 pypinyin 时为空格分隔的单字）
+    """
+    text = unicodedata.normalize("NFKC", str(name))
+    text = CAMEL_PATTERN.sub(" ", text).lower().replace("_col", "")
+    if lazy_pinyin is not None:
+        text = CJK_PATTERN.sub(lambda m: " " + " ".join(lazy_pinyin(m.group())) + " ", text)
+    else:
+        text = CJK_PATTERN.sub(lambda m: " " + " ".join(m.group()) + " ", text)
+    return " ".join(SEPARATOR_PATTERN.sub(" ", text).split())
+
+
+def char_ngrams(text: str, n: int = 3) -> List[str]:
+    """两端补空格后的字符 n-gram"""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return [padded]
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+class NameMatcher:
+    """
+    fit(names) 后 match() 返回 (i, j, 相似度)，i < j，相似度为 TF-IDF 向量的余弦。
+    规范化后相同的名称（各表中的 id、name 等）只向量化一次，相互之间相似度为 1。
+    候选对用前缀过滤生成：每个名称的 gram 按文档频率从低到高排列，只索引最短的前缀，
+    使其余 gram 的权重范数小于阈值 —— 余弦不低于阈值的两个名称必然在双方前缀中共享一个 gram，
+    因此不会漏掉匹配，而 "id " 之类的高频 gram 很少进入前缀，不会产生大量候选
+    """
+
+    def __init__(self, threshold: float = 0.7, top_k: int = 5, ngram: int = 3, block_size: int = 2000):
+        self.threshold = threshold
+        self.top_k = top_k
+        self.ngram = ngram
+        self.block_size = block_size
+        self.groups: Optional[np.ndarray] = None
+        self.matrix: Optional[sparse.csr_matrix] = None
+        self.prefix_matrix: Optional[sparse.csr_matrix] = None
+
+    def fit(self, names: List[str]) -> "NameMatcher":
+        normalized = [normalize_name(name) for name in names]
+        uniques: Dict[str, int] = {}
+        self.groups = np.array([uniques.setdefault(name, len(uniques)) for name in normalized], dtype=np.int64)
+
+        vocabulary: Dict[str, int] = {}
+        indptr, indices = [0], []
+        for name in uniques:
+            for gram in char_ngrams(name, self.ngram):
+                indices.append(vocabulary.setdefault(gram, len(vocabulary)))
+            indptr.append(len(indices))
+
+        counts = sparse.csr_matrix((np.ones(len(indices)), indices, indptr),
+                                   shape=(len(uniques), len(vocabulary)))
+        counts.sum_duplicates()
+        document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = np.log((1 + len(uniques)) / (1 + document_frequency)) + 1
+        matrix = counts.multiply(idf).tocsr()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+        norms[norms == 0] = 1
+        self.matrix = (sparse.diags(1 / norms) @ matrix).tocsr()
+        self.prefix_matrix = self._prefix_matrix(self.matrix, document_frequency)
+        return self
+
+    def _prefix_matrix(self, matrix: sparse.csr_matrix, document_frequency: np.ndarray) -> sparse.csr_matrix:
+        """每行按全局顺序（文档频率升序）保留前缀 gram，值为 1"""
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        order = np.lexsort((matrix.indices, document_frequency[matrix.indices], rows))
+        rows, grams = rows[order], matrix.indices[order]
+        squares = matrix.data[order] ** 2
+        # 从当前 gram 到行尾的权重平方和，不低于阈值平方的 gram 属于前缀
+        cumulative = np.cumsum(squares)
+        row_end = np.zeros(matrix.shape[0])
+        nonempty = np.diff(matrix.indptr) > 0
+        row_end[nonempty] = cumulative[matrix.indptr[1:][nonempty] - 1]
+        suffix = row_end[rows] - cumulative + squares
+        keep = suffix >= self.threshold ** 2 - 1e-9
+        return sparse.csr_matrix((np.ones(int(keep.sum())), (rows[keep], grams[keep])), shape=matrix.shape)
+
+    def _match_unique(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """不同名称之间的匹配：每个名称相似度不低于阈值的其他名称，按 (名称, 相似度降序) 排列"""
+        size = self.matrix.shape[0]
+        transposed = self.prefix_matrix.T.tocsc()
+        matched_rows, matched_cols, matched_scores = [], [], []
+
+        for start in range(0, size, self.block_size):
+            block = (self.prefix_matrix[start:start + self.block_size] @ transposed).tocoo()
+            rows, cols = block.row + start, block.col
+            # 候选矩阵对称，只计算 rows < cols 的一半，结果再双向展开
+            keep = rows < cols
+            rows, cols = rows[keep], cols[keep]
+            if len(rows) == 0:
+                continue
+            # 候选对上的完整余弦相似度
+            scores = np.asarray(self.matrix[rows].multiply(self.matrix[cols]).sum(axis=1)).ravel()
+            keep = scores >= self.threshold - 1e-9
+            rows, cols, scores = rows[keep], cols[keep], np.minimum(scores[keep], 1.0)
+            matched_rows += [rows, cols]
+            matched_cols += [cols, rows]
+            matched_scores += [scores, scores]
+
+        if not matched_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        rows, cols, scores = (np.concatenate(parts) for parts in (matched_rows, matched_cols, matched_scores))
+        order = np.lexsort((cols, -scores, rows))
+        return rows[order], cols[order], scores[order]
+
+    def match(self, partitions: Optional[List] = None) -> List[Tuple[int, int, float]]:
+        """
+        每个名称取相似度不低于阈值的前 top_k 个其他名称，合并为无序对；
+        partitions 给出每个名称所属的分区（如所在表），同一分区内的名称不配对
+        """
+        if self.matrix is None:
+            raise RuntimeError("NameMatcher.match() 之前需要先调用 fit()")
+        rows, cols, scores = self._match_unique()
+        neighbor_start = np.searchsorted(rows, np.arange(self.matrix.shape[0] + 1))
+
+        order = np.argsort(self.groups, kind="stable")
+        member_start = np.searchsorted(self.groups[order], np.arange(self.matrix.shape[0] + 1))
+        members = [order[member_start[u]:member_start[u + 1]].tolist() for u in range(self.matrix.shape[0])]
+
+        pairs: Dict[Tuple[int, int], float] = {}
+        for u, group in enumerate(members):
+            neighbors = [(1.0, group)] + [
+                (score, members[v]) for v, score in
+                zip(cols[neighbor_start[u]:neighbor_start[u + 1]].tolist(),
+                    scores[neighbor_start[u]:neighbor_start[u + 1]].tolist())
+            ]
+            for position, i in enumerate(group):
+                picked = 0
+                for score, candidates in neighbors:
+                    # 同名列从自身之后开始轮转选取，避免所有列都连向同一批列
+                    if candidates is group:
+                        candidates = (group[(position + offset) % len(group)] for offset in range(1, len(group)))
+                    for j in candidates:
+                        if partitions is not None and partitions[i] == partitions[j]:
+                            continue
+                        pairs[(min(i, j), max(i, j))] = score
+                        picked += 1
+                        if picked >= self.top_k:
+                            break
+                    if picked >= self.top_k:
+                        break
+
+        logging.info(f"名称匹配：{len(self.groups)} 个名称（{len(members)} 个不同名称），{len(pairs)} 个匹配对")
+        return [(i, j, score) for (i, j), score in sorted(pairs.items())]
@@ -0,0 +1,272 @@
+# backend/services/neo4j_backend.py
+"""
+Neo4j 图存储后端
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.services.graph_backend import GraphBackend
+from backend.services.graph_schema import ensure_schema, verify_index_usage
+from backend.services.neo4j_driver import get_driver
+
+
+def _merge_asset_query(label: Optional[str]) -> str:
+    """UNWIND 批量 MERGE 同一标签资产的语句"""
+    query = """
+    UNWIND $rows AS row
+    MERGE (a:DataAsset {id: row.id})
+    SET a += row
+    """
+    if label:
+        query += f" SET a:{label}"
+    return query
+
+
+def _merge_asset_columns_query(label: Optional[str], keys: List[str]) -> str:
+    """按下标 UNWIND 列数组批量 MERGE 资产的语句：共有属性整体写入，其余属性逐列取值"""
+    assignments = ", ".join(f"a.`{key}` = $columns.`{key}`[i]" for key in keys if key != "id")
+    query = """
+    UNWIND range(0, size($columns.id) - 1) AS i
+    MERGE (a:DataAsset {id: $columns.id[i]})
+    SET a += $shared
+    """
+    if assignments:
+        query += f" SET {assignments}"
+    if label:
+        query += f" SET a:{label}"
+    return query
+
+
+def _merge_relationship_query(rel_type: str, merge_keys: List[str], create_missing: bool) -> str:
+    """UNWIND 批量 MERGE 关系的语句：merge_keys 中的属性参与 MERGE 匹配，其余属性覆盖写入"""
+    node_clause = "MERGE" if create_missing else "MATCH"
+    pattern = f"r:{rel_type}"
+    if merge_keys:
+        pattern += " {" + ", ".join(f"{key}: row.props.{key}" for key in merge_keys) + "}"
+    return f"""
+    UNWIND $rows AS row
+    {node_clause} (src:DataAsset {{id: row.source}})
+    {node_clause} (tgt:DataAsset {{id: row.target}})
+    MERGE (src)-[{pattern}]->(tgt)
+    SET r += row.props
+    RETURN count(r) AS merged
+    """
+
+
+# 血缘关系压缩：把旧版本写入的 LINEAGE 副本折叠进 DERIVED_FROM，
+# 并去掉同一对节点间 method 相同的重复 DERIVED_FROM。
+# CALL {...} IN TRANSACTIONS 只能在自动提交事务中执行
+COMPACT_LINEAGE_QUERIES = {
+    # 自动发现写入的 LINEAGE 副本（type='DERIVED_FROM'），已有对应 DERIVED_FROM 时直接删除
+    "lineage_removed": """
+    MATCH (s:DataAsset)-[l:LINEAGE]->(t:DataAsset)
+    WHERE l.type = 'DERIVED_FROM' AND EXISTS { MATCH (s)-[:DERIVED_FROM]->(t) }
+    CALL { WITH l DELETE l } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) AS count
+    """,
+    # 没有对应 DERIVED_FROM 的副本转换为 method='unknown'
+    "lineage_orphans": """
+    MATCH (s:DataAsset)-[l:LINEAGE]->(t:DataAsset)
+    WHERE l.type = 'DERIVED_FROM'
+    CALL {
+        WITH s, l, t
+        MERGE (s)-[d:DERIVED_FROM {method: coalesce(l.method, 'unknown')}]->(t)
+        SET d.level = coalesce(d.level, l.level), d.similarity = coalesce(d.similarity, l.similarity)
+        DELETE l
+    } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) AS count
+    """,
+    # 手工创建的 LINEAGE（type 为业务关系名）转换为 method='manual'
+    "lineage_converted": """
+    MATCH (s:DataAsset)-[l:LINEAGE]->(t:DataAsset)
+    CALL {
+        WITH s, l, t
+        MERGE (s)-[d:DERIVED_FROM {method: 'manual', relationship: coalesce(l.type, 'LINEAGE')}]->(t)
+        DELETE l
+    } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) AS count
+    """,
+    # 同一对节点、同一 method 只保留相似度最高的一条
+    "deduplicated": """
+    MATCH (s:DataAsset)-[d:DERIVED_FROM]->(t:DataAsset)
+    WITH s, t, d ORDER BY coalesce(d.similarity, 0) DESC
+    WITH s, t, d.method AS method, d.relationship AS relationship, collect(d) AS rels
+    WHERE size(rels) > 1
+    UNWIND tail(rels) AS dup
+    CALL { WITH dup DELETE dup } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) AS count
+    """,
+}
+
+
+GET_ASSET_QUERY = "MATCH (a:DataAsset {id: $asset_id}) RETURN a"
+
+
+def _search_query(query: str, asset_type: str = None, limit: int = 50):
+    """构造资产搜索语句与参数"""
+    cypher_query = """
+    MATCH (a:DataAsset)
+    WHERE (a.name CONTAINS $query OR a.description CONTAINS $query)
+    """
+    params = {"query": query, "limit": limit}
+
+    if asset_type:
+        cypher_query += " AND a.type = $asset_type"
+        params["asset_type"] = asset_type
+
+    cypher_query += " RETURN a LIMIT $limit"
+    return cypher_query, params
+
+
+def _lineage_hop_query(direction: str, rel_types: List[str]) -> str:
+    """单跳血缘扩展语句"""
+    pattern = "|".join(rel_types)
+    if direction == "down":
+        match = f"MATCH (n:DataAsset {{id: fid}})-[r:{pattern}]->(m:DataAsset)"
+        source, target = "n.id", "m.id"
+    else:
+        match = f"MATCH (m:DataAsset)-[r:{pattern}]->(n:DataAsset {{id: fid}})"
+        source, target = "m.id", "n.id"
+    return f"""
+    UNWIND $frontier AS fid
+    {match}
+    RETURN DISTINCT {source} AS source, {target} AS target,
+           type(r) AS relationship, r.method AS method, r.level AS level, r.similarity AS similarity,
+           m.id AS id, m.name AS name, m.type AS type
+    LIMIT $limit
+    """
+
+
+def _lineage_pairs_query(rel_types: List[str]) -> str:
+    return (f"MATCH (s:DataAsset)-[:{'|'.join(rel_types)}]->(t:DataAsset) "
+            "RETURN DISTINCT s.id AS source, t.id AS target")
+
+
+def _run_read(tx, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return tx.run(query, parameters=params).data()
+
+
+def _run_write(tx, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return tx.run(query, parameters=params).data()
+
+
+class Neo4jBackend(GraphBackend):
+    name = "neo4j"
+
+    def __init__(self, uri=None, user=None, password=None):
+        # 驱动来自进程级注册表，参数缺省时使用 NEO4J_* 环境变量
+        self.driver = get_driver(uri, user, password)
+
+    def ensure_schema(self):
+        ensure_schema(self.driver)
+
+    def verify_index_usage(self) -> Dict[str, bool]:
+        return verify_index_usage(self.driver)
+
+    def _read(self, query: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        with self.driver.session() as session:
+            return session.execute_read(_run_read, query, params or {})
+
+    def _write(self, query: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        with self.driver.session() as session:
+            return session.execute_write(_run_write, query, params or {})
+
+    def merge_assets(self, label: Optional[str], rows: List[Dict[str, Any]]):
+        self._write(_merge_asset_query(label), {"rows": rows})
+
+    def merge_asset_columns(self, label: Optional[str], columns: Dict[str, List[Any]], shared: Dict[str, Any]):
+        self._write(_merge_asset_columns_query(label, list(columns)), {"columns": columns, "shared": shared})
+
+    def merge_relationships(self, rel_type: str, rows: List[Dict[str, Any]], create_missing: bool = False,
+                            merge_keys: Optional[List[str]] = None) -> int:
+        # 参与匹配的属性键集合不同需要不同的 MERGE 模式，按键集合分组
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in rows:
+            keys = row["props"] if merge_keys is None else [key for key in merge_keys if key in row["props"]]
+            groups.setdefault(tuple(sorted(keys)), []).append(row)
+        merged = 0
+        for keys, group in groups.items():
+            records = self._write(_merge_relationship_query(rel_type, list(keys), create_missing),
+                                  {"rows": group})
+            merged += records[0]["merged"] if records else 0
+        return merged
+
+    def compact_lineage(self, batch_size: int = 10000) -> Dict[str, int]:
+        stats = {}
+        with self.driver.session() as session:
+            for step, query in COMPACT_LINEAGE_QUERIES.items():
+                record = session.run(query, batch_size=batch_size).single()
+                stats[step] = record["count"] if record else 0
+        # 孤立副本同样是从 LINEAGE 转换而来
+        stats["lineage_converted"] += stats.pop("lineage_orphans")
+        return stats
+
+    def get_asset(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        records = self._read(GET_ASSET_QUERY, {"asset_id": asset_id})
+        return dict(records[0]["a"]) if records else None
+
+    def search_assets(self, query: str, asset_type: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        cypher_query, params = _search_query(query, asset_type, limit)
+        return [dict(record["a"]) for record in self._read(cypher_query, params)]
+
+    def list_assets(self, asset_type: str = None, id_prefix: str = None,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        # 按需拼接条件，保证 type 条件能命中索引
+        conditions, params = [], {}
+        if asset_type:
+            conditions.append("a.type = $asset_type")
+            params["asset_type"] = asset_type
+        if id_prefix:
+            conditions.append("a.id STARTS WITH $id_prefix")
+            params["id_prefix"] = id_prefix
+        query = "MATCH (a:DataAsset)"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " RETURN a"
+        if limit is not None:
+            query += " LIMIT $limit"
+            params["limit"] = limit
+        return [dict(record["a"]) for record in self._read(query, params)]
+
+    def expand_lineage(self, frontier: List[str], direction: str, rel_types: List[str],
+                       limit: int) -> List[Dict[str, Any]]:
+        return self._read(_lineage_hop_query(direction, rel_types), {"frontier": frontier, "limit": limit})
+
+    def lineage_pairs(self, rel_types: List[str]) -> List[Tuple[str, str]]:
+        return [(rec["source"], rec["target"]) for rec in self._read(_lineage_pairs_query(rel_types))]
+
+    def list_relationships(self, rel_types: List[str], asset_type: str = None,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = f"MATCH (src:DataAsset)-[r:{'|'.join(rel_types)}]->(dst:DataAsset)"
+        params: Dict[str, Any] = {}
+        if asset_type:
+            query += " WHERE src.type = $asset_type AND dst.type = $asset_type"
+            params["asset_type"] = asset_type
+        query += " RETURN src.id AS source, dst.id AS target, type(r) AS relationship, properties(r) AS props"
+        if limit is not None:
+            query += " LIMIT $limit"
+            params["limit"] = limit
+        return self._read(query, params)
+
+    def count_assets_by_type(self) -> Dict[str, int]:
+        records = self._read("MATCH (a:DataAsset) RETURN a.type AS type, count(a) AS count")
+        return {rec["type"]: rec["count"] for rec in records}
+
+    def count_relationships(self, rel_type: str) -> int:
+        records = self._read(f"MATCH ()-[r:{rel_type}]->() RETURN count(r) AS count")
+        return records[0]["count"] if records else 0
+
+    def delete_assets_by_prefix(self, id_prefix: str) -> int:
+        # 前缀条件可走唯一约束索引；分批提交避免大事务
+        query = """
+        MATCH (a:DataAsset)
+        WHERE a.id = $id_prefix OR a.id STARTS WITH $id_prefix + '.'
+        CALL { WITH a DETACH DELETE a } IN TRANSACTIONS OF 10000 ROWS
+        RETURN count(*) AS deleted
+        """
+        with self.driver.session() as session:
+            record = session.run(query, id_prefix=id_prefix).single()
+        return record["deleted"] if record else 0
+
+    def clear(self):
+        with self.driver.session() as session:
+            session.run("MATCH (n) DETACH DELETE n").consume()
@@ -0,0 +1,74 @@
+# backend/services/neo4j_driver.py
+"""
+进程级 Neo4j 驱动注册表：同一 (uri, user) 只创建一个带连接池的驱动，
+所有模块共享，握手与认证开销只付一次
+"""
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from neo4j import AsyncGraphDatabase, GraphDatabase
+
+from backend.config import (
+    NEO4J_ACQUISITION_TIMEOUT, NEO4J_MAX_CONNECTION_LIFETIME, NEO4J_MAX_POOL_SIZE,
+    NEO4J_PASSWORD, NEO4J_URI, NEO4J_USER
+)
+
+_lock = threading.Lock()
+_drivers: Dict[Tuple[str, str], object] = {}
+_async_drivers: Dict[Tuple[str, str], object] = {}
+
+
+def _driver_settings(uri: Optional[str], user: Optional[str], password: Optional[str]):
+    uri = uri or NEO4J_URI
+    user = user or NEO4J_USER
+    password = password or NEO4J_PASSWORD
+    options = {
+        "auth": (user, password),
+        "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_ACQUISITION_TIMEOUT,
+        "max_connection_lifetime": NEO4J_MAX_CONNECTION_LIFETIME,
+    }
+    return (uri, user), uri, options
+
+
+def get_driver(uri: Optional[str] = None, user: Optional[str] = None, password: Optional[str] = None):
+    """获取共享的同步驱动，参数缺省时取环境变量配置"""
+    key, uri, options = _driver_settings(uri, user, password)
+    with _lock:
+        driver = _drivers.get(key)
+        if driver is None:
+            driver = GraphDatabase.driver(uri, **options)
+            _drivers[key] = driver
+            logging.info(f"创建 Neo4j 驱动 {uri}（连接池 {NEO4J_MAX_POOL_SIZE}）")
+        return driver
+
+
+def get_async_driver(uri: Optional[str] = None, user: Optional[str] = None, password: Optional[str] = None):
+    """获取共享的异步驱动"""
+    key, uri, options = _driver_settings(uri, user, password)
+    with _lock:
+        driver = _async_drivers.get(key)
+        if driver is None:
+            driver = AsyncGraphDatabase.driver(uri, **options)
+            _async_drivers[key] = driver
+            logging.info(f"创建 Neo4j 异步驱动 {uri}（连接池 {NEO4J_MAX_POOL_SIZE}）")
+        return driver
+
+
+def close_drivers():
+    """关闭全部同步驱动（进程退出时调用）"""
+    with _lock:
+        drivers = list(_drivers.values())
+        _drivers.clear()
+    for driver in drivers:
+        driver.close()
+
+
+async def close_async_drivers():
+    """关闭全部异步驱动（FastAPI shutdown 时调用）"""
+    with _lock:
+        drivers = list(_async_drivers.values())
+        _async_drivers.clear()
+    for driver in drivers:
+        await driver.close()
@@ -0,0 +1,131 @@
+# backend/services/query_cache.py
+"""
+图查询读缓存：有界 LRU + TTL，写操作递增图版本号使旧条目失效。
+版本变化同时写入 CACHE_DIR 下的标记文件，其他进程（如 API）查找缓存前检查该文件，
+命令行采集/发现写入的数据无需等待 TTL 过期即可见
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from backend.config import GRAPH_VERSION_PATH
+
+
+def _marker_stamp(path: Optional[Path]) -> Optional[tuple]:
+    if path is None:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def touch_graph_version(path: Optional[Path] = GRAPH_VERSION_PATH):
+    """替换图版本标记文件（每次替换得到新的 inode 与修改时间），使所有进程的读缓存失效"""
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(f"{time.time_ns()} {os.getpid()}", encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError:
+        # 标记文件不可写时只影响其他进程的缓存时效（仍受 TTL 约束）
+        pass
+
+
+class QueryCache:
+    """按 (查询名, 图版本, 参数) 缓存读结果；结果对象为共享只读，调用方不要修改"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0,
+                 version_path: Optional[Path] = GRAPH_VERSION_PATH):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        # 跨进程版本标记文件及上次看到的 (修改时间, 大小, inode)
+        self.version_path = version_path
+        self._marker = _marker_stamp(version_path)
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def _key(self, name: str, params: Dict[str, Any]) -> tuple:
+        return name, self.version, json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+    def lookup(self, name: str, params: Dict[str, Any]):
+        """返回 (命中, 值)"""
+        if self.max_entries <= 0:
+            return False, None
+        now = time.monotonic()
+        with self._lock:
+            self._sync_marker()
+            key = self._key(name, params)
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            return False, None
+
+    def store(self, name: str, params: Dict[str, Any], value, version: int):
+        """写入结果；若加载期间图版本已变化则丢弃"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[self._key(name, params)] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(self._key(name, params))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_or_load(self, name: str, params: Dict[str, Any], loader: Callable[[], Any]):
+        hit, value = self.lookup(name, params)
+        if hit:
+            return value
+        version = self.version
+        value = loader()
+        self.store(name, params, value, version)
+        return value
+
+    def _sync_marker(self):
+        """标记文件被其他进程替换过：本进程的缓存条目全部作废（调用方持有锁）"""
+        stamp = _marker_stamp(self.version_path)
+        if stamp != self._marker:
+            self._marker = stamp
+            self._invalidate()
+
+    def _invalidate(self):
+        self.version += 1
+        self._entries.clear()
+        self._stats["invalidations"] += 1
+
+    def bump_version(self):
+        """图数据发生写入：递增版本号、清空旧条目，并替换标记文件通知其他进程"""
+        with self._lock:
+            self._invalidate()
+            touch_graph_version(self.version_path)
+            self._marker = _marker_stamp(self.version_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "version": self.version,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,153 @@
+# backend/services/row_store.py
+"""
+行样本存储：采集到的样本行按 table_id 存放在本地 SQLite 文件中，
+每个源表对应一张独立的数据表（一列对应一个源字段），
+图中的 Row 节点只保留 row_hash/row_index 引用。
+行级分析按表整体读取为 DataFrame，无需逐个解析节点上的 JSON
+"""
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from backend.config import ROW_STORE_PATH
+
+# 每行固定的引用字段，其后依次为源表字段 c0, c1, ...
+REFERENCE_COLUMNS = ["row_id", "row_index", "row_hash"]
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS row_tables (
+    table_id TEXT PRIMARY KEY,
+    store_table TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    updated_time TEXT NOT NULL
+)
+"""
+
+
+def _store_table_name(table_id: str) -> str:
+    """table_id 可能含任意字符，数据表名取其哈希"""
+    return "rows_" + hashlib.md5(table_id.encode("utf-8")).hexdigest()[:16]
+
+
+def _sqlite_value(value: Any) -> Any:
+    """转换为 SQLite 可存储的值：numpy 标量取原生值，NaN 视为空，其余非基本类型转字符串"""
+    if value is None or isinstance(value, (str, int, bytes)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if hasattr(value, "item"):
+        return _sqlite_value(value.item())
+    return str(value)
+
+
+class RowStore:
+    def __init__(self, path: Path = ROW_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(CATALOG_SCHEMA)
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每次操作使用独立连接，可在多线程中共享同一个 RowStore
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    def write_rows(self, table_id: str, columns: Sequence[str], rows: Sequence[Tuple[str, int, str, Sequence[Any]]]):
+        """
+        整表写入一个源表的样本行，替换该表已有的样本；
+        rows 元素为 (row_id, row_index, row_hash, 与 columns 对应的值序列)
+        """
+        store_table = _store_table_name(table_id)
+        field_names = [f"c{i}" for i in range(len(columns))]
+        definition = ", ".join(["row_id TEXT PRIMARY KEY", "row_index INTEGER", "row_hash TEXT"] + field_names)
+        placeholders = ", ".join("?" * (len(REFERENCE_COLUMNS) + len(field_names)))
+        records = [(row_id, int(row_index), row_hash, *(_sqlite_value(v) for v in values))
+                   for row_id, row_index, row_hash, values in rows]
+
+        with closing(self._connect()) as conn, conn:
+            # 先取得写锁，DROP/CREATE 与写入在同一事务中，并发写入同一 table_id 时不会交错
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DROP TABLE IF EXISTS {store_table}")
+            conn.execute(f"CREATE TABLE {store_table} ({definition})")
+            conn.executemany(f"INSERT OR REPLACE INTO {store_table} VALUES ({placeholders})", records)
+            conn.execute(
+                "INSERT OR REPLACE INTO row_tables VALUES (?, ?, ?, ?, ?)",
+                (table_id, store_table, json.dumps(list(columns), ensure_ascii=False), len(records),
+                 datetime.now().isoformat())
+            )
+
+    def table_ids(self, prefix: Optional[str] = None) -> List[str]:
+        with closing(self._connect()) as conn:
+            if prefix:
+                cursor = conn.execute("SELECT table_id FROM row_tables WHERE substr(table_id, 1, ?) = ? "
+                                      "ORDER BY table_id", (len(prefix), prefix))
+            else:
+                cursor = conn.execute("SELECT table_id FROM row_tables ORDER BY table_id")
+            return [row[0] for row in cursor.fetchall()]
+
+    def read_table(self, table_id: str) -> Optional[pd.DataFrame]:
+        """读取一个源表的样本行：row_id/row_index/row_hash 加源字段列，不存在时返回 None"""
+        with closing(self._connect()) as conn:
+            entry = conn.execute("SELECT store_table, columns FROM row_tables WHERE table_id = ?",
+                                 (table_id,)).fetchone()
+            if entry is None:
+                return None
+            store_table, columns = entry[0], json.loads(entry[1])
+            frame = pd.read_sql_query(f"SELECT * FROM {store_table} ORDER BY row_index", conn)
+        frame.columns = REFERENCE_COLUMNS + columns
+        return frame
+
+    def iter_tables(self, prefix: Optional[str] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        for table_id in self.table_ids(prefix):
+            frame = self.read_table(table_id)
+            if frame is not None:
+                yield table_id, frame
+
+    def delete_tables(self, id_prefix: str) -> int:
+        """删除 table_id 等于 id_prefix 或以 "id_prefix." 开头的样本，返回删除的表数"""
+        return self._delete_where("table_id = ? OR substr(table_id, 1, ?) = ?",
+                                  (id_prefix, len(id_prefix) + 1, id_prefix + "."))
+
+    def clear(self):
+        self._delete_where("1 = 1", ())
+
+    def _delete_where(self, condition: str, params: tuple) -> int:
+        with closing(self._connect()) as conn, conn:
+            entries = conn.execute(f"SELECT table_id, store_table FROM row_tables WHERE {condition}", params).fetchall()
+            for table_id, store_table in entries:
+                conn.execute(f"DROP TABLE IF EXISTS {store_table}")
+                conn.execute("DELETE FROM row_tables WHERE table_id = ?", (table_id,))
+        return len(entries)
+
+    def stats(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            tables, rows = conn.execute("SELECT count(*), coalesce(sum(row_count), 0) FROM row_tables").fetchone()
+        return {"tables": tables, "rows": rows}
+
+
+_lock = threading.Lock()
+_stores: Dict[str, RowStore] = {}
+
+
+def get_row_store(path: Optional[Path] = None) -> RowStore:
+    """进程内按路径共享 RowStore"""
+    path = Path(path or ROW_STORE_PATH)
+    with _lock:
+        if str(path) not in _stores:
+            try:
+                _stores[str(path)] = RowStore(path)
+            except sqlite3.Error as e:
+                logging.error(f"行样本存储初始化失败 {path}: {e}")
+                raise
+        return _stores[str(path)]
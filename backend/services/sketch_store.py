@@ -0,0 +1,122 @@
+# backend/services/sketch_store.py
+"""
+列摘要存储：采集时为每列计算的 ColumnSketch（MinHash 签名、HyperLogLog、长度/数值直方图）
+按 table_id 存放在本地 SQLite 文件中。数据指纹血缘只读取摘要，不再读取原始数据；
+增量采集只重算变更数据源的摘要
+"""
+import logging
+import sqlite3
+import threading
+import zlib
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from backend.config import COLUMN_SKETCH_PATH
+from backend.services.sketches import ColumnSketch
+
+SKETCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS column_sketches (
+    column_id TEXT PRIMARY KEY,
+    table_id TEXT NOT NULL,
+    value_count INTEGER NOT NULL,
+    distinct_count INTEGER NOT NULL,
+    signature BLOB NOT NULL,
+    hll BLOB NOT NULL,
+    length_histogram BLOB NOT NULL,
+    numeric_histogram BLOB NOT NULL,
+    updated_time TEXT NOT NULL
+)
+"""
+SKETCH_INDEX = "CREATE INDEX IF NOT EXISTS column_sketches_table ON column_sketches (table_id)"
+
+
+class SketchStore:
+    def __init__(self, path: Path = COLUMN_SKETCH_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SKETCH_SCHEMA)
+            conn.execute(SKETCH_INDEX)
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每次操作使用独立连接，可在多线程中共享同一个 SketchStore
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    def write_sketches(self, table_id: str, sketches: Dict[str, ColumnSketch]):
+        """整表写入一个源表各列（column_id -> 摘要）的摘要，替换该表已有的摘要；HyperLogLog 寄存器压缩存放"""
+        now = datetime.now().isoformat()
+        records = [
+            (column_id, table_id, sketch.count, sketch.distinct(), sketch.signature().tobytes(),
+             zlib.compress(sketch.hll.registers.tobytes()), sketch.length_histogram.tobytes(),
+             sketch.numeric_histogram.tobytes(), now)
+            for column_id, sketch in sketches.items()
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM column_sketches WHERE table_id = ?", (table_id,))
+            conn.executemany("INSERT OR REPLACE INTO column_sketches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+
+    def load(self, min_distinct: int = 0) -> Dict[str, np.ndarray]:
+        """
+        按列读取不同值数不少于 min_distinct 的摘要：column_ids/table_ids/distinct 为一维数组，
+        signatures/hll/length_histograms/numeric_histograms 为每列一行的矩阵
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT column_id, table_id, distinct_count, signature, hll, length_histogram, numeric_histogram "
+                "FROM column_sketches WHERE distinct_count >= ? ORDER BY column_id", (min_distinct,)
+            ).fetchall()
+        if not rows:
+            return {"column_ids": np.empty(0, dtype=object), "table_ids": np.empty(0, dtype=object),
+                    "distinct": np.empty(0, dtype=np.int64)}
+        column_ids, table_ids, distinct, signatures, hll, lengths, numerics = zip(*rows)
+        return {
+            "column_ids": np.array(column_ids, dtype=object),
+            "table_ids": np.array(table_ids, dtype=object),
+            "distinct": np.array(distinct, dtype=np.int64),
+            "signatures": np.stack([np.frombuffer(blob, dtype=np.uint64) for blob in signatures]),
+            "hll": np.stack([np.frombuffer(zlib.decompress(blob), dtype=np.uint8) for blob in hll]),
+            "length_histograms": np.stack([np.frombuffer(blob, dtype=np.int64) for blob in lengths]),
+            "numeric_histograms": np.stack([np.frombuffer(blob, dtype=np.int64) for blob in numerics]),
+        }
+
+    def delete_tables(self, id_prefix: str) -> int:
+        """删除 table_id 等于 id_prefix 或以 "id_prefix." 开头的摘要，返回删除的列数"""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "DELETE FROM column_sketches WHERE table_id = ? OR substr(table_id, 1, ?) = ?",
+                (id_prefix, len(id_prefix) + 1, id_prefix + ".")
+            ).rowcount
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM column_sketches")
+
+    def stats(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            tables, columns = conn.execute(
+                "SELECT count(DISTINCT table_id), count(*) FROM column_sketches").fetchone()
+        return {"tables": tables, "columns": columns}
+
+
+_lock = threading.Lock()
+_stores: Dict[str, SketchStore] = {}
+
+
+def get_sketch_store(path: Optional[Path] = None) -> SketchStore:
+    """进程内按路径共享 SketchStore"""
+    path = Path(path or COLUMN_SKETCH_PATH)
+    with _lock:
+        if str(path) not in _stores:
+            try:
+                _stores[str(path)] = SketchStore(path)
+            except sqlite3.Error as e:
+                logging.error(f"列摘要存储初始化失败 {path}: {e}")
+                raise
+        return _stores[str(path)]
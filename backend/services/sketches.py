@@ -0,0 +1,251 @@
+# backend/services/sketches.py
+"""
+流式统计与相似性检索用的概率摘要：内存占用固定，可逐块更新
+"""
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """非空值的 64 位哈希（向量化），相同取值得到相同哈希"""
+    values = values.dropna()
+    if values.empty:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def bit_length(values: np.ndarray) -> np.ndarray:
+    """小于 2^53 的非负整数的二进制位数（向量化，0 的位数为 0）"""
+    return np.frexp(np.asarray(values, dtype=np.float64))[1]
+
+
+class BottomKSample:
+    """
+    带种子的均匀无放回抽样：每行分配一个随机优先级，保留优先级最小的 k 行。
+    与逐行的蓄水池抽样等价，但可以按数据块向量化更新
+    """
+
+    def __init__(self, k: int, seed: Optional[int] = 0):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.frame: Optional[pd.DataFrame] = None
+        self.priorities = np.empty(0)
+
+    def update(self, chunk: pd.DataFrame):
+        """chunk 的索引应为行在源数据中的位置"""
+        if self.k <= 0 or chunk.empty:
+            return
+        priorities = self.rng.random(len(chunk))
+        if self.frame is None:
+            frame, merged = chunk, priorities
+        else:
+            frame, merged = pd.concat([self.frame, chunk]), np.concatenate([self.priorities, priorities])
+        if len(merged) > self.k:
+            keep = np.argpartition(merged, self.k - 1)[:self.k]
+            frame, merged = frame.iloc[keep], merged[keep]
+        self.frame, self.priorities = frame, merged
+
+    def result(self) -> pd.DataFrame:
+        """按源数据位置排序的样本"""
+        if self.frame is None:
+            return pd.DataFrame()
+        return self.frame.sort_index()
+
+
+def mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 终混函数（向量化，uint64 乘法按 2^64 回绕）"""
+    with np.errstate(over="ignore"):
+        z = np.asarray(values, dtype=np.uint64)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class MinHasher:
+    """
+    MinHash 签名：第 i 个哈希函数为 mix64(token ^ seed_i)，签名取每个函数在集合上的最小值，
+    两个集合签名相同位置相等的概率等于其 Jaccard 相似度
+    """
+
+    def __init__(self, num_perm: int = 128, seed: Optional[int] = 0, block_rows: int = 8192):
+        self.num_perm = num_perm
+        self.seeds = np.random.default_rng(seed).integers(0, np.iinfo(np.int64).max, size=num_perm,
+                                                           dtype=np.int64).astype(np.uint64)
+        # 每次处理的集合数，限制中间矩阵 (block_rows × num_perm) 的内存
+        self.block_rows = block_rows
+
+    def signatures(self, tokens: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """
+        tokens 为 (集合数, 宽度) 的 token 哈希矩阵，valid 标记其中有效的 token（每行为一个集合），
+        返回 (集合数, num_perm) 的签名矩阵；空集合的签名全为 uint64 最大值
+        """
+        empty = np.iinfo(np.uint64).max
+        signatures = np.full((len(tokens), self.num_perm), empty, dtype=np.uint64)
+        for start in range(0, len(tokens), self.block_rows):
+            block = signatures[start:start + self.block_rows]
+            for column in range(tokens.shape[1]):
+                hashed = mix64(tokens[start:start + self.block_rows, column, None] ^ self.seeds[None, :])
+                hashed[~valid[start:start + self.block_rows, column]] = empty
+                np.minimum(block, hashed, out=block)
+        return signatures
+
+
+def lsh_params(threshold: float, num_perm: int = 128, recall: float = 0.999) -> Tuple[int, int]:
+    """
+    选择 LSH 分段 (bands, rows)：Jaccard 为 threshold 的集合对至少以 recall 的概率落入同一个桶，
+    在此前提下每段行数尽量多（候选对最少）
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+def lsh_band_keys(signatures: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """签名每段 rows 个值折叠为一个桶键，返回 (集合数, bands)"""
+    banded = signatures[:, :bands * rows].reshape(len(signatures), bands, rows)
+    keys = np.zeros((len(signatures), bands), dtype=np.uint64)
+    for column in range(rows):
+        keys = mix64(keys ^ banded[:, :, column])
+    return keys
+
+
+class HyperLogLog:
+    """
+    HyperLogLog 去重计数：哈希高 p 位选择寄存器，寄存器记录低 52 位中首个 1 的位置的最大值。
+    2^p 个寄存器的相对误差约 1.04/sqrt(2^p)，基数较小时用线性计数修正（接近精确）
+    """
+
+    def __init__(self, precision: int = 12, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None else registers
+
+    def update(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        rank = (53 - bit_length(hashes & np.uint64((1 << 52) - 1))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        return HyperLogLog(self.precision, np.maximum(self.registers, other.registers))
+
+    def estimate(self) -> int:
+        return int(round(float(hll_estimate(self.registers[None, :])[0])))
+
+
+def hll_estimate(registers: np.ndarray) -> np.ndarray:
+    """多个 HyperLogLog 的基数估计（每行一组寄存器，向量化）"""
+    m = registers.shape[1]
+    raw = 0.7213 / (1 + 1.079 / m) * m * m / np.ldexp(1.0, -registers.astype(np.int64)).sum(axis=1)
+    zeros = np.count_nonzero(registers == 0, axis=1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+# 列摘要的值长度直方图：按长度的二进制位数分桶（0、1、2-3、4-7、...、512 以上）
+LENGTH_BUCKETS = 11
+# 数值直方图：按数量级分桶，负数 [-1e12, -1e-4] 16 桶、零 1 桶、正数 [1e-4, 1e12] 16 桶
+NUMERIC_DECADES = (-4, 11)
+NUMERIC_BUCKETS = 2 * (NUMERIC_DECADES[1] - NUMERIC_DECADES[0] + 1) + 1
+
+
+class ColumnSketch:
+    """
+    列取值摘要，按数据块增量更新：
+    取值去重集合的 MinHash（单次排列哈希：哈希分到 num_bins 个桶，每桶取最小值，空桶按轮转补齐），
+    HyperLogLog 基数，值长度直方图与数值数量级直方图。取值统一按字符串比较，空值与空字符串不计入
+    """
+
+    def __init__(self, num_bins: int = 128, precision: int = 12):
+        self.num_bins = num_bins
+        self.count = 0
+        self.bins = np.full(num_bins, np.iinfo(np.uint64).max, dtype=np.uint64)
+        self.hll = HyperLogLog(precision)
+        self.length_histogram = np.zeros(LENGTH_BUCKETS, dtype=np.int64)
+        self.numeric_histogram = np.zeros(NUMERIC_BUCKETS, dtype=np.int64)
+
+    def update(self, values: pd.Series):
+        update_column_sketches({0: self}, pd.DataFrame({0: values}), self.num_bins, self.hll.precision)
+
+    def distinct(self) -> int:
+        return self.hll.estimate()
+
+    def signature(self) -> np.ndarray:
+        """
+        补齐空桶后的 MinHash 签名：空桶取其后（循环）第一个非空桶的值并按距离混合，
+        两个签名相同位置相等的概率约等于去重集合的 Jaccard 相似度；空集合的签名全为 uint64 最大值
+        """
+        empty = self.bins == np.iinfo(np.uint64).max
+        if empty.all() or not empty.any():
+            return self.bins.copy()
+        positions = np.arange(self.num_bins)
+        filled = np.where(~empty, positions, 2 * self.num_bins)
+        # 每个位置之后（含自身，循环两圈）最近的非空桶
+        following = np.minimum.accumulate(np.r_[filled, filled + self.num_bins][::-1])[::-1][:self.num_bins]
+        distance = (following - positions).astype(np.uint64)
+        source = self.bins[following % self.num_bins]
+        return np.where(empty, mix64(source ^ mix64(distance)), self.bins)
+
+
+def _numeric_buckets(numbers: np.ndarray) -> np.ndarray:
+    low, high = NUMERIC_DECADES
+    with np.errstate(divide="ignore"):
+        decades = np.clip(np.floor(np.log10(np.abs(numbers))), low, high).astype(np.int64) - low + 1
+    zero = NUMERIC_BUCKETS // 2
+    return np.where(numbers > 0, zero + decades, np.where(numbers < 0, zero - decades, zero))
+
+
+def update_column_sketches(sketches: Dict[Any, ColumnSketch], frame: pd.DataFrame,
+                           num_bins: int = 128, precision: int = 12):
+    """
+    用 frame 的全部列更新各列摘要（sketches 中缺少的列新建）：全部单元格按列展开为一个序列，
+    只做一次字符串转换、哈希、长度与数值解析，再按列号分散到各列的桶、寄存器与直方图
+    """
+    columns = list(frame.columns)
+    for col in columns:
+        sketches.setdefault(col, ColumnSketch(num_bins, precision))
+    if frame.empty:
+        return
+
+    cells = pd.Series(frame.to_numpy(dtype=object).T.ravel(), dtype=object)
+    owner = np.repeat(np.arange(len(columns)), len(frame))
+    present = cells.notna().to_numpy()
+    text = cells[present].astype(str)
+    nonempty = (text != "").to_numpy()
+    text, owner = text[nonempty], owner[present][nonempty]
+    if text.empty:
+        return
+
+    hashes = pd.util.hash_pandas_object(text, index=False).to_numpy(dtype=np.uint64)
+    size = 1 << precision
+    registers = np.zeros(len(columns) * size, dtype=np.uint8)
+    rank = (53 - bit_length(hashes & np.uint64((1 << 52) - 1))).astype(np.uint8)
+    np.maximum.at(registers, owner * size + (hashes >> np.uint64(64 - precision)).astype(np.intp), rank)
+    # 桶号与桶内取值使用另一次混合，与 HyperLogLog 的寄存器选择相互独立
+    mixed = mix64(hashes)
+    bins = np.full(len(columns) * num_bins, np.iinfo(np.uint64).max, dtype=np.uint64)
+    np.minimum.at(bins, owner * num_bins + (mixed % np.uint64(num_bins)).astype(np.intp), mixed)
+
+    lengths = np.minimum(bit_length(text.str.len().to_numpy()), LENGTH_BUCKETS - 1)
+    length_histograms = np.bincount(owner * LENGTH_BUCKETS + lengths, minlength=len(columns) * LENGTH_BUCKETS)
+    numbers = pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64)
+    finite = np.isfinite(numbers)
+    numeric_histograms = np.bincount(owner[finite] * NUMERIC_BUCKETS + _numeric_buckets(numbers[finite]),
+                                     minlength=len(columns) * NUMERIC_BUCKETS)
+    counts = np.bincount(owner, minlength=len(columns))
+
+    registers, bins = registers.reshape(len(columns), size), bins.reshape(len(columns), num_bins)
+    length_histograms = length_histograms.reshape(len(columns), LENGTH_BUCKETS)
+    numeric_histograms = numeric_histograms.reshape(len(columns), NUMERIC_BUCKETS)
+    for position, col in enumerate(columns):
+        sketch = sketches[col]
+        sketch.count += int(counts[position])
+        np.minimum(sketch.bins, bins[position], out=sketch.bins)
+        np.maximum(sketch.hll.registers, registers[position], out=sketch.hll.registers)
+        sketch.length_histogram += length_histograms[position]
+        sketch.numeric_histogram += numeric_histograms[position]
@@ -0,0 +1,323 @@
+# backend/services/sql_lineage.py
+"""
+SQL 字段级血缘解析：每个输出列中的列引用经所在 SELECT 的别名映射解析到真实源表（CTE、子查询逐层追溯）。
+解析结果以 (文件内容哈希, 解析器版本) 为键缓存在本地 SQLite 文件中；未命中缓存的文件在进程池中并行解析，
+重复运行时只重新解析内容有变化的文件
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import sqlglot
+from sqlglot import exp
+
+from backend.config import SQL_LINEAGE_CACHE_PATH, SQL_PARSE_WORKERS
+
+# 提取逻辑变化时递增，使已缓存的解析结果失效
+EXTRACTOR_VERSION = 1
+PARSER_VERSION = f"sqlglot-{sqlglot.__version__}/extractor-{EXTRACTOR_VERSION}"
+TARGET_PATTERN = re.compile(r"--\s*target:\s*(\w+)", re.I)
+# 集合运算节点：新版 sqlglot 为 SetOperation，旧版 Intersect/Except 继承自 Union
+SET_OPERATION = getattr(exp, "SetOperation", exp.Union)
+# CTE/子查询的最大追溯深度（防止递归 CTE 无限展开）
+MAX_RESOLVE_DEPTH = 32
+
+
+def _safe_id(raw: str) -> str:
+    return re.sub(r'[^0-9A-Za-z._-]', '_', str(raw))
+
+
+# ------------------------------------------------------------------
+# 列解析：别名 -> 源表/派生查询
+# ------------------------------------------------------------------
+def _children(node: exp.Expression, kind: type) -> List[exp.Expression]:
+    """node 的直接子节点中属于 kind 的节点（不依赖各版本 sqlglot 的参数名）"""
+    return [child for child in node.iter_expressions() if isinstance(child, kind)]
+
+
+def _with_ctes(query: exp.Expression, ctes: Dict[str, exp.Expression]) -> Dict[str, exp.Expression]:
+    """外层可见的 CTE 加上 query 自身 WITH 子句定义的 CTE（同名时内层覆盖外层）"""
+    withs = _children(query, exp.With)
+    if not withs:
+        return ctes
+    ctes = dict(ctes)
+    for with_ in withs:
+        for cte in with_.expressions:
+            ctes[cte.alias_or_name] = cte.this
+    return ctes
+
+
+def _branches(query: exp.Expression, ctes: Dict[str, exp.Expression]) -> List[Tuple[exp.Select, Dict]]:
+    """查询的各个 SELECT 分支及其可见的 CTE：集合运算（UNION 等）展开为左右分支"""
+    ctes = _with_ctes(query, ctes)
+    if isinstance(query, SET_OPERATION):
+        return _branches(query.this, ctes) + _branches(query.expression, ctes)
+    if isinstance(query, exp.Subquery):
+        return _branches(query.this, ctes)
+    if isinstance(query, exp.Select):
+        return [(query, ctes)]
+    return []
+
+
+def _sources(select: exp.Select, ctes: Dict[str, exp.Expression]) -> Dict[str, exp.Expression]:
+    """SELECT 的 FROM/JOIN 来源：别名（无别名时为表名）-> 真实表（exp.Table）或派生查询（CTE/子查询）"""
+    sources = {}
+    for clause in _children(select, exp.From) + _children(select, exp.Join):
+        source = clause.this
+        if isinstance(source, exp.Table):
+            derived = ctes.get(source.name) if not source.db else None
+            sources[source.alias_or_name] = derived if derived is not None else source
+        elif isinstance(source, exp.Subquery):
+            sources[source.alias_or_name] = source.this
+    return sources
+
+
+def _resolve_column(table: str, name: str, sources: Dict[str, exp.Expression],
+                    ctes: Dict[str, exp.Expression], depth: int) -> Set[Tuple[str, str]]:
+    """列引用 table.name 追溯到的真实 (源表, 源列)；未限定的列只在 SELECT 仅有一个来源时可以确定"""
+    if table:
+        source = sources.get(table)
+        if source is None:
+            # 别名不在当前 SELECT 中（如外层查询的别名），按引用中的表名记录
+            return {(table, name)}
+    elif len(sources) == 1:
+        source = next(iter(sources.values()))
+    else:
+        return set()
+    if isinstance(source, exp.Table):
+        return {(source.name, name)}
+    return _resolve_output(source, name, ctes, depth + 1)
+
+
+def _projection_sources(projection: exp.Expression, select: exp.Select,
+                        ctes: Dict[str, exp.Expression], depth: int) -> Set[Tuple[str, str]]:
+    """一个输出列表达式引用的真实 (源表, 源列)；标量子查询内部的列属于其自身作用域，不计入"""
+    sources = _sources(select, ctes)
+    resolved = set()
+    for column in projection.find_all(exp.Column):
+        if column.name and not isinstance(column.this, exp.Star) and column.find_ancestor(exp.Select) is select:
+            resolved |= _resolve_column(column.table, column.name, sources, ctes, depth)
+    return resolved
+
+
+def _aligned_projections(branches: List[Tuple[exp.Select, Dict]]) -> List[Tuple[str, exp.Expression, exp.Select, Dict]]:
+    """各分支的 (输出列名, 输出列表达式, SELECT, CTE)：集合运算的输出列名取自第一个分支，其余分支按位置对应"""
+    names = [projection.alias_or_name for projection in branches[0][0].expressions] if branches else []
+    return [(name, projection, select, ctes) for select, ctes in branches
+            for name, projection in zip(names, select.expressions)]
+
+
+def _resolve_output(query: exp.Expression, name: str, ctes: Dict[str, exp.Expression],
+                    depth: int) -> Set[Tuple[str, str]]:
+    """派生查询（CTE/子查询）中名为 name 的输出列追溯到的真实 (源表, 源列)；SELECT * 按原列名透传"""
+    if depth > MAX_RESOLVE_DEPTH:
+        return set()
+    resolved = set()
+    for output, projection, select, scoped in _aligned_projections(_branches(query, ctes)):
+        if isinstance(projection, exp.Star):
+            resolved |= _resolve_column("", name, _sources(select, scoped), scoped, depth)
+        elif isinstance(projection, exp.Column) and isinstance(projection.this, exp.Star):
+            resolved |= _resolve_column(projection.table, name, _sources(select, scoped), scoped, depth)
+        elif output == name:
+            resolved |= _projection_sources(projection, select, scoped, depth)
+    return resolved
+
+
+def extract_column_lineage(sql_content: str) -> Dict[str, Set[str]]:
+    """
+    从 SQL 文本提取字段级血缘 {目标列ID: {源列ID}}：目标表由 "-- target: 表名" 注释指定，
+    目标列为 INSERT/CREATE ... AS/独立查询最外层 SELECT 的各输出列；sqlglot 无法解析时退回正则匹配
+    """
+    lineage: Dict[str, Set[str]] = {}
+    target_match = TARGET_PATTERN.search(sql_content)
+    if not target_match:
+        return lineage
+    target_table = target_match.group(1)
+
+    try:
+        parsed = sqlglot.parse(sql_content)
+    except Exception:
+        return _fallback_sql_parsing(sql_content, target_table)
+
+    for stmt in parsed:
+        query = stmt if isinstance(stmt, exp.Query) else stmt.args.get("expression") if stmt else None
+        if not isinstance(query, exp.Query):
+            continue
+        # INSERT 语句的 WITH 子句挂在语句上而不在查询上
+        branches = _branches(query, _with_ctes(stmt, {}) if stmt is not query else {})
+        for target_col, projection, select, ctes in _aligned_projections(branches):
+            if not target_col or isinstance(projection, exp.Star):
+                continue
+            tgt_full = f"virtual.{_safe_id(target_table)}.{_safe_id(target_col)}"
+            for src_table, src_col in _projection_sources(projection, select, ctes, 0):
+                lineage.setdefault(tgt_full, set()).add(f"file.{_safe_id(src_table)}.{_safe_id(src_col)}")
+    return lineage
+
+
+def _fallback_sql_parsing(sql_content: str, target_table: str) -> Dict[str, Set[str]]:
+    lineage = {}
+    insert_pattern = r'INSERT\s+INTO\s+(\w+)\s+SELECT\s+(.+?)\s+FROM\s+(\w+)'
+    for m in re.finditer(insert_pattern, sql_content, re.I | re.S):
+        tgt, cols, src = m.groups()
+        for i, col in enumerate(cols.split(',')):
+            src_col = f"col_{i}"
+            src_full = f"file.{_safe_id(src)}.{_safe_id(src_col)}"
+            tgt_full = f"virtual.{_safe_id(tgt)}.{_safe_id(col.strip())}"
+            lineage.setdefault(tgt_full, set()).add(src_full)
+
+    view_pattern = r'CREATE\s+VIEW\s+(\w+)\s+AS\s+SELECT\s+(.+?)\s+FROM\s+(\w+)'
+    for m in re.finditer(view_pattern, sql_content, re.I | re.S):
+        tgt, cols, src = m.groups()
+        for col_expr in cols.split(','):
+            col_match = re.match(r'(.+?)\s+AS\s+(\w+)', col_expr, re.I)
+            if col_match:
+                src_col = col_match.group(1).strip().split()[-1]
+                tgt_col = col_match.group(2).strip()
+                src_full = f"file.{_safe_id(src)}.{_safe_id(src_col)}"
+                tgt_full = f"virtual.{_safe_id(tgt)}.{_safe_id(tgt_col)}"
+                lineage.setdefault(tgt_full, set()).add(src_full)
+    return lineage
+
+
+def parse_sql_column_lineage(sql_path: Path) -> Dict[str, Set[str]]:
+    """解析单个 SQL 文件（不经缓存），失败时返回空结果"""
+    try:
+        with open(sql_path, encoding="utf-8-sig") as f:
+            return extract_column_lineage(f.read())
+    except Exception as e:
+        print(f"❌ SQL 解析失败 {sql_path}: {e}")
+        return {}
+
+
+# ------------------------------------------------------------------
+# 解析结果缓存
+# ------------------------------------------------------------------
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sql_lineage (
+    content_hash TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    lineage TEXT NOT NULL,
+    updated_time TEXT NOT NULL,
+    PRIMARY KEY (content_hash, parser_version)
+)
+"""
+# 单条 IN 查询的参数个数上限（旧版 SQLite 限制为 999）
+CACHE_LOOKUP_CHUNK = 500
+
+
+class SqlLineageCache:
+    """按文件内容哈希缓存的解析结果 {目标列ID: [源列ID]}，只对应当前的 PARSER_VERSION"""
+
+    def __init__(self, path: Path = SQL_LINEAGE_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(CACHE_SCHEMA)
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    def get_many(self, content_hashes: Iterable[str]) -> Dict[str, Dict[str, List[str]]]:
+        content_hashes = list(content_hashes)
+        found = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(content_hashes), CACHE_LOOKUP_CHUNK):
+                chunk = content_hashes[start:start + CACHE_LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"SELECT content_hash, lineage FROM sql_lineage WHERE parser_version = ? "
+                    f"AND content_hash IN ({', '.join('?' * len(chunk))})", [PARSER_VERSION, *chunk]
+                ).fetchall()
+                found.update((content_hash, json.loads(lineage)) for content_hash, lineage in rows)
+        return found
+
+    def put_many(self, entries: Dict[str, Dict[str, List[str]]]):
+        now = datetime.now().isoformat()
+        records = [(content_hash, PARSER_VERSION, json.dumps(lineage, ensure_ascii=False), now)
+                   for content_hash, lineage in entries.items()]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO sql_lineage VALUES (?, ?, ?, ?)", records)
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM sql_lineage")
+
+    def stats(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            entries, current = conn.execute(
+                "SELECT count(*), sum(parser_version = ?) FROM sql_lineage", (PARSER_VERSION,)).fetchone()
+        return {"entries": entries, "current": current or 0}
+
+
+_lock = threading.Lock()
+_caches: Dict[str, SqlLineageCache] = {}
+
+
+def get_sql_lineage_cache(path: Optional[Path] = None) -> SqlLineageCache:
+    """进程内按路径共享 SqlLineageCache"""
+    path = Path(path or SQL_LINEAGE_CACHE_PATH)
+    with _lock:
+        if str(path) not in _caches:
+            try:
+                _caches[str(path)] = SqlLineageCache(path)
+            except sqlite3.Error as e:
+                logging.error(f"SQL 解析缓存初始化失败 {path}: {e}")
+                raise
+        return _caches[str(path)]
+
+
+# ------------------------------------------------------------------
+# 并行解析
+# ------------------------------------------------------------------
+def _parse_task(sql_path: str, sql_content: str) -> Dict[str, List[str]]:
+    """进程池任务：解析一个 SQL 文件的内容，源列集合转为有序列表以便序列化与缓存"""
+    try:
+        return {target: sorted(sources) for target, sources in extract_column_lineage(sql_content).items()}
+    except Exception as e:
+        print(f"❌ SQL 解析失败 {sql_path}: {e}")
+        return {}
+
+
+def parse_sql_files(sql_files: List[Path], cache: Optional[SqlLineageCache] = None,
+                    workers: int = SQL_PARSE_WORKERS) -> Tuple[Dict[Path, Dict[str, List[str]]], int]:
+    """
+    解析一批 SQL 文件，返回 ({文件: {目标列ID: [源列ID]}}, 实际解析的不同内容数)。
+    文件内容哈希命中缓存的直接使用缓存结果；其余按内容去重后分发到进程池解析
+    （workers <= 1 或只有一个待解析内容时在当前进程内解析），结果写回缓存
+    """
+    cache = cache or get_sql_lineage_cache()
+    file_hashes: Dict[Path, str] = {}
+    contents: Dict[str, Tuple[Path, bytes]] = {}
+    for sql_file in sql_files:
+        try:
+            raw = sql_file.read_bytes()
+        except OSError as e:
+            print(f"❌ 读取SQL文件失败 {sql_file}: {e}")
+            continue
+        file_hashes[sql_file] = hashlib.sha256(raw).hexdigest()
+        contents.setdefault(file_hashes[sql_file], (sql_file, raw))
+
+    results = cache.get_many(contents)
+    missing = [content_hash for content_hash in contents if content_hash not in results]
+    paths = [str(contents[content_hash][0]) for content_hash in missing]
+    texts = [contents[content_hash][1].decode("utf-8-sig", errors="replace") for content_hash in missing]
+    if workers <= 1 or len(missing) <= 1:
+        parsed = [_parse_task(path, text) for path, text in zip(paths, texts)]
+    else:
+        workers = min(workers, len(missing))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_task, paths, texts, chunksize=max(1, len(missing) // (4 * workers))))
+
+    if missing:
+        cache.put_many(dict(zip(missing, parsed)))
+        results.update(zip(missing, parsed))
+    return {sql_file: results[content_hash] for sql_file, content_hash in file_hashes.items()}, len(missing)
@@ -1,9 +1,9 @@
 # debug_lineage.py
-from neo4j import GraphDatabase
+from backend.services.neo4j_driver import close_drivers, get_driver
 
 
 def debug_lineage(asset_id):
-    driver = GraphDatabase.driver("bolt://localhost:7687", auth=("neo4j", "password"))
+    driver = get_driver()
 
     with driver.session() as session:
         # 检查资产是否存在
@@ -36,7 +36,7 @@ def debug_lineage(asset_id):
                 if source:
                     print(f"  ← {source['name']} ({source['type']})")
 
-        # 检查 LINEAGE 关系
+        # 检查旧版 LINEAGE 关系（应为 0，否则运行 backend/scripts/compact_lineage.py）
         result = session.run("""
         MATCH (a:DataAsset {id: $asset_id})
         OPTIONAL MATCH (a)-[r:LINEAGE]->(target)
@@ -49,7 +49,7 @@ def debug_lineage(asset_id):
             print(f"🔗 LINEAGE下游关系: {len(record['targets'])} 个")
             print(f"🔗 LINEAGE上游关系: {len(record['sources'])} 个")
 
-    driver.close()
+    close_drivers()
 
 
 if __name__ == "__main__":
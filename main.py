@@ -1,19 +1,41 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from backend.services.graph_service import GraphService
+from backend.services.async_graph_service import create_async_graph_service
+from backend.services.graph_backend import close_graph_backends
+from backend.services.neo4j_driver import close_async_drivers
 from backend.models.metadata import DataAsset, LineageEdge
-import os
 from backend.services.lineage_discovery import *
 from backend.services.policy_engine import PolicyEngine, EnhancedGraphService
 from backend.services.data_quality import DataQualityChecker, generate_quality_report
 from backend.services.lineage_discovery import get_lineage_graph_for_frontend
+from backend.services.reachability_index import get_reachability_index, save_reachability_index
 import pandas as pd
 from pathlib import Path
 from urllib.parse import unquote
 
 
-app = FastAPI(title="数据编织原型系统")
+# 图后端由 GRAPH_BACKEND 选择；Neo4j 连接与连接池配置来自 NEO4J_* 环境变量，驱动在进程内共享
+graph_service = GraphService()
+# 协程端点使用异步服务，与同步服务共享读缓存
+async_graph_service = create_async_graph_service(graph_service)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await async_graph_service.verify_connectivity()
+    except Exception as e:
+        print(f"⚠️ Neo4j 连接预热失败: {e}")
+    yield
+    await close_async_drivers()
+    close_graph_backends()
+
+
+app = FastAPI(title="数据编织原型系统", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,10 +44,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 使用环境变量或默认值配置Neo4j连接
-neo4j_host = os.getenv("NEO4J_HOST", "localhost")
-graph_service = GraphService(f"bolt://{neo4j_host}:7687", "neo4j", "password")
-
 
 @app.get("/")
 async def root():
@@ -35,7 +53,7 @@ async def root():
 @app.post("/assets/")
 async def create_asset(asset: DataAsset):
     try:
-        graph_service.create_asset(asset)
+        await async_graph_service.create_asset(asset)
         return {"status": "success", "asset_id": asset.id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -44,22 +62,29 @@ async def create_asset(asset: DataAsset):
 @app.get("/search/")
 async def search_assets(q: str, asset_type: str = None):
     try:
-        results = graph_service.search_assets(q, asset_type)
+        results = await async_graph_service.search_assets(q, asset_type)
         return {"query": q, "results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"搜索失败: {str(e)}")
 
 
 @app.get("/assets/{asset_id}/lineage")
-async def get_asset_lineage(asset_id: str, depth: int = 3):
+async def get_asset_lineage(asset_id: str, depth: int = 3, direction: str = "both",
+                            rel_types: str = None, max_nodes: int = 500, max_edges: int = 1000):
     try:
         asset_id = unquote(asset_id)
-        print(f"🔍 查询血缘关系，资产ID: {asset_id}")
+        print(f"🔍 查询血缘关系，资产ID: {asset_id}, 深度: {depth}, 方向: {direction}")
 
-        lineage = graph_service.get_lineage(asset_id, depth)
-        print(f"✅ 血缘查询结果: {len(lineage.get('nodes', []))} 个节点, {len(lineage.get('edges', []))} 条边")
+        relationship_types = [t.strip() for t in rel_types.split(",") if t.strip()] if rel_types else None
+        lineage = await async_graph_service.get_lineage(asset_id, depth, direction=direction,
+                                                        relationship_types=relationship_types,
+                                                        max_nodes=max_nodes, max_edges=max_edges)
+        print(f"✅ 血缘查询结果: {len(lineage.get('nodes', []))} 个节点, {len(lineage.get('edges', []))} 条边"
+              f"{'（已截断）' if lineage.get('truncated') else ''}")
 
         return {"asset_id": asset_id, "lineage": lineage}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"❌ 获取血缘失败: {str(e)}")
         import traceback
@@ -67,10 +92,24 @@ async def get_asset_lineage(asset_id: str, depth: int = 3):
         raise HTTPException(status_code=500, detail=f"获取血缘失败: {str(e)}")
 
 
+@app.get("/assets/{asset_id}/impact")
+async def get_asset_impact(asset_id: str, limit: int = 1000):
+    """基于预计算可达性索引的影响分析"""
+    try:
+        asset_id = unquote(asset_id)
+        index = await run_in_threadpool(get_reachability_index)
+        if index is None:
+            edges = await async_graph_service.get_lineage_edges()
+            index = await run_in_threadpool(save_reachability_index, edges)
+        return index.impact(asset_id, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"影响分析失败: {str(e)}")
+
+
 @app.post("/lineage/")
 async def create_lineage(edge: LineageEdge):
     try:
-        graph_service.create_lineage(
+        await async_graph_service.create_lineage(
             edge.source_id,
             edge.target_id,
             edge.relationship
@@ -117,21 +156,26 @@ async def analyze_asset_policy(asset_id: str):
     """分析资产策略"""
     try:
         policy_engine = PolicyEngine()
-        with graph_service.graph_service.driver.session() as session:
-            result = session.run("MATCH (a:DataAsset {id: $asset_id}) RETURN a", asset_id=asset_id)
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="资产未找到")
-            asset_data = record["a"]
-            policy = policy_engine.generate_data_governance_policy(dict(asset_data))
-            return policy
+        asset_data = await async_graph_service.get_asset(asset_id)
+        if not asset_data:
+            raise HTTPException(status_code=404, detail="资产未找到")
+        policy = policy_engine.generate_data_governance_policy(asset_data)
+        return policy
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"策略分析失败: {str(e)}")
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """图查询读缓存命中统计"""
+    return graph_service.cache.stats()
+
+
 @app.get("/lineage/graph")
 async def lineage_graph():
-    data = get_lineage_graph_for_frontend()
+    data = await run_in_threadpool(get_lineage_graph_for_frontend)
     return data if data else []
 
 
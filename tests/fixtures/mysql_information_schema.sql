@@ -0,0 +1,60 @@
+-- tests/fixtures/mysql_information_schema.sql
+-- MySQL information_schema 的 SQLite 替身：只包含 MySQLCollector 查询用到的表与列。
+-- 以 "information_schema" 为名 ATTACH 到 SQLite 连接后，采集器的查询无需修改即可执行
+
+CREATE TABLE SCHEMATA (
+    SCHEMA_NAME TEXT NOT NULL
+);
+
+CREATE TABLE TABLES (
+    TABLE_SCHEMA TEXT NOT NULL,
+    TABLE_NAME TEXT NOT NULL,
+    TABLE_TYPE TEXT NOT NULL,
+    TABLE_ROWS INTEGER,
+    TABLE_COMMENT TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE COLUMNS (
+    TABLE_SCHEMA TEXT NOT NULL,
+    TABLE_NAME TEXT NOT NULL,
+    COLUMN_NAME TEXT NOT NULL,
+    ORDINAL_POSITION INTEGER NOT NULL,
+    COLUMN_TYPE TEXT NOT NULL,
+    COLUMN_KEY TEXT NOT NULL DEFAULT '',
+    COLUMN_COMMENT TEXT NOT NULL DEFAULT ''
+);
+
+-- 系统库不作为数据资产采集
+INSERT INTO SCHEMATA (SCHEMA_NAME) VALUES
+    ('information_schema'), ('mysql'), ('performance_schema'), ('sys'),
+    ('crm'), ('sales'), ('warehouse');
+
+INSERT INTO TABLES (TABLE_SCHEMA, TABLE_NAME, TABLE_TYPE, TABLE_ROWS, TABLE_COMMENT) VALUES
+    ('mysql', 'user', 'BASE TABLE', 3, ''),
+    ('crm', 'customers', 'BASE TABLE', 1200, '客户主数据'),
+    ('crm', 'contacts', 'BASE TABLE', NULL, ''),
+    ('sales', 'orders', 'BASE TABLE', 50000, '订单'),
+    ('sales', 'order_items', 'BASE TABLE', 180000, ''),
+    -- 视图不采集
+    ('sales', 'v_daily_revenue', 'VIEW', NULL, 'VIEW'),
+    -- 没有表的库
+    ('warehouse', 'v_stock', 'VIEW', NULL, 'VIEW');
+
+-- 列按 ORDINAL_POSITION 倒序插入，验证采集结果按位置排序
+INSERT INTO COLUMNS (TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, COLUMN_TYPE, COLUMN_KEY, COLUMN_COMMENT) VALUES
+    ('mysql', 'user', 'User', 1, 'char(32)', 'PRI', ''),
+    ('crm', 'customers', 'region', 3, 'varchar(32)', 'MUL', ''),
+    ('crm', 'customers', 'name', 2, 'varchar(64)', '', '客户名称'),
+    ('crm', 'customers', 'customer_id', 1, 'bigint', 'PRI', ''),
+    ('crm', 'contacts', 'email', 3, 'varchar(128)', 'UNI', ''),
+    ('crm', 'contacts', 'customer_id', 2, 'bigint', 'PRI', ''),
+    ('crm', 'contacts', 'contact_no', 1, 'int', 'PRI', ''),
+    ('sales', 'orders', 'amount', 3, 'decimal(12,2)', '', '订单金额'),
+    ('sales', 'orders', 'customer_id', 2, 'bigint', 'MUL', ''),
+    ('sales', 'orders', 'order_id', 1, 'bigint', 'PRI', ''),
+    ('sales', 'order_items', 'quantity', 3, 'int', '', ''),
+    ('sales', 'order_items', 'sku', 2, 'varchar(32)', '', ''),
+    ('sales', 'order_items', 'order_id', 1, 'bigint', 'MUL', ''),
+    ('sales', 'v_daily_revenue', 'day', 1, 'date', '', ''),
+    ('sales', 'v_daily_revenue', 'revenue', 2, 'decimal(12,2)', '', ''),
+    ('warehouse', 'v_stock', 'sku', 1, 'varchar(32)', '', '');